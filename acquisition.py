@@ -0,0 +1,37 @@
+"""数据采集守护进程
+
+独占串口/TCP网关等现场设备并运行问询线程，通过Unix套接字向Web进程提供数据。
+Web进程设置 ACQUISITION_MODE=remote 后即可以多进程方式运行（见 wsgi.py）。
+"""
+
+import logging
+import signal
+import sys
+
+from app.config import Config
+from app.ipc import AcquisitionServer
+from app.serial import serial_service
+from app.shm import LatestValueTable
+
+logger = logging.getLogger("app.acquisition")
+
+
+def main():
+    """运行采集守护进程"""
+    # 最新值写入共享内存，Web工作进程无需IPC即可读取
+    serial_service.latest_table = LatestValueTable.create()
+    server = AcquisitionServer(serial_service, Config.ACQUISITION_SOCKET)
+    # 收到SIGTERM时正常退出，删除套接字文件
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    logger.info("采集守护进程已启动，监听: %s", server.path)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        serial_service.latest_table.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,12 +6,20 @@ from flask_cors import CORS
 
 from app.config import Config
 from app.database import init_db
+from app.encoding import FastJSONProvider
+from app.logs import setup_logging
+
+# 配置日志（后台线程写出）
+setup_logging()
 
 # 创建Flask应用实例
 # 指定模板目录为项目根目录下的templates
 app = Flask(__name__, template_folder=os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates'))
 app.config.from_object(Config)
 
+# 使用快速JSON编码器（orjson可用时）
+app.json = FastJSONProvider(app)
+
 # 启用CORS
 CORS(app)
 
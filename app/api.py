@@ -2,17 +2,25 @@
 
 from flask import Blueprint, request, jsonify
 import time
-from app.serial import serial_service
+from app.config import Config
+from app.ipc import get_serial_service
 from app.database import get_history_data, get_config, set_config
+from app.encoding import wants_f32, f32_response, compress_response
 
 # 创建API蓝图
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# 按Accept-Encoding压缩较大的API响应
+api_bp.after_request(compress_response)
+
+# 串口服务：本进程实例，或remote模式下采集守护进程的代理
+serial_service = get_serial_service()
+
 
 @api_bp.route('/serial/ports', methods=['GET'])
 def get_serial_ports():
-    """获取可用的串口端口列表"""
-    ports = serial_service.get_available_ports()
+    """获取可用的串口端口列表（refresh=1时立即重新枚举）"""
+    ports = serial_service.get_available_ports(request.args.get('refresh') == '1')
     return jsonify(ports)
 
 
@@ -50,6 +58,11 @@ def open_tcp():
         success, message = serial_service.update_lora_config(network_type, target_address, page)
         if not success:
             return jsonify({"status": "error", "message": message})
+    elif network_type == 'modbus_tcp':
+        # 原生Modbus-TCP网关（MBAP报文，默认502端口）
+        success, message = serial_service.update_network_config(network_type, target_address, page)
+        if not success:
+            return jsonify({"status": "error", "message": message})
     
     success, message = serial_service.open_tcp(tcp_server_ip, tcp_server_port, page)
     return jsonify({"status": "success" if success else "error", "message": message})
@@ -82,9 +95,13 @@ def get_serial_status():
 
 @api_bp.route('/serial/frames', methods=['GET'])
 def get_frame_data():
-    """获取问询帧和应答帧数据"""
+    """获取问询帧和应答帧数据（since为已获取的最后一帧序号，只返回之后的新帧）"""
     page = request.args.get('page', 'light')
-    frame_data = serial_service.get_frame_data(page)
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "无效的帧序号"})
+    frame_data = serial_service.get_frame_data(page, since)
     return jsonify(frame_data)
 
 
@@ -162,6 +179,34 @@ def get_sensor_data():
         return jsonify(sensor_data)
 
 
+@api_bp.route('/readings/since', methods=['GET'])
+def get_readings_since():
+    """获取设备在指定时间戳之后的实时数据（图表增量同步）"""
+    device = request.args.get('device', 'temperature')
+    try:
+        ts = float(request.args.get('ts', 0))
+        minutes = float(request.args.get('minutes', Config.READING_WARM_START_MINUTES))
+        # 图表只保留最近limit个数据点时只返回最新的limit个，0表示不限制
+        limit = int(request.args.get('limit', 0))
+    except ValueError:
+        return jsonify({"status": "error", "message": "无效的时间或数量参数"})
+    
+    # 未提供时间戳时，返回最近N分钟的数据用于图表预热
+    if ts <= 0:
+        ts = time.time() - minutes * 60
+    
+    points = serial_service.get_readings_since(device, ts, limit if limit > 0 else None)
+    result = {
+        "status": "success",
+        "device": device,
+        "last_ts": points[-1]["timestamp"] if points else ts
+    }
+    if wants_f32(request):
+        return f32_response(points, result)
+    result["data"] = points
+    return jsonify(result)
+
+
 @api_bp.route('/light/data', methods=['GET'])
 def get_light_data():
     """获取光照气体数据"""
@@ -220,14 +265,19 @@ def get_history():
         
         # 获取历史数据
         data = get_history_data(start_time, end_time, table)
-        
-        return jsonify({
+        result = {
             "status": "success",
-            "data": data,
             "range_type": range_type,
             "start_time": start_time,
             "end_time": end_time
-        })
+        }
+        
+        # format=f32 时返回列式二进制数据，前端可直接包装为TypedArray
+        if wants_f32(request):
+            return f32_response(data, result)
+        
+        result["data"] = data
+        return jsonify(result)
     except Exception as e:
         return jsonify({"status": "error", "message": f"获取历史数据失败: {str(e)}"})
 
@@ -349,3 +399,52 @@ def update_lora_config():
     page = data.get('page', 'light')
     success, message = serial_service.update_lora_config(network_type, target_address, page)
     return jsonify({"status": "success" if success else "error", "message": message})
+
+
+@api_bp.route('/devices', methods=['GET'])
+def list_devices():
+    """获取所有注册设备"""
+    return jsonify({"status": "success", "devices": serial_service.list_devices()})
+
+
+@api_bp.route('/devices/lookup', methods=['GET'])
+def find_device():
+    """按网关、LoRa地址和从机地址查找注册设备"""
+    lora_address = request.args.get('address', '')
+    gateway_ip = request.args.get('gateway_ip', '')
+    gateway_port = request.args.get('gateway_port', type=int)
+    slave_id = request.args.get('slave_id', Config.MODBUS_SLAVE_ID, type=int)
+    # 同一LoRa地址可能在多个网关上注册，必须指定网关
+    if not lora_address or not gateway_ip or gateway_port is None:
+        return jsonify({"status": "error", "message": "缺少参数: address、gateway_ip和gateway_port"}), 400
+    device = serial_service.find_device(lora_address, gateway_ip, gateway_port, slave_id)
+    if device is None:
+        return jsonify({"status": "error", "message": "设备不存在"}), 404
+    return jsonify({"status": "success", "device": device})
+
+
+@api_bp.route('/devices/<device_id>', methods=['GET'])
+def get_device(device_id):
+    """获取注册设备"""
+    device = serial_service.get_device(device_id)
+    if device is None:
+        return jsonify({"status": "error", "message": "设备不存在"}), 404
+    return jsonify({"status": "success", "device": device})
+
+
+@api_bp.route('/devices', methods=['POST'])
+def register_device():
+    """新增或更新注册设备（按设备ID）"""
+    data = request.json or {}
+    success, message = serial_service.register_device(data)
+    response = {"status": "success" if success else "error", "message": message}
+    if success:
+        response["device"] = serial_service.get_device(data.get('id'))
+    return jsonify(response)
+
+
+@api_bp.route('/devices/<device_id>', methods=['DELETE'])
+def remove_device(device_id):
+    """删除注册设备"""
+    success, message = serial_service.remove_device(device_id)
+    return jsonify({"status": "success" if success else "error", "message": message})
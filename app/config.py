@@ -22,7 +22,10 @@ class Config:
         'stopbits': 1,
         'bytesize': 8
     }
-    
+    SERIAL_FRAME_SILENCE_MIN = 0.02  # 串口应答帧结束判定的最短静默时间（秒）：USB转RS-485转换器按延迟定时器（常见16毫秒）成批上送数据，只按t3.5判定会把一帧拆开
+    SERIAL_WRITE_TIMEOUT = 1  # 串口写超时（秒）
+    SERIAL_PORTS_TTL = 30  # 串口清单缓存有效期（秒），/dev下设备节点增删时提前刷新
+
     # 问询配置
     DEFAULT_QUERY_INTERVAL = 2  # 默认问询周期（秒）
     MAX_QUERY_INTERVAL = 60  # 最大问询周期（秒）
@@ -31,17 +34,84 @@ class Config:
     # 数据处理配置
     MAX_DATA_POINTS = 1000  # 图表最大数据点
     HISTORY_CHART_POINTS = 200  # 历史图表数据点
+    READING_BUFFER_SIZE = 1800  # 每个设备内存环形缓冲区保留的数据点数
+    READING_WARM_START_MINUTES = 10  # 图表预热默认回溯时长（分钟）
+    FRAME_HISTORY_SIZE = 100  # 每个设备保留的帧数据历史记录条数
+    FRAME_HISTORY_MAX_BYTES = 16384  # 每个设备帧数据历史记录的原始字节总数上限
     
     # Modbus-RTU配置
     MODBUS_SLAVE_ID = 0x01  # 从设备地址
     MODBUS_FUNCTION_CODE = 0x03  # 功能码
     MODBUS_START_ADDRESS = 0x0000  # 起始地址
     MODBUS_REGISTER_COUNT = 0x0008  # 寄存器数量（根据新协议，读取8个寄存器）
+    MODBUS_READ_MAX_GAP = 8  # 合并读取时允许跨过的最大空闲寄存器数（单独一次读取的帧开销约17字节，多读8个寄存器只多16字节）
+    MODBUS_READ_MAX_COUNT = 125  # 单次03功能码读取的寄存器数上限（Modbus协议规定）
+    PARSE_CACHE_SIZE = 256  # 每种设备类型按应答帧缓存的解析结果数
+    
+    # LoRa空口配置（用于估算空中时间、错开问询和执行占空比预算）
+    LORA_SPREADING_FACTOR = 7  # 扩频因子（7~12）
+    LORA_BANDWIDTH = 125000  # 带宽（Hz）
+    LORA_CODING_RATE = 1  # 编码率（1~4 对应 4/5~4/8）
+    LORA_PREAMBLE_SYMBOLS = 8  # 前导码符号数
+    LORA_DUTY_CYCLE = 1.0  # 每个网关的占空比上限（1.0表示不限制，EU868等地区应设为0.01）
+    LORA_DUTY_CYCLE_WINDOW = 3600  # 占空比统计窗口（秒）
+    LORA_GUARD_TIME = 0.05  # 同一网关相邻问询之间的保护间隔（秒）
+    LORA_MAX_WAIT = 5  # 等待空口的最长时间（秒），超过则跳过本次问询
+    
+    # 应答等待时间配置（按节点往返时延动态调整）
+    RTT_INITIAL_TIMEOUT = 2.0  # 没有往返时延样本时的等待时间（秒）
+    RTT_MIN_TIMEOUT = 0.1  # 最短等待时间（秒）
+    RTT_MAX_TIMEOUT = 5.0  # 最长等待时间（秒）
+    
+    # 网关在途窗口配置
+    GATEWAY_WINDOW = 1  # 每个网关同时在途的问询数（1为停等；大于1时各页面共用网关连接，发往不同LoRa地址的问询连续发出）
+    GATEWAY_CONNECT_TIMEOUT = 3  # 网关共享连接的连接超时（秒）
+    MBAP_WINDOW = 8  # Modbus-TCP网关每个连接同时在途的请求数（按事务标识匹配应答）
+
+    # 网关连接管理配置
+    TCP_OPEN_WAIT = 0.3  # 打开TCP通讯时等待连接建立的最长时间（秒），未完成时由问询线程继续
+    TCP_CONNECT_WAIT = 0.2  # 问询线程每次检查连接是否建立的最长等待时间（秒）
+    TCP_RECONNECT_BASE_DELAY = 1  # 连接失败后第一次重连的退避时间（秒），之后每次失败加倍
+    TCP_RECONNECT_MAX_DELAY = 60  # 重连退避时间上限（秒）
+    TCP_KEEPALIVE_IDLE = 10  # 连接空闲多久后开始发送保活探测（秒）
+    TCP_KEEPALIVE_INTERVAL = 3  # 保活探测间隔（秒）
+    TCP_KEEPALIVE_COUNT = 3  # 连续多少次保活探测无响应后断开连接
+    
+    # 节点熔断配置
+    BREAKER_FAILURE_THRESHOLD = 3  # 连续未应答次数达到该值后熔断
+    BREAKER_BASE_DELAY = 10  # 熔断后第一次探测的间隔（秒），之后每次失败加倍
+    BREAKER_MAX_DELAY = 300  # 探测间隔上限（秒）
     
     # 数据范围验证
     TEMPERATURE_RANGE = (-40, 85)  # 温度范围
     HUMIDITY_RANGE = (0, 100)  # 湿度范围
     
+    # 采集进程配置
+    # embedded: Web进程内直接运行问询线程（单进程开发模式）
+    # remote: 问询线程运行在独立的采集守护进程中（acquisition.py），Web进程通过Unix套接字访问
+    ACQUISITION_MODE = os.environ.get('ACQUISITION_MODE', 'embedded')
+    ACQUISITION_SOCKET = os.environ.get('ACQUISITION_SOCKET', '/tmp/iot-acquisition.sock')
+    ACQUISITION_TIMEOUT = 5  # IPC调用超时（秒）
+    LATEST_TABLE_NAME = os.environ.get('LATEST_TABLE_NAME', 'iot_latest_values')  # 共享内存最新值表名称
+    LATEST_TABLE_SLOTS = 512  # 最新值表槽位数（每个设备/指标占一个槽位）
+    
+    # 响应编码配置
+    JSON_ENCODER = 'auto'  # JSON编码器: auto（有orjson时使用orjson）、orjson、stdlib
+    COMPRESS_ENABLED = True  # 是否启用响应压缩
+    COMPRESS_MIN_SIZE = 1024  # 超过该字节数的响应才进行压缩
+    COMPRESS_GZIP_LEVEL = 6  # gzip压缩级别
+    COMPRESS_BROTLI_QUALITY = 5  # brotli压缩质量（需安装brotli）
+    COMPRESS_MIMETYPES = ('application/json', 'application/octet-stream', 'text/plain')
+    
+    # 日志配置
+    LOG_LEVEL = 'INFO'  # app日志器的默认级别（可用环境变量LOG_LEVEL覆盖）
+    # 各子系统的日志级别（可用环境变量LOG_LEVELS覆盖，例如 app.serial.tcp=DEBUG,app.modbus=DEBUG）
+    # 问询帧、应答帧和解析结果为DEBUG级别，默认不输出
+    LOG_LEVELS = {
+        'app.modbus': 'INFO',
+        'app.serial': 'INFO'
+    }
+    
     # 定时任务配置
     SCHEDULER_API_ENABLED = True
     
@@ -72,6 +72,31 @@ def init_db():
         )
     ''')
     
+    # 创建设备注册表
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS devices (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            device_type TEXT NOT NULL,
+            lora_address TEXT NOT NULL,
+            slave_id INTEGER NOT NULL DEFAULT 1,
+            gateway_ip TEXT NOT NULL,
+            gateway_port INTEGER NOT NULL,
+            query_interval REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # 设备注册表为空时写入默认设备（与原有的三个监控页面对应）
+    cursor.execute('SELECT COUNT(*) FROM devices')
+    if cursor.fetchone()[0] == 0:
+        from app.registry import DEFAULT_DEVICES
+        for device in DEFAULT_DEVICES:
+            cursor.execute('''
+                INSERT INTO devices (id, name, device_type, lora_address, slave_id, gateway_ip, gateway_port, query_interval)
+                VALUES (:id, :name, :device_type, :lora_address, :slave_id, :gateway_ip, :gateway_port, :query_interval)
+            ''', device)
+    
     # 插入默认配置
     default_configs = [
         ('query_interval', str(Config.DEFAULT_QUERY_INTERVAL)),
@@ -249,6 +274,57 @@ def set_config(key, value):
     conn.close()
 
 
+def get_devices():
+    """获取设备注册表中的所有设备"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        SELECT id, name, device_type, lora_address, slave_id, gateway_ip, gateway_port, query_interval
+        FROM devices
+        ORDER BY created_at, id
+    ''')
+    
+    devices = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return devices
+
+
+def save_device(device):
+    """新增或更新设备"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        INSERT INTO devices (id, name, device_type, lora_address, slave_id, gateway_ip, gateway_port, query_interval)
+        VALUES (:id, :name, :device_type, :lora_address, :slave_id, :gateway_ip, :gateway_port, :query_interval)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            device_type = excluded.device_type,
+            lora_address = excluded.lora_address,
+            slave_id = excluded.slave_id,
+            gateway_ip = excluded.gateway_ip,
+            gateway_port = excluded.gateway_port,
+            query_interval = excluded.query_interval
+    ''', device)
+    
+    conn.commit()
+    conn.close()
+
+
+def delete_device(device_id):
+    """删除设备"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    cursor.execute('''
+        DELETE FROM devices WHERE id = ?
+    ''', (device_id,))
+    
+    conn.commit()
+    conn.close()
+
+
 def get_latest_sensor_data():
     """获取最新的传感器数据"""
     conn = get_db_connection()
@@ -0,0 +1,196 @@
+"""响应编码模块"""
+
+import gzip
+import json
+import math
+import sys
+from array import array
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+from app.config import Config
+
+# 可选依赖：orjson（快速JSON编码）和brotli（br压缩），未安装时自动回退
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# 列式二进制格式（format=f32）
+# 布局（小端序，各列均按元素大小对齐，前端可直接用TypedArray包装）：
+#   magic        4字节  b'LRF2'
+#   header_len   uint32 JSON头长度（已按8字节补齐）
+#   row_count    uint32 行数
+#   col_count    uint32 列数
+#   header       JSON，{"columns": [{"name", "type"}], ...附加元数据}
+#   columns      按列依次存放，每列 row_count 个元素
+#                timestamp 列为 float64（秒，保留小数部分）且总是排在最前，
+#                其余列为 float32，缺失值为 NaN
+F32_MAGIC = b'LRF2'
+F32_MIMETYPE = 'application/octet-stream'
+TIMESTAMP_FIELD = 'timestamp'
+
+
+def _is_number(value):
+    """判断是否为可编码为float32的数值"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def numeric_fields(rows):
+    """从数据行中提取数值列名（保持首行字段顺序，timestamp列排在最前）"""
+    fields = []
+    seen = set()
+    for row in rows:
+        for key, value in row.items():
+            if key in seen:
+                continue
+            if value is None:
+                continue
+            seen.add(key)
+            if _is_number(value):
+                fields.append(key)
+    if TIMESTAMP_FIELD in fields:
+        fields.remove(TIMESTAMP_FIELD)
+        fields.insert(0, TIMESTAMP_FIELD)
+    return fields
+
+
+def pack_columns_f32(rows, fields=None, meta=None):
+    """将数据行打包为列式float64/float32二进制数据"""
+    if fields is None:
+        fields = numeric_fields(rows)
+    # float64的timestamp列排在最前，保证其偏移按8字节对齐
+    fields = sorted(fields, key=lambda field: field != TIMESTAMP_FIELD)
+
+    columns = []
+    nan = math.nan
+    for field in fields:
+        if field == TIMESTAMP_FIELD:
+            column = array('d', (row.get(field) or 0 for row in rows))
+        else:
+            column = array('f', (nan if row.get(field) is None else row[field] for row in rows))
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns.append(column)
+
+    header = dict(meta or {})
+    header["columns"] = [
+        {"name": field, "type": "f64" if field == TIMESTAMP_FIELD else "f32"}
+        for field in fields
+    ]
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+
+    parts = [
+        F32_MAGIC,
+        array('I', [len(header_bytes), len(rows), len(fields)]),
+        header_bytes
+    ]
+    if sys.byteorder == 'big':
+        parts[1].byteswap()
+    parts.extend(columns)
+    return b''.join(bytes(part) for part in parts)
+
+
+def unpack_columns_f32(payload):
+    """解析列式二进制数据，返回(元数据, {列名: 数值列表})"""
+    if payload[:4] != F32_MAGIC:
+        raise ValueError("无效的二进制数据格式")
+    counts = array('I')
+    counts.frombytes(payload[4:16])
+    if sys.byteorder == 'big':
+        counts.byteswap()
+    header_len, row_count, col_count = counts
+    offset = 16
+    header = json.loads(payload[offset:offset + header_len].decode('utf-8'))
+    offset += header_len
+
+    columns = {}
+    for column_info in header["columns"][:col_count]:
+        column = array('d' if column_info["type"] == "f64" else 'f')
+        size = row_count * column.itemsize
+        column.frombytes(payload[offset:offset + size])
+        if sys.byteorder == 'big':
+            column.byteswap()
+        columns[column_info["name"]] = column.tolist()
+        offset += size
+    return header, columns
+
+
+def wants_f32(req):
+    """判断请求是否选择了format=f32二进制格式"""
+    return req.args.get('format') == 'f32'
+
+
+def f32_response(rows, meta=None, fields=None):
+    """构建列式二进制响应"""
+    payload = pack_columns_f32(rows, fields, meta)
+    response = Response(payload, mimetype=F32_MIMETYPE)
+    response.headers['X-Data-Format'] = 'f32'
+    return response
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON编码器：安装orjson时使用orjson，否则回退到标准库json"""
+    
+    # 始终输出紧凑格式，调试模式下也不缩进，减少传输字节数
+    compact = True
+    
+    def dumps(self, obj, **kwargs):
+        """序列化对象为JSON字符串"""
+        if orjson is not None and Config.JSON_ENCODER in ('auto', 'orjson'):
+            option = orjson.OPT_NON_STR_KEYS
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.get('sort_keys', self.sort_keys):
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode('utf-8')
+            except TypeError:
+                # orjson不支持的类型（如超过64位的整数）交给标准库处理
+                pass
+        return super().dumps(obj, **kwargs)
+
+
+def _choose_encoding():
+    """根据Accept-Encoding协商压缩算法"""
+    accepted = request.accept_encodings
+    candidates = ['br', 'gzip'] if brotli is not None else ['gzip']
+    for encoding in candidates:
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress_response(response):
+    """对超过阈值的响应进行gzip/brotli压缩（after_request钩子）"""
+    if not Config.COMPRESS_ENABLED:
+        return response
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.status_code < 200 or response.status_code >= 300 or 'Content-Encoding' in response.headers:
+        return response
+    if response.mimetype not in Config.COMPRESS_MIMETYPES:
+        return response
+    
+    data = response.get_data()
+    if len(data) < Config.COMPRESS_MIN_SIZE:
+        return response
+    
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=Config.COMPRESS_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(data, compresslevel=Config.COMPRESS_GZIP_LEVEL)
+    
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
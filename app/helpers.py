@@ -3,8 +3,11 @@
 import time
 import datetime
 import json
+import logging
 from app.config import Config
 
+logger = logging.getLogger(__name__)
+
 
 def format_timestamp(timestamp):
     """格式化时间戳为可读时间"""
@@ -13,7 +16,7 @@ def format_timestamp(timestamp):
     try:
         return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
     except Exception as e:
-        print(f"时间格式化失败: {e}")
+        logger.warning("时间格式化失败: %s", e)
         return "--"
 
 
@@ -24,7 +27,7 @@ def format_datetime(dt):
     try:
         return dt.strftime("%Y-%m-%d %H:%M:%S")
     except Exception as e:
-        print(f"日期时间格式化失败: {e}")
+        logger.warning("日期时间格式化失败: %s", e)
         return "--"
 
 
@@ -103,7 +106,7 @@ def format_bytes_to_hex(bytes_data):
     try:
         return ' '.join([f'{b:02X}' for b in bytes_data])
     except Exception as e:
-        print(f"字节格式化失败: {e}")
+        logger.warning("字节格式化失败: %s", e)
         return ""
 
 
@@ -117,7 +120,7 @@ def parse_hex_string(hex_str):
             hex_str = '0' + hex_str
         return bytes.fromhex(hex_str)
     except Exception as e:
-        print(f"十六进制解析失败: {e}")
+        logger.warning("十六进制解析失败: %s", e)
         return b''
 
 
@@ -128,7 +131,7 @@ def safe_json_loads(json_str, default=None):
     try:
         return json.loads(json_str)
     except Exception as e:
-        print(f"JSON解析失败: {e}")
+        logger.warning("JSON解析失败: %s", e)
         return default
 
 
@@ -137,7 +140,7 @@ def safe_json_dumps(data, default=None):
     try:
         return json.dumps(data, ensure_ascii=False, default=default)
     except Exception as e:
-        print(f"JSON序列化失败: {e}")
+        logger.warning("JSON序列化失败: %s", e)
         return ""
 
 
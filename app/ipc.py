@@ -0,0 +1,202 @@
+"""采集进程通讯模块
+
+采集守护进程（acquisition.py）独占现场设备并运行问询线程，
+Web进程通过本地Unix套接字调用其串口服务方法。协议为按行分隔的JSON：
+请求 {"method": 方法名, "args": [...], "kwargs": {...}}，
+应答 {"ok": true, "result": ...} 或 {"ok": false, "error": 错误信息}。
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from app.config import Config
+from app.shm import LatestValueTable
+
+
+# 允许通过IPC调用的串口服务方法
+SERVICE_METHODS = frozenset([
+    "get_available_ports",
+    "open_serial",
+    "close_serial",
+    "open_tcp",
+    "close_tcp",
+    "get_serial_status",
+    "get_frame_data",
+    "start_query",
+    "stop_query",
+    "update_query_interval",
+    "get_light_gas_data",
+    "get_sensor_data",
+    "get_vibration_data",
+    "get_readings_since",
+    "update_device_class",
+    "get_device_class",
+    "update_network_config",
+    "update_communication_config",
+    "update_lora_config",
+    "update_tcp_config",
+    "clear_frame_history",
+    "list_devices",
+    "get_device",
+    "find_device",
+    "register_device",
+    "remove_device"
+])
+
+
+def _encode(message):
+    """编码一条消息（无法序列化的对象转为字符串）"""
+    return json.dumps(message, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """处理单个Web进程连接上的连续请求"""
+
+    def handle(self):
+        """逐行读取请求并返回应答"""
+        service = self.server.service
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                method = request.get("method")
+                if method not in SERVICE_METHODS:
+                    raise ValueError(f"不支持的方法: {method}")
+                result = getattr(service, method)(*request.get("args", []), **request.get("kwargs", {}))
+                reply = {"ok": True, "result": result}
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            self.wfile.write(_encode(reply))
+            self.wfile.flush()
+
+
+class AcquisitionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """采集守护进程的IPC服务端"""
+
+    daemon_threads = True
+
+    def __init__(self, service, path=None):
+        """在Unix套接字上提供串口服务"""
+        self.service = service
+        self.path = path or Config.ACQUISITION_SOCKET
+        # 清理上次异常退出遗留的套接字文件
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        super().__init__(self.path, _RequestHandler)
+        os.chmod(self.path, 0o660)
+
+    def server_close(self):
+        """关闭服务并删除套接字文件"""
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class AcquisitionClient:
+    """Web进程使用的串口服务代理，接口与SerialService一致"""
+
+    def __init__(self, path=None, timeout=None):
+        """初始化代理（每个线程使用独立的连接）"""
+        self.path = path or Config.ACQUISITION_SOCKET
+        self.timeout = timeout or Config.ACQUISITION_TIMEOUT
+        self._local = threading.local()
+        self._latest_table = None
+        self._latest_retry_at = 0
+        self._latest_lock = threading.Lock()  # 各请求线程共用最新值表连接
+
+    def _connect(self):
+        """建立到采集守护进程的连接"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._local.sock = sock
+        self._local.reader = sock.makefile('rb')
+        return sock
+
+    def _close(self):
+        """关闭当前线程的连接"""
+        sock = getattr(self._local, "sock", None)
+        if sock:
+            try:
+                self._local.reader.close()
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def call(self, method, *args, **kwargs):
+        """调用采集守护进程中的串口服务方法"""
+        message = _encode({"method": method, "args": args, "kwargs": kwargs})
+        # 连接可能因守护进程重启而失效，失败时重连一次
+        for attempt in range(2):
+            try:
+                sock = getattr(self._local, "sock", None) or self._connect()
+                sock.sendall(message)
+                line = self._local.reader.readline()
+                if not line:
+                    raise ConnectionError("采集守护进程已断开连接")
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error"))
+        return reply["result"]
+
+    def _latest(self, page):
+        """从共享内存最新值表读取设备数据
+
+        最新值表不可用，或设备数据不完整（包含无法存储的文本字段、槽位用尽）时返回None，
+        由调用方改为通过IPC获取。
+        """
+        with self._latest_lock:
+            return self._read_latest(page)
+
+    def _read_latest(self, page):
+        """读取最新值表（调用方持有_latest_lock）"""
+        if self._latest_table is None:
+            # 采集进程尚未创建最新值表时，每秒最多重试一次
+            now = time.monotonic()
+            if now < self._latest_retry_at:
+                return None
+            self._latest_retry_at = now + 1
+            self._latest_table = LatestValueTable.attach()
+            if self._latest_table is None:
+                return None
+        if not self._latest_table.is_valid():
+            # 采集进程已重启并重建了最新值表，下次重新连接
+            self._latest_table.close()
+            self._latest_table = None
+            self._latest_retry_at = 0
+            return None
+        return self._latest_table.read(page, complete_only=True)
+
+    def get_sensor_data(self, page="temperature"):
+        """获取传感器数据（优先读取共享内存）"""
+        return self._latest(page) or self.call("get_sensor_data", page)
+
+    def get_light_gas_data(self):
+        """获取光照气体数据（优先读取共享内存）"""
+        return self._latest("light") or self.call("get_light_gas_data")
+
+    def get_vibration_data(self):
+        """获取温振数据（优先读取共享内存）"""
+        return self._latest("vibration") or self.call("get_vibration_data")
+
+    def __getattr__(self, name):
+        """将串口服务方法转发到采集守护进程"""
+        if name not in SERVICE_METHODS:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+
+def get_serial_service():
+    """根据采集模式返回串口服务（本进程实例或采集守护进程代理）"""
+    if Config.ACQUISITION_MODE == 'remote':
+        return AcquisitionClient()
+    from app.serial import serial_service
+    return serial_service
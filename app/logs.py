@@ -0,0 +1,80 @@
+"""日志模块
+
+问询线程每次问询都会输出问询帧、应答帧和解析结果，直接print时字符串格式化
+（尤其是整帧的十六进制转换）和标准输出写入都在问询线程中完成。改为标准
+logging后：
+- 各子系统使用模块名作为日志器名称（app.modbus、app.serial.tcp等），
+  按Config.LOG_LEVELS或环境变量LOG_LEVELS分别设置级别，未开启的级别不格式化；
+- 日志消息使用%s参数延迟格式化，帧数据用HexFrame包装，输出时才转换为十六进制；
+- 日志记录经队列交给后台线程格式化和写出，问询线程不做I/O。
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from app.config import Config
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_listener = None
+
+
+class HexFrame:
+    """延迟格式化的帧数据：写出日志时才转换为空格分隔的大写十六进制"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        # bytearray等可变缓冲区复制一份，后台线程格式化时内容不会改变
+        self.data = data if isinstance(data, bytes) else bytes(data)
+
+    def __str__(self):
+        return self.data.hex(" ").upper()
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """只入队日志记录，消息由后台线程格式化
+
+    标准QueueHandler在入队前格式化消息，以便日志记录可以跨进程传递；
+    这里的队列只在进程内使用，参数原样交给后台线程。
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def parse_levels(spec):
+    """解析子系统日志级别，格式为 "app.modbus=DEBUG,app.serial.tcp=INFO" """
+    levels = {}
+    for item in (spec or "").split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(stream=None):
+    """配置app日志器：各子系统的日志级别和后台写出线程（重复调用时忽略）"""
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler(stream or sys.stdout)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+
+    root = logging.getLogger("app")
+    root.setLevel(os.environ.get("LOG_LEVEL", Config.LOG_LEVEL).upper())
+    root.addHandler(_QueueHandler(log_queue))
+    root.propagate = False
+    levels = dict(Config.LOG_LEVELS)
+    levels.update(parse_levels(os.environ.get("LOG_LEVELS")))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener.start()
+    # 退出前写出队列中剩余的日志
+    atexit.register(_listener.stop)
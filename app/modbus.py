@@ -1,8 +1,18 @@
 """Modbus协议服务模块"""
 
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
 from app.config import Config
+from app.logs import HexFrame
+import logging
+import threading
 import time
 
+logger = logging.getLogger(__name__)
+
+VIBRATION_STATUS_LEVELS = ("良好", "注意", "警告", "严重")  # 温振状态等级（由好到差）
+
 
 def calculate_crc(data):
     """计算Modbus-RTU CRC16校验码"""
@@ -17,14 +27,23 @@ def calculate_crc(data):
     return crc
 
 
-def build_modbus_query(slave_id=None, function_code=None, start_address=None, register_count=None):
-    """构建Modbus-RTU问询帧"""
+def build_modbus_query(slave_id=None, function_code=None, start_address=None, register_count=None, prefix=b""):
+    """构建Modbus-RTU问询帧（prefix为LoRa目标地址前缀）
+
+    问询参数只有少数几种固定组合，组帧结果按参数缓存，返回不可变的bytes，
+    周期问询时不再重复组帧和计算CRC。
+    """
     # 使用配置中的默认值
     slave_id = slave_id or Config.MODBUS_SLAVE_ID
     function_code = function_code or Config.MODBUS_FUNCTION_CODE
     start_address = start_address or Config.MODBUS_START_ADDRESS
     register_count = register_count or Config.MODBUS_REGISTER_COUNT
-    
+    return _build_query(slave_id, function_code, start_address, register_count, bytes(prefix))
+
+
+@lru_cache(maxsize=256)
+def _build_query(slave_id, function_code, start_address, register_count, prefix):
+    """组帧并计算CRC（结果按参数缓存）"""
     # 构建数据部分
     data = [
         slave_id,
@@ -42,7 +61,7 @@ def build_modbus_query(slave_id=None, function_code=None, start_address=None, re
     data.append(crc & 0xFF)
     data.append((crc >> 8) & 0xFF)
     
-    return bytearray(data)
+    return prefix + bytes(data)
 
 
 def bytes_to_float(bytes_data):
@@ -52,29 +71,24 @@ def bytes_to_float(bytes_data):
     return struct.unpack('>f', bytes_data)[0]
 
 
-def parse_temperature_response(response):
+def parse_temperature_response(response, slave_id=None):
     """解析温度和湿度数据"""
     try:
         if len(response) < 9:
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
-        # 检查是否包含LoRa目标地址前缀
-        # 假设LoRa目标地址前缀为2字节
+        # LoRa目标地址前缀已由调用方按问询计划去掉，应答帧从地址码开始
         modbus_start = 0
-        if len(response) >= 11 and response[0] not in [0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F, 0x10]:
-            # 可能包含LoRa目标地址前缀，跳过前2字节
-            modbus_start = 2
-            print(f"检测到可能的LoRa目标地址前缀，从位置{modbus_start}开始解析")
         
         # 检查地址码和功能码
-        if response[modbus_start] != Config.MODBUS_SLAVE_ID or response[modbus_start + 1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[modbus_start]:02X}, 功能码={response[modbus_start + 1]:02X}")
+        if response[modbus_start] != (slave_id or Config.MODBUS_SLAVE_ID) or response[modbus_start + 1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[modbus_start], response[modbus_start + 1])
             return None
         
         # 检查有效字节数（2个寄存器，每个2字节，共4字节）
         if response[modbus_start + 2] != 0x04:
-            print(f"有效字节数错误: {response[modbus_start + 2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[modbus_start + 2])
             return None
         
         # 提取温度值（2字节，有符号16位）
@@ -88,7 +102,7 @@ def parse_temperature_response(response):
         actual_crc = (response[modbus_start + 7] << 8) | response[modbus_start + 8]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
         # 转换为实际值（寄存器值 ÷ 10）
@@ -103,50 +117,50 @@ def parse_temperature_response(response):
         
         # 验证数据范围
         if temperature < Config.TEMPERATURE_RANGE[0] or temperature > Config.TEMPERATURE_RANGE[1]:
-            print(f"温度值超出范围: {temperature}")
+            logger.warning("温度值超出范围: %s", temperature)
             return None
         
         if humidity < Config.HUMIDITY_RANGE[0] or humidity > Config.HUMIDITY_RANGE[1]:
-            print(f"湿度值超出范围: {humidity}")
+            logger.warning("湿度值超出范围: %s", humidity)
             return None
         
-        print(f"解析成功: 温度={temperature}°C, 湿度={humidity}%")
+        logger.debug("解析成功: 温度=%s°C, 湿度=%s%%", temperature, humidity)
         return {
             "temperature": temperature,
             "humidity": humidity
         }
     except Exception as e:
-        print(f"解析温度应答帧失败: {e}")
+        logger.warning("解析温度应答帧失败: %s", e)
         return None
 
 
-def parse_frequency_response(response):
+def parse_frequency_response(response, slave_id=None):
     """解析振动频率数据"""
     try:
         if len(response) < 9:
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
         # 检查地址码和功能码
-        if response[0] != Config.MODBUS_SLAVE_ID or response[1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[0]:02X}, 功能码={response[1]:02X}")
+        if response[0] != (slave_id or Config.MODBUS_SLAVE_ID) or response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[0], response[1])
             return None
         
         # 检查有效字节数
         if response[2] not in [0x04, 0x0C]:
-            print(f"有效字节数错误: {response[2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[2])
             return None
         
         # 提取频率值（按float类型解析）
         if response[2] == 0x04:  # 4字节数据
             if len(response) < 11:
-                print(f"应答帧长度不足: {len(response)}")
+                logger.debug("应答帧长度不足: %d", len(response))
                 return None
             frequency_bytes = response[3:7]  # 4字节float数据
             frequency = bytes_to_float(frequency_bytes)
         elif response[2] == 0x0C:  # 12字节数据（XYZ三个轴）
             if len(response) < 17:
-                print(f"应答帧长度不足: {len(response)}")
+                logger.debug("应答帧长度不足: %d", len(response))
                 return None
             # 提取X轴频率（前4字节float数据）
             frequency_bytes = response[3:7]  # 4字节float数据
@@ -158,33 +172,33 @@ def parse_frequency_response(response):
         actual_crc = (response[-1] << 8) | response[-2]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
-        print(f"解析成功: 频率={frequency}Hz")
+        logger.debug("解析成功: 频率=%sHz", frequency)
         return {
             "frequency": frequency
         }
     except Exception as e:
-        print(f"解析频率应答帧失败: {e}")
+        logger.warning("解析频率应答帧失败: %s", e)
         return None
 
 
-def parse_velocity_response(response):
+def parse_velocity_response(response, slave_id=None):
     """解析速度数据"""
     try:
         if len(response) < 9:
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
         # 检查地址码和功能码
-        if response[0] != Config.MODBUS_SLAVE_ID or response[1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[0]:02X}, 功能码={response[1]:02X}")
+        if response[0] != (slave_id or Config.MODBUS_SLAVE_ID) or response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[0], response[1])
             return None
         
         # 检查有效字节数
         if response[2] not in [0x02, 0x06]:
-            print(f"有效字节数错误: {response[2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[2])
             return None
         
         # 提取速度值
@@ -200,36 +214,36 @@ def parse_velocity_response(response):
         actual_crc = (response[-1] << 8) | response[-2]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
         # 转换为实际值（寄存器值 ÷ 10）
         velocity = velocity_raw / 10.0
         
-        print(f"解析成功: 速度={velocity}mm/s")
+        logger.debug("解析成功: 速度=%smm/s", velocity)
         return {
             "velocity": velocity
         }
     except Exception as e:
-        print(f"解析速度应答帧失败: {e}")
+        logger.warning("解析速度应答帧失败: %s", e)
         return None
 
 
-def parse_acceleration_response(response):
+def parse_acceleration_response(response, slave_id=None):
     """解析加速度数据"""
     try:
         if len(response) < 9:
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
         # 检查地址码和功能码
-        if response[0] != Config.MODBUS_SLAVE_ID or response[1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[0]:02X}, 功能码={response[1]:02X}")
+        if response[0] != (slave_id or Config.MODBUS_SLAVE_ID) or response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[0], response[1])
             return None
         
         # 检查有效字节数
         if response[2] not in [0x02, 0x06]:
-            print(f"有效字节数错误: {response[2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[2])
             return None
         
         # 提取加速度值
@@ -245,18 +259,18 @@ def parse_acceleration_response(response):
         actual_crc = (response[-1] << 8) | response[-2]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
         # 转换为实际值（寄存器值 ÷ 10）
         acceleration = acceleration_raw / 10.0
         
-        print(f"解析成功: 加速度={acceleration}m/s²")
+        logger.debug("解析成功: 加速度=%sm/s²", acceleration)
         return {
             "acceleration": acceleration
         }
     except Exception as e:
-        print(f"解析加速度应答帧失败: {e}")
+        logger.warning("解析加速度应答帧失败: %s", e)
         return None
 
 
@@ -279,21 +293,21 @@ def calculate_amplitude(waveform_data):
     }
 
 
-def parse_modbus_response(response):
+def parse_modbus_response(response, slave_id=None):
     """解析Modbus-RTU应答帧"""
     try:
         if len(response) < 9:
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
         # 检查地址码和功能码（只处理地址码为01的应答帧）
-        if response[0] != Config.MODBUS_SLAVE_ID or response[1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[0]:02X}, 功能码={response[1]:02X}")
+        if response[0] != (slave_id or Config.MODBUS_SLAVE_ID) or response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[0], response[1])
             return None
         
         # 检查有效字节数
         if response[2] != 0x04:
-            print(f"有效字节数错误: {response[2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[2])
             return None
         
         # 提取湿度值（前2字节）和温度值（后2字节）
@@ -306,7 +320,7 @@ def parse_modbus_response(response):
         actual_crc = (response[8] << 8) | response[7]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
             # return None
         
@@ -323,51 +337,46 @@ def parse_modbus_response(response):
         
         # 验证数据范围
         if humidity < Config.HUMIDITY_RANGE[0] or humidity > Config.HUMIDITY_RANGE[1]:
-            print(f"湿度值超出范围: {humidity}")
+            logger.warning("湿度值超出范围: %s", humidity)
             return None
         if temperature < Config.TEMPERATURE_RANGE[0] or temperature > Config.TEMPERATURE_RANGE[1]:
-            print(f"温度值超出范围: {temperature}")
+            logger.warning("温度值超出范围: %s", temperature)
             return None
         
-        print(f"解析成功: 温度={temperature}°C, 湿度={humidity}%")
+        logger.debug("解析成功: 温度=%s°C, 湿度=%s%%", temperature, humidity)
         return {
             "temperature": temperature,
             "humidity": humidity
         }
     except Exception as e:
-        print(f"解析应答帧失败: {e}")
+        logger.warning("解析应答帧失败: %s", e)
         return None
 
 
-def parse_vibration_response(modbus_response):
+def parse_vibration_response(modbus_response, slave_id=None):
     """解析温振监控的Modbus-RTU应答帧"""
     try:
-        # 首先检查是否包含LoRa目标地址前缀
-        if len(modbus_response) > 4 and modbus_response[0] == 0x00 and modbus_response[1] == 0x03 and modbus_response[2] == 0x01 and modbus_response[3] == 0x03:
-            # 包含LoRa目标地址前缀 (00 03 01 03)
-            print(f"检测到LoRa目标地址前缀，跳过前4字节")
-            # 跳过前4字节：00 03 01 03
-            actual_data = modbus_response[4:]
-            print(f"跳过前缀后的长度: {len(actual_data)}")
-        elif len(modbus_response) > 2 and modbus_response[0] == 0x00 and modbus_response[1] == 0x03:
-            # 包含LoRa目标地址前缀 (00 03)
-            print(f"检测到LoRa目标地址前缀，跳过前2字节")
-            # 跳过前2字节：00 03
-            actual_data = modbus_response[2:]
-            print(f"跳过前缀后的长度: {len(actual_data)}")
-        else:
-            actual_data = modbus_response
+        slave_id = slave_id or Config.MODBUS_SLAVE_ID
+        # LoRa目标地址前缀已由调用方按问询计划去掉，应答帧从地址码开始
+        if len(modbus_response) < 5:
+            logger.debug("应答帧长度不足: %d", len(modbus_response))
+            return None
+        if modbus_response[0] != slave_id or modbus_response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id, modbus_response[0], modbus_response[1])
+            return None
+        # 跳过地址码和功能码，从有效字节数开始
+        actual_data = modbus_response[2:]
         
         if len(actual_data) < 5:
-            print(f"应答帧长度不足: {len(actual_data)}")
+            logger.debug("应答帧长度不足: %d", len(actual_data))
             return None
         
         # 直接从实际数据中提取信息
-        print(f"开始解析温振数据...")
+        logger.debug("开始解析温振数据...")
         
         # 提取温度值（偏移1-2字节，大端序）
         temperature_raw = (actual_data[1] << 8) | actual_data[2]
-        print(f"温度原始值: {temperature_raw} (0x{temperature_raw:04X})")
+        logger.debug("温度原始值: %d (0x%04X)", temperature_raw, temperature_raw)
         
         # 提取速度值（偏移3-8字节）
         velocity_x_raw = (actual_data[3] << 8) | actual_data[4]
@@ -385,7 +394,7 @@ def parse_vibration_response(modbus_response):
         
         # 提取版本号（偏移19-20字节）
         version = (actual_data[19] << 8) | actual_data[20]
-        print(f"版本号原始值: {version} (0x{version:04X})")
+        logger.debug("版本号原始值: %d (0x%04X)", version, version)
         
         # 提取加速度Z值（偏移21-22字节）
         acceleration_z_raw = (actual_data[21] << 8) | actual_data[22]
@@ -422,15 +431,16 @@ def parse_vibration_response(modbus_response):
         resultant_displacement = math.sqrt(displacement_x**2 + displacement_y**2 + displacement_z**2)
         
         # 确定状态等级
-        status_text = "良好"
+        status_text = VIBRATION_STATUS_LEVELS[0]
         if resultant_velocity > 1.8:
-            status_text = "严重"
+            status_text = VIBRATION_STATUS_LEVELS[3]
         elif resultant_velocity > 1.12:
-            status_text = "警告"
+            status_text = VIBRATION_STATUS_LEVELS[2]
         elif resultant_velocity > 0.71:
-            status_text = "注意"
+            status_text = VIBRATION_STATUS_LEVELS[1]
         
-        print(f"解析成功: 温度={temperature}°C, 频率X={frequency_x}Hz, 速度X={velocity_x}mm/s, 加速度X={acceleration_x}m/s², 位移X={displacement_x}μm")
+        logger.debug("解析成功: 温度=%s°C, 频率X=%sHz, 速度X=%smm/s, 加速度X=%sm/s², 位移X=%sμm",
+                     temperature, frequency_x, velocity_x, acceleration_x, displacement_x)
         return {
             "temperature": temperature,
             "frequency_x": frequency_x,
@@ -453,9 +463,7 @@ def parse_vibration_response(modbus_response):
             "timestamp": time.time()
         }
     except Exception as e:
-        print(f"解析温振应答帧失败: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("解析温振应答帧失败: %s", e)
         return None
 
 
@@ -497,7 +505,7 @@ def parse_vibration_sensor_response(response_data):
         if len(response_data) >= 83 and response_data[0] == 0x00 and response_data[1] == 0x03:
             # 包含LoRa目标地址前缀 0003
             modbus_data = response_data[2:]
-            print(f"检测到LoRa目标地址前缀: {response_data[0]:02X} {response_data[1]:02X}")
+            logger.debug("检测到LoRa目标地址前缀: %02X %02X", response_data[0], response_data[1])
         
         # 检查应答帧格式
         if len(modbus_data) >= 81:
@@ -506,10 +514,7 @@ def parse_vibration_sensor_response(response_data):
             function_code = modbus_data[1]
             data_length = modbus_data[2]
             
-            print(f"应答帧信息:")
-            print(f"  地址码: {address:02X}H")
-            print(f"  功能码: {function_code:02X}H")
-            print(f"  数据长度: {data_length} 字节")
+            logger.debug("应答帧信息: 地址码=%02XH, 功能码=%02XH, 数据长度=%d 字节", address, function_code, data_length)
             
             if function_code == 0x03 and data_length == 0x4C:
                 # 温振应答帧（76字节数据，38个寄存器）
@@ -582,11 +587,10 @@ def parse_vibration_sensor_response(response_data):
                     calculated_crc = calculate_crc(modbus_data[:79])
                     
                     crc_valid = received_crc == calculated_crc
-                    print(f"  CRC校验: {'通过' if crc_valid else '失败'}")
-                    print(f"  接收CRC: {received_crc:04X}H")
-                    print(f"  计算CRC: {calculated_crc:04X}H")
+                    if not crc_valid:
+                        logger.debug("CRC校验失败: 接收=%04XH, 计算=%04XH", received_crc, calculated_crc)
                 
-                print(f"解析成功: 温度={temperature:.1f}°C, 振动={vibration:.3f}mm/s")
+                logger.debug("解析成功: 温度=%.1f°C, 振动=%.3fmm/s", temperature, vibration)
                 return {
                     "temperature": temperature,
                     "vibration": vibration,
@@ -607,33 +611,31 @@ def parse_vibration_sensor_response(response_data):
                     "crc_valid": crc_valid if len(modbus_data) >= 81 else None
                 }
             else:
-                print(f"  功能码或数据长度不匹配")
+                logger.debug("功能码或数据长度不匹配")
                 return None
         else:
-            print(f"  应答帧长度不足: {len(modbus_data)} 字节")
+            logger.debug("应答帧长度不足: %d 字节", len(modbus_data))
             return None
     except Exception as e:
-        print(f"解析错误: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("解析错误: %s", e)
         return None
 
 
-def parse_air_quality_response(response):
+def parse_air_quality_response(response, slave_id=None):
     """解析空气质量监控的Modbus-RTU应答帧"""
     try:
         if len(response) < 13:  # 空气质量数据需要更多字节
-            print(f"应答帧长度不足: {len(response)}")
+            logger.debug("应答帧长度不足: %d", len(response))
             return None
         
         # 检查地址码和功能码
-        if response[0] != Config.MODBUS_SLAVE_ID or response[1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[0]:02X}, 功能码={response[1]:02X}")
+        if response[0] != (slave_id or Config.MODBUS_SLAVE_ID) or response[1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[0], response[1])
             return None
         
         # 检查有效字节数
         if response[2] != 0x08:  # 8字节有效数据
-            print(f"有效字节数错误: {response[2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[2])
             return None
         
         # 提取空气质量数据
@@ -649,7 +651,7 @@ def parse_air_quality_response(response):
         actual_crc = (response[14] << 8) | response[13]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
         # 转换为实际值
@@ -660,22 +662,22 @@ def parse_air_quality_response(response):
         
         # 验证数据范围
         if aqi < 0 or aqi > 500:
-            print(f"AQI值超出范围: {aqi}")
+            logger.warning("AQI值超出范围: %s", aqi)
             return None
         if pm25 < 0 or pm25 > 500:
-            print(f"PM2.5值超出范围: {pm25}")
+            logger.warning("PM2.5值超出范围: %s", pm25)
             return None
         if pm10 < 0 or pm10 > 600:
-            print(f"PM10值超出范围: {pm10}")
+            logger.warning("PM10值超出范围: %s", pm10)
             return None
         if co2 < 0 or co2 > 5000:
-            print(f"CO2值超出范围: {co2}")
+            logger.warning("CO2值超出范围: %s", co2)
             return None
         if voc < 0 or voc > 1000:
-            print(f"VOC值超出范围: {voc}")
+            logger.warning("VOC值超出范围: %s", voc)
             return None
         
-        print(f"解析成功: AQI={aqi}, PM2.5={pm25}, PM10={pm10}, CO2={co2}, VOC={voc}")
+        logger.debug("解析成功: AQI=%s, PM2.5=%s, PM10=%s, CO2=%s, VOC=%s", aqi, pm25, pm10, co2, voc)
         return {
             "aqi": aqi,
             "pm25": pm25,
@@ -684,65 +686,59 @@ def parse_air_quality_response(response):
             "voc": voc
         }
     except Exception as e:
-        print(f"解析应答帧失败: {e}")
+        logger.warning("解析应答帧失败: %s", e)
         return None
 
 
-def parse_light_gas_response(response):
+def parse_light_gas_response(response, slave_id=None):
     """解析光照气体监控的Modbus-RTU应答帧"""
     try:
-        # 检查是否包含LoRa目标地址前缀
-        # 假设LoRa目标地址前缀为2字节
+        # LoRa目标地址前缀已由调用方按问询计划去掉，应答帧从地址码开始
         modbus_start = 0
-        if len(response) >= 19 and response[0] not in [0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08, 0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x0E, 0x0F, 0x10]:
-            # 可能包含LoRa目标地址前缀，跳过前2字节
-            modbus_start = 2
-            print(f"检测到可能的LoRa目标地址前缀，从位置{modbus_start}开始解析")
         
-        # 完整应答帧长度应为17字节（包括校验码），如果包含LoRa前缀则为19字节
+        # 完整应答帧长度应为17字节（包括校验码）
         if len(response) < (17 + modbus_start):
-            print(f"应答帧长度不足: {len(response)}，预期至少{17 + modbus_start}字节")
+            logger.debug("应答帧长度不足: %d，预期至少%d字节", len(response), 17 + modbus_start)
             return None
         
         # 检查地址码和功能码
-        if response[modbus_start] != Config.MODBUS_SLAVE_ID or response[modbus_start + 1] != Config.MODBUS_FUNCTION_CODE:
-            print(f"忽略非01地址码的应答帧: 地址码={response[modbus_start]:02X}, 功能码={response[modbus_start + 1]:02X}")
+        if response[modbus_start] != (slave_id or Config.MODBUS_SLAVE_ID) or response[modbus_start + 1] != Config.MODBUS_FUNCTION_CODE:
+            logger.debug("忽略非%02X地址码的应答帧: 地址码=%02X, 功能码=%02X", slave_id or Config.MODBUS_SLAVE_ID, response[modbus_start], response[modbus_start + 1])
             return None
         
         # 检查有效字节数
         if response[modbus_start + 2] != 0x10:  # 16字节有效数据
-            print(f"有效字节数错误: {response[modbus_start + 2]:02X}")
+            logger.debug("有效字节数错误: %02X", response[modbus_start + 2])
             return None
         
         # 提取数据（按照协议规范的顺序）
-        # 打印应答帧内容，以便调试
-        print(f"【解析】应答帧内容: {[f'{b:02X}' for b in response]}")
-        print(f"【解析】modbus_start: {modbus_start}")
+        # 输出应答帧内容，以便调试
+        logger.debug("【解析】应答帧内容: %s, modbus_start: %d", HexFrame(response), modbus_start)
         
         status = (response[modbus_start + 3] << 8) | response[modbus_start + 4]      # 状态：0000H
-        print(f"【解析】状态: {status:04X}")
+        logger.debug("【解析】状态: %04X", status)
         
         temperature_raw = (response[modbus_start + 5] << 8) | response[modbus_start + 6]  # 温度：0001H
-        print(f"【解析】温度原始值: {temperature_raw:04X}")
+        logger.debug("【解析】温度原始值: %04X", temperature_raw)
         
         humidity = (response[modbus_start + 7] << 8) | response[modbus_start + 8]       # 湿度：0002H（uint16）
-        print(f"【解析】湿度: {humidity}")
+        logger.debug("【解析】湿度: %s", humidity)
         
         co2 = (response[modbus_start + 9] << 8) | response[modbus_start + 10]          # CO2：0003H
-        print(f"【解析】CO2: {co2}")
+        logger.debug("【解析】CO2: %s", co2)
         
         # 气压：10-13（0001 03FEH），前四位作为高位，后四位作为低位
         pressure_high = (response[modbus_start + 11] << 8) | response[modbus_start + 12]  # 气压高位：00 01
         pressure_low = (response[modbus_start + 13] << 8) | response[modbus_start + 14]   # 气压低位：03 FE
         pressure = (pressure_high << 16) | pressure_low      # 组合成完整气压值（单位：Pa）
-        print(f"【解析】气压: {pressure} Pa = {pressure/1000:.2f} kPa")
+        logger.debug("【解析】气压: %d Pa = %.2f kPa", pressure, pressure / 1000)
         
         # 光照：14-17（0000 01A7H），使用全部4字节中的有效部分
         # 修正光照强度的偏移量，确保正确提取数据
         light_high = (response[modbus_start + 15] << 8) | response[modbus_start + 16]  # 光照高位
         light_low = (response[modbus_start + 17] << 8) | response[modbus_start + 18]   # 光照低位
         light = (light_high << 16) | light_low              # 组合成完整光照值（单位：Lux）
-        print(f"【解析】光照: {light} Lux")
+        logger.debug("【解析】光照: %d Lux", light)
         
         # 计算CRC校验（使用除校验码外的所有数据）
         crc_data = response[modbus_start:-2]
@@ -750,7 +746,7 @@ def parse_light_gas_response(response):
         actual_crc = (response[-1] << 8) | response[-2]
         
         if expected_crc != actual_crc:
-            print(f"CRC校验失败: 预期={expected_crc:04X}, 实际={actual_crc:04X}")
+            logger.debug("CRC校验失败: 预期=%04X, 实际=%04X", expected_crc, actual_crc)
             # 暂时忽略CRC校验失败，继续解析数据
         
         # 转换为实际值
@@ -775,27 +771,28 @@ def parse_light_gas_response(response):
         
         # 验证数据范围
         if temperature < Config.TEMPERATURE_RANGE[0] or temperature > Config.TEMPERATURE_RANGE[1]:
-            print(f"温度值超出范围: {temperature}")
+            logger.warning("温度值超出范围: %s", temperature)
             # 暂时不返回None，允许超出范围的值通过
             # return None
         if humidity < 0 or humidity > 100:
-            print(f"湿度值超出范围: {humidity}")
+            logger.warning("湿度值超出范围: %s", humidity)
             # 暂时不返回None，允许超出范围的值通过
             # return None
         if co2 < 0 or co2 > 5000:
-            print(f"CO2值超出范围: {co2}")
+            logger.warning("CO2值超出范围: %s", co2)
             # 暂时不返回None，允许超出范围的值通过
             # return None
         if pressure < 0 or pressure > 1100:
-            print(f"气压值超出范围: {pressure}")
+            logger.warning("气压值超出范围: %s", pressure)
             # 暂时不返回None，允许超出范围的值通过
             # return None
         if light < 0 or light > 100000:
-            print(f"光照强度值超出范围: {light}")
+            logger.warning("光照强度值超出范围: %s", light)
             # 暂时不返回None，允许超出范围的值通过
             # return None
         
-        print(f"解析成功: 状态={status:04X}, 温度={temperature}°C, 湿度={humidity}%, CO2={co2}ppm, 气压={pressure}kPa, 光照={light}Lux")
+        logger.debug("解析成功: 状态=%04X, 温度=%s°C, 湿度=%s%%, CO2=%sppm, 气压=%skPa, 光照=%sLux",
+                     status, temperature, humidity, co2, pressure, light)
         return {
             "status": status,
             "temperature": temperature,
@@ -805,10 +802,63 @@ def parse_light_gas_response(response):
             "light": light
         }
     except Exception as e:
-        print(f"解析应答帧失败: {e}")
+        logger.warning("解析应答帧失败: %s", e)
         return None
 
 
+class ParseCache:
+    """按应答帧原始字节缓存解析结果的LRU（放在parse_*_response解析函数之前）
+
+    运行平稳的传感器每个周期返回逐字节相同的应答帧，同一帧的解析结果
+    （含解析失败）不变。缓存的解析结果为只读映射，不含时间戳，
+    时间戳由调用方在写入页面数据时按本次问询填写。
+    """
+
+    def __init__(self, parser, maxsize=None):
+        self.parser = parser
+        self.maxsize = maxsize or Config.PARSE_CACHE_SIZE
+        self._entries = OrderedDict()  # (应答帧, 从机地址) -> 解析结果
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, response, slave_id=None):
+        """解析应答帧，相同的应答帧直接返回缓存的结果"""
+        key = (bytes(response), slave_id)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        result = self.parser(key[0], slave_id=slave_id)
+        if result:
+            result = MappingProxyType({name: value for name, value in result.items() if name != "timestamp"})
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """获取缓存命中统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0
+            }
+
+
 def validate_modbus_frame(frame):
     """验证Modbus帧的有效性"""
     if len(frame) < 8:  # 最小Modbus帧长度
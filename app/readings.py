@@ -0,0 +1,129 @@
+"""实时数据缓冲模块
+
+每个设备在内存中保留最近的数据点，设备数量多时每个数据点的对象开销决定内存占用。
+数据点使用按设备类型生成的__slots__记录类，字段名由同类型共用的ReadingSchema
+保存，不再为每个数据点创建一个带10~20个字符串键的字典；只在JSON接口处转换为字典。
+"""
+
+import threading
+from collections import deque
+from functools import lru_cache
+from app.config import Config
+
+
+class Reading:
+    """数据点记录基类（只读，按字段名访问，接口输出时转换为字典）"""
+
+    __slots__ = ("timestamp",)
+    schema = None
+
+    def get(self, field, default=None):
+        """按字段名获取数值"""
+        return getattr(self, field, default)
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def items(self):
+        """按字段顺序遍历(字段名, 数值)，timestamp在最后"""
+        for field in self.schema.fields:
+            yield field, getattr(self, field)
+        yield "timestamp", self.timestamp
+
+    def to_dict(self):
+        """转换为字典"""
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class ReadingSchema:
+    """一种设备类型数据点的字段定义，同类型的所有数据点共用"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(field for field in fields if field != "timestamp")
+        self.record = type(f"{name.title()}Reading", (Reading,), {"__slots__": self.fields, "schema": self})
+
+    def make(self, values, timestamp):
+        """按字段定义从解析结果创建数据点"""
+        reading = self.record()
+        for field in self.fields:
+            setattr(reading, field, values.get(field))
+        reading.timestamp = timestamp
+        return reading
+
+
+@lru_cache(maxsize=64)
+def schema_for(fields):
+    """获取字段组合对应的共用字段定义（没有预先定义字段的数据按字段组合生成）"""
+    return ReadingSchema("dynamic", fields)
+
+
+def to_reading(data, timestamp=None):
+    """将字典转换为数据点记录，已经是记录时原样返回"""
+    if isinstance(data, Reading):
+        return data
+    fields = tuple(field for field in data if field != "timestamp")
+    return schema_for(fields).make(data, data.get("timestamp") if timestamp is None else timestamp)
+
+
+class ReadingBuffer:
+    """按设备划分的内存环形缓冲区，保存最近解析到的数据点"""
+
+    def __init__(self, capacity=None):
+        """初始化缓冲区"""
+        self.capacity = capacity or Config.READING_BUFFER_SIZE
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def append(self, device, data):
+        """追加一个数据点（data为数据点记录或字典，必须包含timestamp字段；字典转换为记录保存）"""
+        timestamp = data.get("timestamp") if data else None
+        if not timestamp:
+            return False
+        point = to_reading(data)
+        with self._lock:
+            buffer = self._buffers.get(device)
+            if buffer is None:
+                buffer = self._buffers[device] = deque(maxlen=self.capacity)
+            # 时间戳没有前进时不重复记录，保证缓冲区按时间递增
+            if buffer and timestamp <= buffer[-1].timestamp:
+                return False
+            buffer.append(point)
+        return True
+
+    def since(self, device, timestamp=0, limit=None):
+        """返回时间戳严格大于timestamp的数据点记录（按时间升序）"""
+        points = []
+        with self._lock:
+            buffer = self._buffers.get(device)
+            if not buffer:
+                return points
+            # 增量请求通常只涉及末尾少量数据点，从尾部向前扫描即可
+            for point in reversed(buffer):
+                if point.timestamp <= timestamp:
+                    break
+                points.append(point)
+                if limit and len(points) >= limit:
+                    break
+        points.reverse()
+        return points
+
+    def latest(self, device):
+        """获取设备最新的数据点"""
+        with self._lock:
+            buffer = self._buffers.get(device)
+            return buffer[-1] if buffer else None
+
+    def clear(self, device=None):
+        """清空指定设备（或全部设备）的缓冲区"""
+        with self._lock:
+            if device is None:
+                self._buffers.clear()
+            else:
+                self._buffers.pop(device, None)
@@ -0,0 +1,163 @@
+"""设备注册表模块
+
+每个设备包含设备类型、LoRa地址、Modbus从机地址、所属网关和问询周期，持久化在SQLite中。
+内存中按设备ID和(网关IP, 网关端口, LoRa地址, 从机地址)建立索引，查找均为O(1)。
+同一类型的设备可以注册任意多个，设备ID即串口服务中的页面名称；
+同一LoRa节点的RS-485总线上可以挂接多个从机地址不同的设备。
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from app.config import Config
+from app.database import get_devices, save_device, delete_device
+
+logger = logging.getLogger(__name__)
+
+# 支持的设备类型（决定问询帧和应答帧的解析方式）
+DEVICE_TYPES = ("light", "temperature", "vibration")
+
+# 串口服务中的工具页面，不能作为设备ID
+RESERVED_IDS = ("config", "sscom")
+
+# 与原有监控页面对应的内置设备，不能删除
+DEFAULT_DEVICES = [
+    {"id": "light", "name": "光照气体", "device_type": "light", "lora_address": "5678", "slave_id": 1,
+     "gateway_ip": "192.168.0.80", "gateway_port": 10125, "query_interval": Config.DEFAULT_QUERY_INTERVAL},
+    {"id": "temperature", "name": "温湿度", "device_type": "temperature", "lora_address": "0002", "slave_id": 1,
+     "gateway_ip": "192.168.0.80", "gateway_port": 10125, "query_interval": Config.DEFAULT_QUERY_INTERVAL},
+    {"id": "vibration", "name": "温振", "device_type": "vibration", "lora_address": "0003", "slave_id": 1,
+     "gateway_ip": "192.168.0.80", "gateway_port": 10125, "query_interval": Config.DEFAULT_QUERY_INTERVAL}
+]
+BUILTIN_IDS = tuple(device["id"] for device in DEFAULT_DEVICES)
+
+DEVICE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,32}$')
+LORA_ADDRESS_PATTERN = re.compile(r'^[0-9A-Fa-f]{4}$')
+IP_PATTERN = re.compile(r'^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$')
+
+
+def validate_device(device, existing=None):
+    """校验并规范化设备信息（更新时未提供的字段沿用existing），无效时抛出ValueError"""
+    merged = dict(existing or {})
+    merged.update({key: value for key, value in device.items() if value is not None})
+
+    device_id = str(merged.get("id", ""))
+    if not DEVICE_ID_PATTERN.match(device_id):
+        raise ValueError("设备ID只能包含字母、数字、下划线和连字符（1-32个字符）")
+    if device_id in RESERVED_IDS:
+        raise ValueError(f"设备ID不能为 {device_id}")
+    if merged.get("device_type") not in DEVICE_TYPES:
+        raise ValueError(f"设备类型必须为: {', '.join(DEVICE_TYPES)}")
+    lora_address = str(merged.get("lora_address", ""))
+    if not LORA_ADDRESS_PATTERN.match(lora_address):
+        raise ValueError("LoRa地址必须为4位十六进制数")
+    gateway_ip = str(merged.get("gateway_ip", ""))
+    if not IP_PATTERN.match(gateway_ip):
+        raise ValueError("无效的网关IP地址格式")
+    try:
+        gateway_port = int(merged.get("gateway_port"))
+        query_interval = float(merged.get("query_interval", Config.DEFAULT_QUERY_INTERVAL))
+        slave_id = int(merged.get("slave_id", Config.MODBUS_SLAVE_ID))
+    except (TypeError, ValueError):
+        raise ValueError("网关端口、从机地址和问询周期必须为数字")
+    if slave_id < 1 or slave_id > 247:
+        raise ValueError("从机地址必须在1-247之间")
+    if gateway_port < 1 or gateway_port > 65535:
+        raise ValueError("端口号必须在1-65535之间")
+    if query_interval < Config.MIN_QUERY_INTERVAL or query_interval > Config.MAX_QUERY_INTERVAL:
+        raise ValueError(f"问询周期必须在{Config.MIN_QUERY_INTERVAL}-{Config.MAX_QUERY_INTERVAL}秒之间")
+
+    return {
+        "id": device_id,
+        "name": str(merged.get("name") or device_id),
+        "device_type": merged["device_type"],
+        "lora_address": lora_address.upper(),
+        "slave_id": slave_id,
+        "gateway_ip": gateway_ip,
+        "gateway_port": gateway_port,
+        "query_interval": query_interval
+    }
+
+
+def address_key(gateway_ip, gateway_port, lora_address, slave_id=None):
+    """地址索引的键"""
+    return (gateway_ip, int(gateway_port), lora_address.upper(), int(slave_id or Config.MODBUS_SLAVE_ID))
+
+
+class DeviceRegistry:
+    """设备注册表"""
+
+    def __init__(self):
+        """初始化（调用load从数据库加载设备）"""
+        self._by_id = {}
+        self._by_address = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(device):
+        """设备的地址索引键"""
+        return address_key(device["gateway_ip"], device["gateway_port"], device["lora_address"], device.get("slave_id"))
+
+    def _index(self, device):
+        """将设备加入索引（调用方需持有锁）"""
+        self._by_id[device["id"]] = device
+        self._by_address[self._key(device)] = device
+
+    def _unindex(self, device):
+        """将设备移出索引（调用方需持有锁）"""
+        self._by_id.pop(device["id"], None)
+        self._by_address.pop(self._key(device), None)
+
+    def load(self):
+        """从数据库加载设备（数据库不可用时使用内置设备）"""
+        try:
+            devices = get_devices()
+        except sqlite3.Error as e:
+            logger.warning("加载设备注册表失败，使用内置设备: %s", e)
+            devices = []
+        with self._lock:
+            self._by_id.clear()
+            self._by_address.clear()
+            for device in devices or DEFAULT_DEVICES:
+                self._index(dict(device))
+
+    def get(self, device_id):
+        """按设备ID查找设备"""
+        device = self._by_id.get(device_id)
+        return dict(device) if device else None
+
+    def find(self, lora_address, gateway_ip, gateway_port, slave_id=None):
+        """按网关、LoRa地址和从机地址查找设备"""
+        device = self._by_address.get(address_key(gateway_ip, gateway_port, lora_address, slave_id))
+        return dict(device) if device else None
+
+    def all(self):
+        """获取所有设备"""
+        with self._lock:
+            return [dict(device) for device in self._by_id.values()]
+
+    def register(self, device):
+        """新增或更新设备，返回规范化后的设备信息"""
+        with self._lock:
+            existing = self._by_id.get(device.get("id"))
+            device = validate_device(device, existing)
+            other = self._by_address.get(self._key(device))
+            if other is not None and other["id"] != device["id"]:
+                raise ValueError(f"网关 {device['gateway_ip']}:{device['gateway_port']} 上LoRa地址 {device['lora_address']} 的从机地址 {device['slave_id']} 已被设备 {other['id']} 使用")
+            save_device(device)
+            if existing is not None:
+                self._unindex(existing)
+            self._index(device)
+        return dict(device)
+
+    def remove(self, device_id):
+        """删除设备"""
+        if device_id in BUILTIN_IDS:
+            raise ValueError("内置设备不能删除")
+        with self._lock:
+            device = self._by_id.get(device_id)
+            if device is None:
+                raise ValueError(f"设备不存在: {device_id}")
+            delete_device(device_id)
+            self._unindex(device)
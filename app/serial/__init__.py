@@ -1,13 +1,80 @@
 """串口服务模块"""
 
+import logging
 import threading
 import time
 from datetime import datetime
 from app.config import Config
+from app.logs import HexFrame
 
 # 创建全局串口锁，确保同一时间只有一个页面使用串口
 serial_lock = threading.Lock()
 from app.database import save_sensor_data, save_vibration_data, save_air_quality_data
+from app.readings import ReadingBuffer
+from app.registry import DeviceRegistry
+from app.serial.scheduler import PollScheduler
+from app.serial.lora import AirtimeScheduler
+from app.serial.rtt import RttTracker, node_key
+from app.serial.breaker import CircuitBreaker
+from app.serial.gateway import GatewayPool
+from app.serial.bus import BusArbiter, bus_key
+from app.serial.mbap import MbapConnection
+from app.serial.profiles import get_plan
+from app.serial.frame_handler import FrameHistory, render_frame_data
+
+logger = logging.getLogger(__name__)
+
+# 各设备类型页面的初始数据
+PAGE_DATA = {
+    "light": {
+        "status": None,
+        "temperature": None,
+        "humidity": None,
+        "co2": None,
+        "pressure": None,
+        "light": None,
+        "timestamp": 0
+    },
+    "temperature": {
+        "temperature": 0,
+        "humidity": 0,
+        "timestamp": 0
+    },
+    "vibration": {
+        "temperature": 0,
+        "frequency_x": 0,
+        "frequency_y": 0,
+        "frequency_z": 0,
+        "velocity_x": 0,
+        "velocity_y": 0,
+        "velocity_z": 0,
+        "acceleration_x": 0,
+        "acceleration_y": 0,
+        "acceleration_z": 0,
+        "displacement_x": 0,
+        "displacement_y": 0,
+        "displacement_z": 0,
+        "resultant_velocity": 0,
+        "resultant_displacement": 0,
+        "resultant_acceleration": 0,
+        "version": 0,
+        "status": "A",
+        "status_text": "良好",
+        "timestamp": 0
+    },
+    "config": {
+        "timestamp": 0
+    },
+    "sscom": {
+        "status": None,
+        "temperature": None,
+        "humidity": None,
+        "co2": None,
+        "pressure": None,
+        "light": None,
+        "timestamp": 0
+    }
+}
 
 # 避免循环导入，在类初始化时导入
 
@@ -18,130 +85,22 @@ class SerialService:
     
     def __init__(self):
         """初始化串口服务"""
+        # 设备注册表：每个注册设备对应一个页面（页面名称即设备ID）
+        self.registry = DeviceRegistry()
+        self.registry.load()
+        
         # 每个页面的独立配置
-        self.pages = {
-            "light": {
-                "serial_port": None,
-                "serial_thread": None,
-                "stop_thread": False,
-                "query_running": False,
-                "query_interval": Config.DEFAULT_QUERY_INTERVAL,
-                "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
-                "communication_mode": "tcp",  # 默认通讯模式
-                "network_type": "lora",  # 默认网络类型
-                "target_address": "5678",  # 默认LoRa目标地址
-                "tcp_server_ip": "192.168.0.80",  # 默认TCP服务器IP
-                "tcp_server_port": 10125,  # 默认TCP服务器端口
-                "frame_data": {"query": "", "response": "", "frames": []},
-                "data": {
-                    "status": None,
-                    "temperature": None,
-                    "humidity": None,
-                    "co2": None,
-                    "pressure": None,
-                    "light": None,
-                    "timestamp": 0
-                }
-            },
-            "temperature": {
-                "serial_port": None,
-                "serial_thread": None,
-                "stop_thread": False,
-                "query_running": False,
-                "query_interval": Config.DEFAULT_QUERY_INTERVAL,
-                "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
-                "communication_mode": "tcp",  # 默认通讯模式
-                "network_type": "lora",  # 默认网络类型
-                "target_address": "0002",  # 默认LoRa目标地址
-                "tcp_server_ip": "192.168.0.80",  # 默认TCP服务器IP
-                "tcp_server_port": 10125,  # 默认TCP服务器端口
-                "frame_data": {"query": "", "response": "", "frames": []},
-                "data": {
-                    "temperature": 0,
-                    "humidity": 0,
-                    "timestamp": 0
-                }
-            },
-            "vibration": {
-                "serial_port": None,
-                "serial_thread": None,
-                "stop_thread": False,
-                "query_running": False,
-                "query_interval": Config.DEFAULT_QUERY_INTERVAL,
-                "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
-                "communication_mode": "tcp",  # 默认通讯模式
-                "network_type": "lora",  # 默认网络类型
-                "target_address": "0003",  # 默认LoRa目标地址
-                "tcp_server_ip": "192.168.0.80",  # 默认TCP服务器IP
-                "tcp_server_port": 10125,  # 默认TCP服务器端口
-                "frame_data": {"query": "", "response": "", "frames": []},
-                "data": {
-                    "temperature": 0,
-                    "frequency_x": 0,
-                    "frequency_y": 0,
-                    "frequency_z": 0,
-                    "velocity_x": 0,
-                    "velocity_y": 0,
-                    "velocity_z": 0,
-                    "acceleration_x": 0,
-                    "acceleration_y": 0,
-                    "acceleration_z": 0,
-                    "displacement_x": 0,
-                    "displacement_y": 0,
-                    "displacement_z": 0,
-                    "resultant_velocity": 0,
-                    "resultant_displacement": 0,
-                    "resultant_acceleration": 0,
-                    "version": 0,
-                    "status": "A",
-                    "status_text": "良好",
-                    "timestamp": 0
-                }
-            },
-            "config": {
-                "serial_port": None,
-                "serial_thread": None,
-                "stop_thread": False,
-                "query_running": False,
-                "query_interval": Config.DEFAULT_QUERY_INTERVAL,
-                "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
-                "communication_mode": "tcp",  # 默认通讯模式
-                "network_type": "lora",  # 默认网络类型
-                "target_address": "5678",  # 默认LoRa目标地址
-                "tcp_server_ip": "192.168.0.80",  # 默认TCP服务器IP
-                "tcp_server_port": 10125,  # 默认TCP服务器端口
-                "frame_data": {"query": "", "response": "", "frames": []},
-                "data": {
-                    "timestamp": 0
-                }
-            },
-            "sscom": {
-                "serial_port": None,
-                "serial_thread": None,
-                "stop_thread": False,
-                "query_running": False,
-                "immediate_query": False,
-                "query_interval": Config.DEFAULT_QUERY_INTERVAL,
-                "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
-                "communication_mode": "tcp",
-                "network_type": "lora",
-                "target_address": "5678",
-                "tcp_server_ip": "192.168.0.80",
-                "tcp_server_port": 10125,
-                "tcp_socket": None,
-                "tcp_connected": False,
-                "frame_data": {"query": "", "response": "", "frames": []},
-                "data": {
-                    "status": None,
-                    "temperature": None,
-                    "humidity": None,
-                    "co2": None,
-                    "pressure": None,
-                    "light": None,
-                    "timestamp": 0
-                }
-            }
-        }
+        self.pages = {}
+        for device in self.registry.all():
+            self.pages[device["id"]] = self._new_page(device)
+        # 配置页面和SSCOM调试页面不对应注册设备
+        self.pages["config"] = self._new_page({"device_type": "config", "lora_address": "5678"})
+        self.pages["sscom"] = self._new_page({"device_type": "sscom", "lora_address": "5678"})
+        self.pages["sscom"].update({
+            "immediate_query": False,
+            "tcp_socket": None,
+            "tcp_connected": False
+        })
         
         # 设备振动标准配置（ISO2372）
         self.device_class = 1  # 默认设备分类
@@ -172,6 +131,33 @@ class SerialService:
             }
         }
         
+        # 每个设备最近数据点的环形缓冲区（供图表增量同步）
+        self.readings = ReadingBuffer()
+        
+        # 共享内存最新值表（由采集守护进程设置，供多个Web工作进程读取）
+        self.latest_table = None
+        
+        # 按各页面问询周期调度问询的截止时间调度器
+        self.scheduler = PollScheduler()
+        
+        # LoRa网关空口调度器（错开各页面对同一网关的问询）
+        self.airtime = AirtimeScheduler()
+        
+        # 各节点往返时延估计（动态计算应答等待时间）
+        self.rtt = RttTracker()
+        
+        # 无应答节点熔断（按指数退避探测，不影响同一网关上的其他节点）
+        self.breaker = CircuitBreaker()
+        
+        # 网关共享连接（在途窗口大于1时使用）
+        self.gateways = GatewayPool()
+        
+        # Modbus-TCP网关连接（网络类型为modbus_tcp的页面使用，按事务标识并发问询）
+        self.mbap = GatewayPool(MbapConnection)
+        
+        # RS-485总线仲裁（同一LoRa节点或串口上的多个从机轮流问询）
+        self.buses = BusArbiter()
+        
         # 避免循环导入，在初始化时导入
         from app.serial.serial_port import SerialPortHandler
         from app.serial.tcp import TCPHandler
@@ -184,9 +170,38 @@ class SerialService:
         self.frame_handler = FrameHandler()
         self.config = SerialConfig()
     
-    def get_available_ports(self):
-        """获取可用的串口端口列表"""
-        return self.serial_handler.get_available_ports()
+    def _new_page(self, device):
+        """根据设备信息创建页面配置（同时构建问询计划）"""
+        page_config = {
+            "device_type": device["device_type"],
+            "serial_port": None,
+            "serial_thread": None,
+            "stop_thread": False,
+            "query_running": False,
+            "query_interval": device.get("query_interval", Config.DEFAULT_QUERY_INTERVAL),
+            "serial_config": Config.DEFAULT_SERIAL_CONFIG.copy(),
+            "communication_mode": "tcp",  # 默认通讯模式
+            "network_type": "lora",  # 默认网络类型
+            "target_address": device["lora_address"],  # LoRa目标地址
+            "slave_id": device.get("slave_id", Config.MODBUS_SLAVE_ID),  # RS-485总线上的Modbus从机地址
+            "tcp_server_ip": device.get("gateway_ip", "192.168.0.80"),  # TCP服务器IP
+            "tcp_server_port": device.get("gateway_port", 10125),  # TCP服务器端口
+            "frame_data": {"query": "", "response": "", "frames": FrameHistory()},
+            "data": dict(PAGE_DATA.get(device["device_type"], PAGE_DATA["light"]))
+        }
+        get_plan(page_config)
+        return page_config
+    
+    def get_page(self, page, default="light"):
+        """获取页面配置，页面不存在时返回默认页面"""
+        page_config = self.pages.get(page)
+        if page_config is None:
+            page_config = self.pages.get(default) or self.pages["config"]
+        return page_config
+    
+    def get_available_ports(self, refresh=False):
+        """获取可用的串口端口列表（refresh为True时立即重新枚举）"""
+        return self.serial_handler.get_available_ports(refresh)
     
     def open_serial(self, config=None, page="light"):
         """打开串口"""
@@ -206,13 +221,18 @@ class SerialService:
     
     def read_serial_data(self, page):
         """从串口或TCP读取数据"""
-        print(f"{page}页面: 启动读取线程")
-        page_config = self.pages.get(page, self.pages["light"])
+        logger.info("%s页面: 启动读取线程", page)
+        page_config = self.get_page(page)
         # 不立即发送问询，等待用户点击启动问询
         page_config["immediate_query"] = False
+        self.scheduler.add(page, page_config["query_interval"])
         
         while not page_config["stop_thread"]:
             try:
+                # 等待本页面的下一次问询截止时间
+                if not self.scheduler.wait(page, stop=lambda: page_config["stop_thread"]):
+                    break
+                
                 # 获取当前通讯模式
                 communication_mode = page_config.get("communication_mode", "serial")
                 
@@ -220,24 +240,22 @@ class SerialService:
                 if page_config["query_running"]:
                     if communication_mode == "tcp":
                         # TCP网络通讯
-                        print(f"{page}页面: 执行TCP通讯")
+                        logger.debug("%s页面: 执行TCP通讯", page)
                         timestamp = time.time()
                         self.tcp_handler.handle_communication(self, page, timestamp)
                     else:
                         # 串口通讯
-                        print(f"{page}页面: 进入串口通讯模式")
+                        logger.debug("%s页面: 进入串口通讯模式", page)
                         timestamp = time.time()
                         self.serial_handler.handle_communication(self, page, timestamp)
-                
-                # 等待下一次问询
-                time.sleep(Config.DEFAULT_QUERY_INTERVAL)
             except Exception as e:
-                print(f"{page}页面: 读取数据错误: {str(e)}")
+                logger.exception("%s页面: 读取数据错误: %s", page, e)
                 time.sleep(1)
+        self.scheduler.remove(page)
 
     def get_serial_status(self, page="light"):
         """获取串口状态"""
-        page_config = self.pages.get(page, self.pages["light"])
+        page_config = self.get_page(page)
         return {
             "is_open": page_config["serial_port"] and page_config["serial_port"].is_open,
             "serial_config": page_config["serial_config"],
@@ -247,21 +265,55 @@ class SerialService:
             "target_address": page_config.get("target_address", "5678"),
             "tcp_server_ip": page_config.get("tcp_server_ip", "192.168.0.80"),
             "tcp_server_port": page_config.get("tcp_server_port", 10125),
-            "tcp_connected": page_config.get("tcp_connected", False),
-            "communication_mode": page_config.get("communication_mode", "tcp")
+            "tcp_connected": self.tcp_handler.connected(self, page_config),
+            "communication_mode": page_config.get("communication_mode", "tcp"),
+            "poll_stats": self.scheduler.stats(page),
+            "lora": self.get_lora_status(page),
+            "rtt": self.rtt.stats(node_key(page_config)),
+            "breaker": self.breaker.stats(node_key(page_config)),
+            "gateway": self.gateways.stats(page_config.get("tcp_server_ip"), page_config.get("tcp_server_port")),
+            "bus": self.buses.stats(bus_key(page_config)),
+            "mbap": self.mbap.stats(page_config.get("tcp_server_ip"), page_config.get("tcp_server_port")),
+            "socket": page_config["tcp_session"].stats() if page_config.get("tcp_session") else None,
+            "tcp_link": page_config["tcp_link"].stats() if page_config.get("tcp_link") else None,
+            "parse_cache": page_config["plan"].profile.decoder.stats() if page_config.get("plan") else None
         }
     
-    def get_frame_data(self, page="light"):
-        """获取问询帧和应答帧数据"""
-        page_config = self.pages.get(page, self.pages["light"])
-        return page_config["frame_data"]
+    def get_lora_status(self, page="light"):
+        """获取页面所用LoRa网关的空口统计"""
+        page_config = self.get_page(page)
+        if page_config.get("network_type") != "lora":
+            return None
+        gateway = (page_config.get("tcp_server_ip"), page_config.get("tcp_server_port"))
+        # 问询帧和应答帧的空口字节数取自各页面的问询计划，同一网关上正在问询的节点共同决定最小问询周期
+        plan = get_plan(page_config)
+        plans = [
+            get_plan(config) for config in self.pages.values()
+            if config.get("network_type") == "lora" and config["query_running"]
+            and (config.get("tcp_server_ip"), config.get("tcp_server_port")) == gateway
+        ]
+        nodes = [node_plan.airtime_sizes for node_plan in plans if node_plan is not None]
+        if not nodes and plan is not None:
+            nodes = [plan.airtime_sizes]
+        status = self.airtime.stats(gateway)
+        status["poll_airtime"] = round(self.airtime.cost(*plan.airtime_sizes), 4) if plan is not None else 0.0
+        status["min_query_interval"] = round(self.airtime.min_interval(nodes), 4)
+        return status
+    
+    def get_frame_data(self, page="light", since=0):
+        """获取问询帧和应答帧数据（十六进制字符串在读取时生成），since为已获取的最后一帧序号"""
+        page_config = self.get_page(page)
+        return render_frame_data(page_config["frame_data"], since)
     
     def start_query(self, page="light"):
         """启动问询"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["query_running"] = True
             page_config["immediate_query"] = True
+            # 手动启动问询时清除节点的熔断状态
+            self.breaker.reset(node_key(page_config))
+            self.scheduler.trigger(page)
             return True, f"{page}页面问询已启动"
         except Exception as e:
             return False, f"启动问询失败: {str(e)}"
@@ -269,8 +321,9 @@ class SerialService:
     def stop_query(self, page="light"):
         """停止问询"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["query_running"] = False
+            device_type = page_config.get("device_type", page)
             # 清空数据，显示--
             page_config["data"] = {
                 "temperature": None,
@@ -293,11 +346,11 @@ class SerialService:
                 "status": "A",
                 "status_text": "良好",
                 "timestamp": 0
-            } if page == "vibration" else {
+            } if device_type == "vibration" else {
                 "temperature": None,
                 "humidity": None,
                 "timestamp": 0
-            } if page == "temperature" else {
+            } if device_type == "temperature" else {
                 "status": None,
                 "temperature": None,
                 "humidity": None,
@@ -306,6 +359,7 @@ class SerialService:
                 "light": None,
                 "timestamp": 0
             }
+            self.publish_latest(page, page_config["data"])
             return True, f"{page}页面问询已停止，数据已清空"
         except Exception as e:
             return False, f"停止问询失败: {str(e)}"
@@ -313,7 +367,8 @@ class SerialService:
     def update_query_interval(self, interval, page="light"):
         """更新问询周期"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
+            self.scheduler.set_interval(page, interval)
             page_config["query_interval"] = interval
             return True, f"{page}页面问询周期已更新为 {interval} 秒"
         except Exception as e:
@@ -321,19 +376,130 @@ class SerialService:
     
     def get_light_gas_data(self):
         """获取光照气体数据"""
-        page_config = self.pages.get("light", self.pages["light"])
+        page_config = self.get_page("light")
         return page_config["data"]
     
     def get_sensor_data(self, page="temperature"):
         """获取传感器数据"""
-        page_config = self.pages.get(page, self.pages["temperature"])
+        page_config = self.get_page(page, "temperature")
         return page_config["data"]
     
     def get_vibration_data(self):
         """获取温振数据"""
-        page_config = self.pages.get("vibration", self.pages["vibration"])
+        page_config = self.get_page("vibration")
         return page_config["data"]
     
+    def record_reading(self, page, reading):
+        """记录一次成功解析的数据点（数据点记录或字典）"""
+        self.publish_latest(page, reading)
+        return self.readings.append(page, reading)
+
+    def apply_response(self, page, plan, response_data, timestamp):
+        """校验应答帧的LoRa地址前缀并按问询计划解析（TCP和串口通讯共用），解析失败时只更新时间戳"""
+        page_config = self.get_page(page)
+        profile = plan.profile
+        data = page_config.setdefault("data", {})
+
+        if len(response_data) < plan.expected_length:
+            if profile.fallback_data is not None:
+                logger.info("【%s页面】未收到应答帧，使用默认数据", page)
+                page_config["data"] = dict(profile.fallback_data, timestamp=timestamp)
+            else:
+                logger.info("【%s页面】%s应答帧长度不足，保持之前的数据，长度: %d", page, profile.name, len(response_data))
+                data["timestamp"] = timestamp
+            return
+
+        if plan.prefix and response_data[:len(plan.prefix)] != plan.prefix:
+            logger.info("【%s页面】目标地址不匹配，预期: %s，实际: %s，跳过解析",
+                        page, HexFrame(plan.prefix), HexFrame(response_data[:len(plan.prefix)]))
+            data["timestamp"] = timestamp
+            return
+
+        # 按问询计划去掉LoRa地址前缀，解析函数不再猜测前缀
+        result = plan.decode(response_data)
+        if not result:
+            logger.info("【%s页面】%s解析失败，保持之前的数据", page, profile.name)
+            data["timestamp"] = timestamp
+            return
+
+        reading = profile.apply(result, timestamp)
+        page_config["data"] = reading.to_dict()
+        self.record_reading(page, reading)
+        logger.debug("【%s页面】解析到%s数据: %s", page, profile.name, page_config["data"])
+
+    def publish_latest(self, page, data):
+        """将最新数据写入共享内存最新值表"""
+        if self.latest_table is not None:
+            self.latest_table.write(page, data)
+    
+    def get_readings_since(self, page, timestamp=0, limit=None):
+        """获取指定时间戳之后的数据点（数据点记录在此转换为字典），limit为最多返回的最新数据点数"""
+        return [point.to_dict() for point in self.readings.since(page, timestamp, limit)]
+    
+    def list_devices(self):
+        """获取所有注册设备及其问询状态"""
+        devices = self.registry.all()
+        for device in devices:
+            page_config = self.pages.get(device["id"], {})
+            device["query_running"] = page_config.get("query_running", False)
+            device["tcp_connected"] = self.tcp_handler.connected(self, page_config)
+        return devices
+    
+    def get_device(self, device_id):
+        """按设备ID获取注册设备"""
+        return self.registry.get(device_id)
+    
+    def find_device(self, lora_address, gateway_ip, gateway_port, slave_id=None):
+        """按网关、LoRa地址和从机地址获取注册设备"""
+        return self.registry.find(lora_address, gateway_ip, gateway_port, slave_id)
+    
+    def register_device(self, device):
+        """新增或更新注册设备"""
+        try:
+            device = self.registry.register(device)
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"保存设备失败: {str(e)}"
+        
+        page_config = self.pages.get(device["id"])
+        if page_config is None:
+            self.pages[device["id"]] = self._new_page(device)
+            return True, f"设备 {device['id']} 已注册"
+        
+        # 更新已有设备的页面配置，设备类型改变时重置数据
+        if page_config.get("device_type") != device["device_type"]:
+            page_config["data"] = dict(PAGE_DATA[device["device_type"]])
+        page_config.update({
+            "device_type": device["device_type"],
+            "target_address": device["lora_address"],
+            "slave_id": device["slave_id"],
+            "tcp_server_ip": device["gateway_ip"],
+            "tcp_server_port": device["gateway_port"],
+            "query_interval": device["query_interval"]
+        })
+        get_plan(page_config)
+        self.scheduler.set_interval(device["id"], device["query_interval"])
+        return True, f"设备 {device['id']} 已更新"
+    
+    def remove_device(self, device_id):
+        """删除注册设备并停止其问询"""
+        try:
+            self.registry.remove(device_id)
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"删除设备失败: {str(e)}"
+        
+        page_config = self.pages.get(device_id)
+        if page_config is not None:
+            self.close_tcp(device_id)
+            if page_config.get("serial_port"):
+                self.close_serial(device_id)
+            del self.pages[device_id]
+        self.readings.clear(device_id)
+        return True, f"设备 {device_id} 已删除"
+    
     def update_device_class(self, device_class):
         """更新设备分类"""
         try:
@@ -352,7 +518,7 @@ class SerialService:
     def update_network_config(self, network_type, target_address, page="light"):
         """更新网络配置"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["network_type"] = network_type
             page_config["target_address"] = target_address
             return True, f"网络配置已更新: 网络类型={network_type}, 目标地址={target_address}"
@@ -362,7 +528,7 @@ class SerialService:
     def update_communication_config(self, communication_mode, network_type, target_address, config, page="light"):
         """更新通讯配置"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["communication_mode"] = communication_mode
             page_config["network_type"] = network_type
             page_config["target_address"] = target_address
@@ -375,7 +541,7 @@ class SerialService:
     def update_lora_config(self, network_type, target_address, page="light"):
         """更新LoRa配置"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["network_type"] = network_type
             page_config["target_address"] = target_address
             return True, f"LoRa配置已更新: 网络类型={network_type}, 目标地址={target_address}"
@@ -385,7 +551,7 @@ class SerialService:
     def update_tcp_config(self, tcp_server_ip, tcp_server_port, page="light"):
         """更新TCP配置"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
+            page_config = self.get_page(page)
             page_config["tcp_server_ip"] = tcp_server_ip
             page_config["tcp_server_port"] = tcp_server_port
             return True, f"TCP配置已更新: IP={tcp_server_ip}, 端口={tcp_server_port}"
@@ -395,8 +561,8 @@ class SerialService:
     def clear_frame_history(self, page="light"):
         """清空帧数据历史记录"""
         try:
-            page_config = self.pages.get(page, self.pages["light"])
-            page_config["frame_data"]["frames"] = []
+            page_config = self.get_page(page)
+            page_config["frame_data"]["frames"].clear()
             page_config["frame_data"]["query"] = ""
             page_config["frame_data"]["response"] = ""
             return True, f"{page}页面帧数据历史记录已清空"
@@ -0,0 +1,91 @@
+"""节点熔断模块
+
+节点连续K次未应答后熔断：不再按正常问询周期问询，而是按指数退避的
+探测计划问询；探测成功后立即恢复正常周期。熔断只作用于单个节点，
+网关连接保持不变，其他节点不受影响。
+"""
+
+import threading
+import time
+from app.config import Config
+
+STATE_CLOSED = "closed"  # 正常问询
+STATE_OPEN = "open"  # 熔断，等待下一次探测
+
+
+class _NodeState:
+    """单个节点的熔断状态"""
+
+    def __init__(self):
+        self.state = STATE_CLOSED
+        self.failures = 0  # 连续未应答次数
+        self.trips = 0  # 熔断后连续探测失败次数
+        self.probe_at = 0.0  # 下一次探测时间
+        self.skipped = 0  # 熔断期间跳过的问询次数
+
+
+class CircuitBreaker:
+    """按节点熔断无应答设备"""
+
+    def __init__(self, threshold=None, base_delay=None, max_delay=None, clock=time.monotonic):
+        """初始化"""
+        self.threshold = threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.base_delay = base_delay or Config.BREAKER_BASE_DELAY
+        self.max_delay = max_delay or Config.BREAKER_MAX_DELAY
+        self._clock = clock
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def _get(self, node):
+        """获取节点状态（调用方需持有锁）"""
+        state = self._nodes.get(node)
+        if state is None:
+            state = self._nodes[node] = _NodeState()
+        return state
+
+    def allow(self, node):
+        """本次是否问询该节点（熔断期间只有到达探测时间才允许）"""
+        with self._lock:
+            state = self._get(node)
+            if state.state == STATE_CLOSED or self._clock() >= state.probe_at:
+                return True
+            state.skipped += 1
+            return False
+
+    def success(self, node):
+        """节点应答成功，恢复正常问询"""
+        with self._lock:
+            state = self._get(node)
+            state.state = STATE_CLOSED
+            state.failures = 0
+            state.trips = 0
+
+    def failure(self, node):
+        """节点未应答，连续次数达到阈值后熔断（探测失败时退避时间加倍）"""
+        with self._lock:
+            state = self._get(node)
+            state.failures += 1
+            if state.state == STATE_OPEN or state.failures >= self.threshold:
+                delay = min(self.max_delay, self.base_delay * (2 ** state.trips))
+                state.state = STATE_OPEN
+                state.trips += 1
+                state.probe_at = self._clock() + delay
+
+    def stats(self, node):
+        """获取节点的熔断状态"""
+        with self._lock:
+            state = self._get(node)
+            return {
+                "state": state.state,
+                "consecutive_failures": state.failures,
+                "skipped": state.skipped,
+                "probe_in": round(max(0.0, state.probe_at - self._clock()), 3) if state.state == STATE_OPEN else None
+            }
+
+    def reset(self, node=None):
+        """清除指定节点（或全部节点）的熔断状态"""
+        with self._lock:
+            if node is None:
+                self._nodes.clear()
+            else:
+                self._nodes.pop(node, None)
@@ -0,0 +1,104 @@
+"""RS-485总线仲裁模块
+
+一个LoRa节点（或一个串口）后面的RS-485总线上可以挂接多个Modbus从机，
+每个从机对应一个注册设备和一个问询线程。同一总线同一时间只能有一次问询：
+- 等待总线的问询按到达顺序轮流执行（先到先得），各从机轮询机会均等；
+- 上一次问询结束后至少间隔RTU帧间静默时间t3.5才发送下一个问询帧，
+  从机据此判断帧边界。
+应答帧按从机地址交给对应设备的解析函数（问询计划中记录了从机地址）。
+"""
+
+import threading
+import time
+from collections import deque
+
+
+def rtu_silence(baudrate, bits_per_char=11):
+    """RTU帧间静默时间t3.5（秒），波特率高于19200时按协议固定为1.75毫秒"""
+    if not baudrate or baudrate > 19200:
+        return 0.00175
+    return 3.5 * bits_per_char / baudrate
+
+
+def bus_key(page_config):
+    """页面问询所在的总线标识，Modbus-TCP网关自行管理其总线，返回None"""
+    if page_config.get("communication_mode") == "serial":
+        return ("serial", (page_config.get("serial_config") or {}).get("port"))
+    if page_config.get("network_type") == "modbus_tcp":
+        return None
+    target_address = page_config.get("target_address") if page_config.get("network_type", "lora") == "lora" else None
+    return (page_config.get("tcp_server_ip"), page_config.get("tcp_server_port"), target_address)
+
+
+class _Bus:
+    """单条总线的状态"""
+
+    def __init__(self):
+        self.queue = deque()  # 等待总线的问询（按到达顺序）
+        self.busy = False
+        self.last_end = 0.0  # 上一次问询结束的时间
+        self.polls = 0
+        self.deferred = 0
+        self.max_queue = 0
+
+
+class BusArbiter:
+    """按总线串行化问询"""
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        """初始化（clock和sleep可替换，便于测试）"""
+        self.clock = clock
+        self.sleep = sleep
+        self._buses = {}
+        self._cond = threading.Condition()
+
+    def acquire(self, key, silence=0.0, timeout=None):
+        """按到达顺序获取总线并等待帧间静默时间，timeout秒内未获取到时返回False"""
+        ticket = object()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            bus = self._buses.get(key)
+            if bus is None:
+                bus = self._buses[key] = _Bus()
+            bus.queue.append(ticket)
+            bus.max_queue = max(bus.max_queue, len(bus.queue))
+            while bus.busy or bus.queue[0] is not ticket:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    bus.queue.remove(ticket)
+                    bus.deferred += 1
+                    # 队首可能正是放弃的问询，唤醒后面的问询
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+            bus.queue.popleft()
+            bus.busy = True
+            bus.polls += 1
+            wait = bus.last_end + silence - self.clock()
+        if wait > 0:
+            self.sleep(wait)
+        return True
+
+    def release(self, key):
+        """释放总线"""
+        with self._cond:
+            bus = self._buses.get(key)
+            if bus is None:
+                return
+            bus.busy = False
+            bus.last_end = self.clock()
+            self._cond.notify_all()
+
+    def stats(self, key):
+        """获取总线统计，总线未使用时返回None"""
+        with self._cond:
+            bus = self._buses.get(key)
+            if bus is None:
+                return None
+            return {
+                "busy": bus.busy,
+                "waiting": len(bus.queue),
+                "max_waiting": bus.max_queue,
+                "polls": bus.polls,
+                "deferred": bus.deferred
+            }
@@ -0,0 +1,64 @@
+"""串口配置模块"""
+
+from app.config import Config
+
+# 常用波特率
+BAUDRATES = (1200, 2400, 4800, 9600, 14400, 19200, 38400, 57600, 115200, 230400, 460800, 921600)
+PARITIES = ('N', 'E', 'O')
+STOPBITS = (1, 1.5, 2)
+BYTESIZES = (5, 6, 7, 8)
+
+
+class SerialConfig:
+    """串口配置处理器"""
+
+    def normalize(self, config, base=None):
+        """校验串口配置并转换为统一格式，未指定的参数使用base（默认为默认串口配置）中的值
+
+        配置无效时抛出ValueError。
+        """
+        merged = dict(base or Config.DEFAULT_SERIAL_CONFIG)
+        merged.update({key: value for key, value in (config or {}).items() if value not in (None, "")})
+
+        port = str(merged.get("port") or "").strip()
+        if not port:
+            raise ValueError("未指定串口")
+        merged["port"] = port
+
+        try:
+            merged["baudrate"] = int(merged["baudrate"])
+        except (TypeError, ValueError):
+            raise ValueError("无效的波特率")
+        if merged["baudrate"] <= 0:
+            raise ValueError("无效的波特率")
+
+        merged["parity"] = str(merged.get("parity", "N")).upper()[:1]
+        if merged["parity"] not in PARITIES:
+            raise ValueError("校验位必须为N、E或O")
+
+        try:
+            stopbits = float(merged.get("stopbits", 1))
+            bytesize = int(merged.get("bytesize", 8))
+        except (TypeError, ValueError):
+            raise ValueError("无效的停止位或数据位")
+        if stopbits not in STOPBITS:
+            raise ValueError("停止位必须为1、1.5或2")
+        if bytesize not in BYTESIZES:
+            raise ValueError("数据位必须为5~8")
+        merged["stopbits"] = int(stopbits) if stopbits.is_integer() else stopbits
+        merged["bytesize"] = bytesize
+        return merged
+
+    def bits_per_char(self, config):
+        """每个字符在线路上占用的位数（起始位 + 数据位 + 校验位 + 停止位）"""
+        parity_bits = 0 if config.get("parity", "N") == "N" else 1
+        return 1 + int(config.get("bytesize", 8)) + parity_bits + float(config.get("stopbits", 1))
+
+    def char_time(self, config):
+        """单个字符的传输时间（秒）"""
+        return self.bits_per_char(config) / int(config.get("baudrate") or 9600)
+
+    def same_line(self, config, other):
+        """两个配置的线路参数（波特率、校验位、停止位、数据位）是否一致"""
+        keys = ("baudrate", "parity", "stopbits", "bytesize")
+        return all(config.get(key) == other.get(key) for key in keys)
@@ -0,0 +1,301 @@
+"""网关连接建立模块
+
+网关重启或断电时，阻塞的connect()会让HTTP请求线程或问询线程停顿到连接超时，
+而每个问询周期都重新连接又会不断向网关发送SYN。连接管理方式：
+- 非阻塞发起连接，之后每次只等待很短的时间检查连接是否完成，
+  超过连接超时仍未完成视为失败；
+- 连接失败后按带随机抖动的指数退避时间重连，退避期间直接跳过问询，
+  多个页面不会同时重连同一个网关；
+- 连接建立后开启TCP保活，网关掉电等半开连接在几十秒内即可发现。
+
+网关共享连接（LoRa网关流水线和Modbus-TCP）共用SharedConnection中的
+连接建立、接收线程和统计，只各自实现应答帧的匹配方式。
+"""
+
+import errno
+import logging
+import os
+import random
+import select
+import socket
+import threading
+import time
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# 非阻塞connect()正在进行中的错误码（Windows为WSAEWOULDBLOCK）
+_IN_PROGRESS = {0, errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY, 10035}
+
+STATE_DISCONNECTED = "disconnected"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED = "connected"
+
+
+def enable_keepalive(sock, idle=None, interval=None, count=None):
+    """开启TCP保活（平台不支持的参数忽略）"""
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    options = (
+        ("TCP_KEEPIDLE", idle or Config.TCP_KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", interval or Config.TCP_KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", count or Config.TCP_KEEPALIVE_COUNT)
+    )
+    for name, value in options:
+        if hasattr(socket, name):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+            except OSError:
+                pass
+
+
+class ReconnectBackoff:
+    """带随机抖动的指数退避"""
+
+    def __init__(self, base_delay=None, max_delay=None, clock=time.monotonic, rng=random.random):
+        """初始化（clock和rng可替换，便于测试）"""
+        self.base_delay = base_delay or Config.TCP_RECONNECT_BASE_DELAY
+        self.max_delay = max_delay or Config.TCP_RECONNECT_MAX_DELAY
+        self._clock = clock
+        self._rng = rng
+        self._lock = threading.Lock()
+        self.failures = 0  # 连续失败次数
+        self.retry_at = 0.0
+
+    def ready(self):
+        """是否可以尝试连接"""
+        with self._lock:
+            return self._clock() >= self.retry_at
+
+    def failure(self):
+        """连接失败，返回下一次重连前的等待时间（退避上限内取一半固定、一半随机）"""
+        with self._lock:
+            self.failures += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** (self.failures - 1)))
+            delay = delay / 2 + self._rng() * delay / 2
+            self.retry_at = self._clock() + delay
+            return delay
+
+    def success(self):
+        """连接成功，清除退避状态"""
+        with self._lock:
+            self.failures = 0
+            self.retry_at = 0.0
+
+    def retry_in(self):
+        """距离下一次可以重连的时间（秒）"""
+        with self._lock:
+            return max(0.0, self.retry_at - self._clock())
+
+
+class TcpLink:
+    """页面到网关的TCP连接：非阻塞建立，失败后按退避时间重连"""
+
+    def __init__(self, address, connect_timeout=None, backoff=None, clock=time.monotonic):
+        """初始化（调用connect()时才发起连接）"""
+        self.address = address
+        self.connect_timeout = connect_timeout or Config.GATEWAY_CONNECT_TIMEOUT
+        self.backoff = backoff or ReconnectBackoff(clock=clock)
+        self._clock = clock
+        self.sock = None
+        self.state = STATE_DISCONNECTED
+        self.error = None
+        self._started = 0.0
+
+    @property
+    def connected(self):
+        """连接是否已建立"""
+        return self.state == STATE_CONNECTED
+
+    def connect(self, wait=0.0):
+        """推进连接建立过程，最多等待wait秒，返回连接是否已建立
+
+        未连接且退避时间已到时发起非阻塞连接，正在连接时检查连接是否完成。
+        """
+        if self.state == STATE_CONNECTED:
+            return True
+        if self.state == STATE_DISCONNECTED:
+            if not self.backoff.ready():
+                return False
+            self._start()
+            if self.state != STATE_CONNECTING:
+                return False
+        return self._poll(wait)
+
+    def _start(self):
+        """发起非阻塞连接"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        error = sock.connect_ex(self.address)
+        if error not in _IN_PROGRESS:
+            sock.close()
+            self._failed(OSError(error, os.strerror(error)))
+            return
+        self.sock = sock
+        self.state = STATE_CONNECTING
+        self._started = self._clock()
+
+    def _poll(self, wait):
+        """等待连接完成（最多wait秒，不超过剩余的连接超时）"""
+        remaining = self._started + self.connect_timeout - self._clock()
+        _, writable, errored = select.select([], [self.sock], [self.sock], max(0.0, min(wait, remaining)))
+        if not writable and not errored:
+            if self._clock() - self._started >= self.connect_timeout:
+                self._failed(socket.timeout("连接超时"))
+            return False
+        error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        if error:
+            self._failed(OSError(error, os.strerror(error)))
+            return False
+        # 设置较短的超时，用于接收应答
+        self.sock.settimeout(0.5)
+        enable_keepalive(self.sock)
+        self.state = STATE_CONNECTED
+        self.error = None
+        self.backoff.success()
+        return True
+
+    def _failed(self, error):
+        """关闭连接并按退避时间安排重连"""
+        self.close()
+        self.error = str(error)
+        delay = self.backoff.failure()
+        logger.warning("连接网关 %s:%s 失败: %s，%.1f 秒后重连", self.address[0], self.address[1], self.error, delay)
+
+    def fail(self, error):
+        """连接上的收发出错：关闭连接，按退避时间重连"""
+        self._failed(error)
+
+    def close(self):
+        """关闭连接"""
+        sock, self.sock = self.sock, None
+        self.state = STATE_DISCONNECTED
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def stats(self):
+        """获取连接状态"""
+        return {
+            "state": self.state,
+            "failures": self.backoff.failures,
+            "retry_in": round(self.backoff.retry_in(), 3),
+            "error": self.error
+        }
+
+
+def open_link(address, connect_timeout, backoff):
+    """非阻塞建立网关共享连接，最多等待连接超时，返回套接字
+
+    退避期间抛出ConnectionRefusedError，连接失败时抛出ConnectionError并按退避时间重连。
+    """
+    if not backoff.ready():
+        raise ConnectionRefusedError(f"网关连接失败，{backoff.retry_in():.1f} 秒后重连")
+    link = TcpLink(address, connect_timeout, backoff=backoff)
+    while not link.connect(connect_timeout):
+        if link.state != STATE_CONNECTING:
+            raise ConnectionError(f"连接网关 {address[0]}:{address[1]} 失败: {link.error}")
+    return link.sock
+
+
+class SharedConnection:
+    """网关共享连接的公共部分：非阻塞建立连接、退避重连、接收线程和统计
+
+    子类提供_pending（在途请求）和_match(buffer)（从缓冲区头部切出应答帧交给
+    对应的请求，调用方持有_lock）。
+    """
+
+    def __init__(self, address, window, connect_timeout=None):
+        """初始化（首次问询时建立连接）"""
+        self.address = address
+        self.window = window
+        self.connect_timeout = connect_timeout or Config.GATEWAY_CONNECT_TIMEOUT
+        self._slots = threading.BoundedSemaphore(self.window)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._connect_lock = threading.Lock()
+        self._pending = None
+        self._sock = None
+        self._closed = False
+        self.backoff = ReconnectBackoff()
+        self.sent = 0
+        self.answered = 0
+        self.timeouts = 0
+        self.discarded = 0
+
+    def _ensure_connected(self):
+        """获取连接，未连接时建立连接并启动接收线程
+
+        在锁外建立连接，连接期间stats()等不会等待连接超时；
+        同时只有一个线程发起连接，其他线程等待其结果。
+        """
+        with self._lock:
+            if self._sock is not None:
+                return self._sock
+        with self._connect_lock:
+            with self._lock:
+                if self._sock is not None:
+                    return self._sock
+            # 连接失败后按退避时间重连，退避期间直接放弃本次问询
+            sock = open_link(self.address, self.connect_timeout, self.backoff)
+            with self._lock:
+                self._sock = sock
+            threading.Thread(target=self._read_loop, args=(sock,), daemon=True).start()
+            return sock
+
+    def _read_loop(self, sock):
+        """接收线程：读取数据并匹配在途请求"""
+        buffer = bytearray()
+        while not self._closed:
+            try:
+                chunk = sock.recv(1024)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not chunk:
+                break
+            buffer += chunk
+            with self._lock:
+                self._match(buffer)
+        with self._lock:
+            if self._sock is sock:
+                self._sock = None
+        try:
+            sock.close()
+        except OSError:
+            pass
+
+    def _match(self, buffer):
+        """从缓冲区头部切出应答帧交给对应的请求（由子类实现，调用方需持有锁）"""
+        raise NotImplementedError
+
+    def close_socket(self, sock=None):
+        """关闭当前连接（下次问询时重新连接）"""
+        with self._lock:
+            if sock is None or self._sock is sock:
+                sock, self._sock = self._sock, None
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def close(self):
+        """关闭共享连接"""
+        self._closed = True
+        self.close_socket()
+
+    def stats(self):
+        """获取连接统计"""
+        with self._lock:
+            return {
+                "window": self.window,
+                "connected": self._sock is not None,
+                "in_flight": len(self._pending),
+                "sent": self.sent,
+                "answered": self.answered,
+                "timeouts": self.timeouts,
+                "discarded_bytes": self.discarded
+            }
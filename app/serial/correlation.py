@@ -0,0 +1,174 @@
+"""问询/应答关联模块
+
+持久TCP连接上，超过等待时间才到达的应答会留在套接字缓冲区中，被当作下一次
+问询的应答读取，表现为地址不匹配或CRC错误。每次问询记录预期应答的特征
+（LoRa地址前缀、从机地址、功能码、有效字节数和应答长度），接收时只接受与之
+吻合的应答帧：
+- 发送问询前先读出连接中已到达的数据，属于上一次超时问询的迟到应答计入
+  迟到统计，其余数据丢弃；
+- 接收过程中与本次问询不符的数据按迟到应答或干扰数据处理，逐字节重新同步，
+  不需要重置连接。
+"""
+
+import logging
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseTag:
+    """问询的预期应答特征"""
+
+    def __init__(self, prefix, slave, function, expected_length, byte_count=None):
+        self.prefix = prefix
+        self.slave = slave
+        self.function = function
+        self.expected_length = expected_length
+        self.byte_count = byte_count  # 读寄存器应答的有效字节数，None表示不检查
+
+    @classmethod
+    def from_query(cls, query, expected_length, prefix_len=0):
+        """根据问询帧构造预期应答特征，不是Modbus-RTU问询帧时返回None"""
+        query = bytes(query)
+        if len(query) < prefix_len + 4:
+            return None
+        slave, function = query[prefix_len], query[prefix_len + 1]
+        byte_count = None
+        if function in (0x03, 0x04) and len(query) == prefix_len + 8:
+            byte_count = 2 * ((query[prefix_len + 4] << 8) | query[prefix_len + 5])
+        return cls(query[:prefix_len], slave, function, expected_length, byte_count)
+
+    def match(self, buffer):
+        """判断缓冲区头部是否为预期的应答帧
+
+        返回应答帧长度；数据不足以判断或应答帧未收齐时返回0；不匹配时返回-1。
+        """
+        header = self.prefix + bytes([self.slave])
+        if len(buffer) <= len(header):
+            return 0 if header.startswith(bytes(buffer)) else -1
+        if buffer[:len(header)] != header:
+            return -1
+        function = buffer[len(header)]
+        if function == self.function:
+            if self.byte_count is not None and len(buffer) > len(header) + 1 and buffer[len(header) + 1] != self.byte_count:
+                return -1
+            length = self.expected_length
+        elif function == self.function | 0x80:
+            # Modbus异常应答: 从机地址 + 功能码 + 异常码 + CRC
+            length = len(self.prefix) + 5
+        else:
+            return -1
+        return length if len(buffer) >= length else 0
+
+
+class SocketSession:
+    """页面TCP连接上的停等问询：接收缓冲区和上一次超时问询的预期应答"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.late_tag = None  # 上一次未收齐应答的问询
+        self.answered = 0
+        self.late = 0
+        self.discarded = 0
+
+    def drain(self, sock):
+        """发送问询前读出连接中已到达的数据：迟到应答计入统计，其余丢弃"""
+        original_timeout = sock.gettimeout()
+        sock.settimeout(0)
+        try:
+            while True:
+                chunk = sock.recv(4096)
+                if not chunk:
+                    raise ConnectionResetError("TCP服务器已关闭连接")
+                self.buffer += chunk
+        except (BlockingIOError, socket.timeout):
+            pass
+        finally:
+            sock.settimeout(original_timeout)
+
+        while self.buffer:
+            if not self._take_late():
+                del self.buffer[0]
+                self.discarded += 1
+        self.late_tag = None
+
+    def _take_late(self):
+        """缓冲区头部是上一次超时问询的完整应答时将其移除"""
+        if self.late_tag is None:
+            return False
+        length = self.late_tag.match(self.buffer)
+        if length <= 0:
+            return False
+        del self.buffer[:length]
+        self.late += 1
+        self.late_tag = None
+        logger.info("丢弃上一次问询的迟到应答，长度: %d 字节", length)
+        return True
+
+    def _extract(self, tag):
+        """从缓冲区切出本次问询的应答帧，未收齐时返回None"""
+        while self.buffer:
+            length = tag.match(self.buffer)
+            if length > 0:
+                frame = bytes(self.buffer[:length])
+                del self.buffer[:length]
+                return frame
+            if length == 0:
+                return None
+            if self._take_late():
+                continue
+            if self.late_tag is not None and self.late_tag.match(self.buffer) == 0:
+                # 可能是未收齐的迟到应答，等待更多数据
+                return None
+            del self.buffer[0]
+            self.discarded += 1
+        return None
+
+    def receive(self, sock, tag, expected_length, timeout):
+        """在timeout秒内接收应答帧，返回(应答数据, 耗时)
+
+        tag为None（非Modbus-RTU的自定义问询帧）时收到expected_length字节即停止。
+        超时未收齐时，已收到的数据留在缓冲区中，下次发送前按迟到应答处理。
+        """
+        original_timeout = sock.gettimeout()
+        start_time = time.monotonic()
+        deadline = start_time + timeout
+        try:
+            while True:
+                if tag is None:
+                    if len(self.buffer) >= expected_length:
+                        frame = bytes(self.buffer)
+                        self.buffer.clear()
+                        self.answered += 1
+                        return frame, time.monotonic() - start_time
+                else:
+                    frame = self._extract(tag)
+                    if frame is not None:
+                        self.answered += 1
+                        return frame, time.monotonic() - start_time
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                sock.settimeout(remaining)
+                try:
+                    chunk = sock.recv(1024)
+                except socket.timeout:
+                    break
+                if not chunk:
+                    raise ConnectionResetError("TCP服务器已关闭连接")
+                self.buffer += chunk
+        finally:
+            sock.settimeout(original_timeout)
+
+        # 超时：返回已收到的部分数据，本次问询的应答之后到达时按迟到应答处理
+        self.late_tag = tag
+        return bytes(self.buffer), time.monotonic() - start_time
+
+    def stats(self):
+        """获取关联统计"""
+        return {
+            "answered": self.answered,
+            "late_responses": self.late,
+            "discarded_bytes": self.discarded
+        }
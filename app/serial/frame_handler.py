@@ -0,0 +1,163 @@
+"""帧数据处理模块
+
+问询线程只保存问询帧和应答帧的原始字节及元数据，十六进制字符串、显示时间和
+IP封装说明在读取帧数据接口时才生成：大多数问询周期没有页面读取帧数据，
+格式化不再占用问询线程。
+
+帧数据历史记录为固定容量的环形缓冲区，按条数和原始字节总数双重限制，
+长时间运行不会持续增长；每帧带有递增序号，页面可以只获取指定序号之后的新帧。
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from app.config import Config
+
+
+def format_hex(data):
+    """字节数据格式化为空格分隔的大写十六进制字符串"""
+    return bytes(data).hex(' ').upper()
+
+
+def _render_value(value):
+    """最新帧为原始字节时格式化为十六进制，其他说明文字原样返回"""
+    return format_hex(value) if isinstance(value, (bytes, bytearray)) else value
+
+
+class FrameRecord:
+    """帧数据历史记录中的一帧（原始字节和元数据）"""
+
+    __slots__ = ("seq", "direction", "type", "timestamp", "data", "prefix_len", "channel",
+                 "tcp_server_ip", "tcp_server_port", "local_address")
+
+    def __init__(self, direction, frame_type, timestamp, data, prefix_len, channel,
+                 tcp_server_ip=None, tcp_server_port=None, local_address=None):
+        self.seq = 0  # 加入历史记录时分配的序号
+        self.direction = direction
+        self.type = frame_type
+        self.timestamp = timestamp
+        self.data = data
+        self.prefix_len = prefix_len  # LoRa目标地址前缀长度
+        self.channel = channel
+        self.tcp_server_ip = tcp_server_ip
+        self.tcp_server_port = tcp_server_port
+        self.local_address = local_address
+
+    def render(self):
+        """转换为帧数据接口返回的格式"""
+        tcp = self.channel == "tcp"
+        return {
+            "seq": self.seq,
+            "direction": self.direction,
+            "type": self.type,
+            "timestamp": datetime.fromtimestamp(self.timestamp).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            "length": len(self.data),
+            "data": format_hex(self.data),
+            "data_frame": format_hex(self.data[self.prefix_len:]) if self.prefix_len else "",
+            "ip": self.tcp_server_ip if tcp else None,
+            "port": self.tcp_server_port if tcp else None,
+            "ip_frame": self._ip_frame()
+        }
+
+    def _ip_frame(self):
+        """TCP通讯的IP封装说明，串口通讯返回空字符串"""
+        if self.channel != "tcp" or not self.tcp_server_ip:
+            return ""
+        local = f"{self.local_address[0]}:{self.local_address[1]}" if self.local_address else "本地"
+        remote = f"{self.tcp_server_ip}:{self.tcp_server_port}"
+        return f"TCP {local} -> {remote}" if self.direction == "send" else f"TCP {remote} -> {local}"
+
+
+class FrameHistory:
+    """页面的帧数据历史记录：按条数和字节总数限制的环形缓冲区"""
+
+    def __init__(self, capacity=None, max_bytes=None):
+        self.capacity = capacity or Config.FRAME_HISTORY_SIZE
+        self.max_bytes = max_bytes or Config.FRAME_HISTORY_MAX_BYTES
+        self._frames = deque(maxlen=self.capacity)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.last_seq = 0  # 最近一帧的序号，清空后继续递增
+
+    def append(self, frame):
+        """加入一帧，超过条数或字节数上限时丢弃最早的帧"""
+        with self._lock:
+            self.last_seq += 1
+            frame.seq = self.last_seq
+            if len(self._frames) == self.capacity:
+                self._bytes -= len(self._frames[0].data)
+            self._frames.append(frame)
+            self._bytes += len(frame.data)
+            while self._bytes > self.max_bytes and len(self._frames) > 1:
+                self._bytes -= len(self._frames.popleft().data)
+
+    def since(self, seq=0):
+        """获取序号大于seq的帧
+
+        seq大于当前最后一帧的序号时（如采集进程重启后序号重新计数），
+        返回全部历史记录，页面按返回的序号重新同步。
+        """
+        with self._lock:
+            if seq > self.last_seq:
+                return list(self._frames)
+            if seq == self.last_seq:
+                return []
+            return [frame for frame in self._frames if frame.seq > seq]
+
+    def clear(self):
+        """清空历史记录（序号不重置，按序号增量获取的页面不会漏帧）"""
+        with self._lock:
+            self._frames.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        """历史记录中帧数据的字节总数"""
+        return self._bytes
+
+    def __len__(self):
+        return len(self._frames)
+
+
+def render_frame_data(frame_data, since=0):
+    """将页面保存的帧数据转换为帧数据接口返回的格式
+
+    since为页面已获取的最后一帧序号，只返回之后的新帧；
+    seq为当前最后一帧的序号，供页面下次增量获取。
+    """
+    history = frame_data.get("frames")
+    rendered = dict(frame_data)
+    rendered["query"] = _render_value(frame_data.get("query", ""))
+    rendered["response"] = _render_value(frame_data.get("response", ""))
+    rendered["frames"] = [frame.render() for frame in history.since(since)] if history is not None else []
+    rendered["seq"] = history.last_seq if history is not None else 0
+    return rendered
+
+
+class FrameHandler:
+    """帧数据处理器"""
+
+    def save_frame_data(self, serial_service, page, channel, query, response, network_type, target_address,
+                        target_bytes, timestamp, tcp_server_ip=None, tcp_server_port=None, local_address=None):
+        """保存一次问询的问询帧和应答帧，供页面显示最新帧和帧数据历史记录
+
+        channel为"tcp"或"serial"；target_bytes为LoRa目标地址前缀，
+        有前缀时历史记录中单独显示去掉前缀的Modbus数据帧。
+        """
+        page_config = serial_service.get_page(page)
+        frame_data = page_config.setdefault("frame_data", {"query": "", "response": "", "frames": FrameHistory()})
+        query = bytes(query)
+        response = bytes(response)
+        frame_data["query"] = query
+        frame_data["response"] = response
+        frame_data["target_address"] = target_address
+        frame_data["network_type"] = network_type
+
+        prefix_len = len(target_bytes or b"")
+        history = frame_data.get("frames")
+        if history is None:
+            history = frame_data["frames"] = FrameHistory()
+        for direction, frame_type, data in (("send", "query", query), ("recv", "response", response)):
+            if data:
+                history.append(FrameRecord(direction, frame_type, timestamp, data, prefix_len, channel,
+                                           tcp_server_ip, tcp_server_port, local_address))
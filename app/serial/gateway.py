@@ -0,0 +1,150 @@
+"""网关共享连接模块
+
+在途窗口大于1时，同一网关上的所有页面共用一个TCP连接：发往不同LoRa地址的
+问询帧可以连续发出，不必等待上一个应答。接收线程按LoRa地址前缀和
+Modbus从机地址/功能码把应答帧匹配到对应的在途请求，每个请求有独立的超时。
+一轮问询N个节点的耗时由各节点往返时延之和降为接近其中的最大值。
+"""
+
+import threading
+import time
+from app.config import Config
+from app.serial.connector import SharedConnection
+from app.serial.correlation import ResponseTag
+
+
+class _Request(ResponseTag):
+    """在途请求"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.response = b""
+        self.event = threading.Event()
+
+
+class GatewayConnection(SharedConnection):
+    """单个网关的共享连接"""
+
+    def __init__(self, address, window=None, connect_timeout=None):
+        """初始化（首次问询时建立连接）"""
+        super().__init__(address, window or Config.GATEWAY_WINDOW, connect_timeout)
+        self._cond = threading.Condition(self._lock)
+        self._pending = []  # 按发送顺序排列的在途请求
+        self._busy = set()  # 有在途请求的(LoRa地址, 从机地址)
+
+    def _match(self, buffer):
+        """从缓冲区头部切出应答帧交给对应的请求（调用方需持有锁）"""
+        while buffer:
+            matched = False
+            need_more = False
+            for request in self._pending:
+                length = request.match(buffer)
+                if length == 0:
+                    # 数据不足以判断或应答帧未收齐，等待更多数据
+                    need_more = True
+                    continue
+                if length < 0:
+                    continue
+                request.response = bytes(buffer[:length])
+                del buffer[:length]
+                self._pending.remove(request)
+                self.answered += 1
+                request.event.set()
+                matched = True
+                break
+            if matched:
+                continue
+            if need_more:
+                return
+            # 无法匹配任何在途请求（迟到的应答或干扰数据），丢弃一个字节重新同步
+            del buffer[0]
+            self.discarded += 1
+
+    def transact(self, query, expected_length, timeout, prefix_len=0, max_wait=None):
+        """发送问询帧并等待匹配的应答帧，返回(应答数据, 耗时)
+
+        同一LoRa地址和从机地址同时只能有一个在途请求；
+        等待在途窗口超过max_wait秒仍未能发送时返回(None, 0)。
+        """
+        request = _Request.from_query(query, expected_length, prefix_len)
+        if request is None:
+            raise ValueError("问询帧长度不足，无法匹配应答帧")
+        key = (request.prefix, request.slave)
+        deadline = time.monotonic() + (Config.LORA_MAX_WAIT if max_wait is None else max_wait)
+        with self._cond:
+            while key in self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None, 0.0
+                self._cond.wait(remaining)
+            self._busy.add(key)
+        try:
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return None, 0.0
+            try:
+                sock = self._ensure_connected()
+                with self._cond:
+                    self._pending.append(request)
+                start_time = time.monotonic()
+                try:
+                    with self._send_lock:
+                        sock.sendall(query)
+                except OSError:
+                    with self._cond:
+                        self._pending.remove(request)
+                    self.close_socket(sock)
+                    raise
+                self.sent += 1
+                if not request.event.wait(timeout):
+                    with self._cond:
+                        if request in self._pending:
+                            self._pending.remove(request)
+                            self.timeouts += 1
+                return request.response, time.monotonic() - start_time
+            finally:
+                self._slots.release()
+        finally:
+            with self._cond:
+                self._busy.discard(key)
+                self._cond.notify_all()
+
+
+class GatewayPool:
+    """按网关地址管理共享连接"""
+
+    def __init__(self, factory=GatewayConnection):
+        """初始化（factory为连接类，Modbus-TCP网关使用MbapConnection）"""
+        self.factory = factory
+        self._connections = {}
+        self._users = {}  # 网关地址 -> 使用共享连接的页面
+        self._lock = threading.Lock()
+
+    def get(self, ip, port, page=None):
+        """获取网关的共享连接（page为使用连接的页面，关闭页面时释放）"""
+        with self._lock:
+            connection = self._connections.get((ip, port))
+            if connection is None:
+                connection = self._connections[(ip, port)] = self.factory((ip, port))
+            if page is not None:
+                self._users.setdefault((ip, port), set()).add(page)
+            return connection
+
+    def stats(self, ip, port):
+        """获取网关共享连接的统计，未使用共享连接时返回None"""
+        connection = self._connections.get((ip, port))
+        return connection.stats() if connection else None
+
+    def release(self, page):
+        """页面不再使用共享连接，关闭不再被任何页面使用的网关连接
+
+        连接出错或退避期间页面仍然打开，按页面是否关闭而不是连接状态判断是否仍在使用。
+        """
+        with self._lock:
+            for users in self._users.values():
+                users.discard(page)
+            unused = [address for address in self._connections if not self._users.get(address)]
+            connections = [self._connections.pop(address) for address in unused]
+            for address in unused:
+                self._users.pop(address, None)
+        for connection in connections:
+            connection.close()
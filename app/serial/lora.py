@@ -0,0 +1,157 @@
+"""LoRa空口调度模块
+
+所有页面通过同一个LoRa网关问询各自的节点，同时发出的问询会在空中冲突，
+网关只能串行处理或直接丢弃。本模块按网关对问询进行错开：
+- 同一网关同时在途的问询数不超过在途窗口（默认为1，即停等），相邻问询之间保留保护间隔；
+- 按配置的扩频因子和带宽估算问询帧与应答帧的空中时间；
+- 在滑动窗口内执行占空比预算，预算不足时推迟或跳过本次问询。
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from app.config import Config
+
+
+def airtime(payload_len, sf=None, bandwidth=None, coding_rate=None, preamble=None,
+            explicit_header=True, crc=True):
+    """按Semtech SX127x公式估算LoRa帧的空中时间（秒）"""
+    sf = sf or Config.LORA_SPREADING_FACTOR
+    bandwidth = bandwidth or Config.LORA_BANDWIDTH
+    coding_rate = coding_rate or Config.LORA_CODING_RATE
+    preamble = Config.LORA_PREAMBLE_SYMBOLS if preamble is None else preamble
+    symbol_time = (2 ** sf) / bandwidth
+    # 符号时间超过16ms时强制开启低速率优化
+    low_rate = 1 if symbol_time > 0.016 else 0
+    header = 0 if explicit_header else 1
+    numerator = 8 * payload_len - 4 * sf + 28 + 16 * int(crc) - 20 * header
+    payload_symbols = 8 + max(math.ceil(numerator / (4 * (sf - 2 * low_rate))) * (coding_rate + 4), 0)
+    return (preamble + 4.25 + payload_symbols) * symbol_time
+
+
+class _Channel:
+    """单个网关的空口状态"""
+
+    def __init__(self, window):
+        # 同时在空中的问询数不超过网关在途窗口
+        self.lock = threading.BoundedSemaphore(window)
+        self.mutex = threading.Lock()  # 保护以下统计和预约状态
+        self.history = deque()  # (开始时间, 空中时间)
+        self.used = 0.0  # 窗口内已使用的空中时间
+        self.last_end = 0.0  # 上一次问询结束时间
+        self.send_end = 0.0  # 上一次问询帧发送完毕的时间
+        self.polls = 0
+        self.deferred = 0
+        self.wait_total = 0.0
+
+    def expire(self, now, window):
+        """移除滑动窗口之外的记录"""
+        while self.history and self.history[0][0] <= now - window:
+            self.used -= self.history.popleft()[1]
+        if not self.history:
+            self.used = 0.0
+
+    def wait_time(self, now, cost, budget, window, guard):
+        """计算满足保护间隔和占空比预算还需等待的时间"""
+        wait = max(0.0, max(self.last_end, self.send_end) + guard - now)
+        if cost > budget:
+            return math.inf
+        excess = self.used + cost - budget
+        if excess > 0:
+            # 等到足够多的旧记录移出窗口
+            for start, spent in self.history:
+                excess -= spent
+                if excess <= 0:
+                    wait = max(wait, start + window - now)
+                    break
+        return wait
+
+
+class AirtimeScheduler:
+    """按网关错开LoRa问询并执行占空比预算"""
+
+    def __init__(self, duty_cycle=None, window=None, guard=None, in_flight=None, clock=time.monotonic, sleep=time.sleep):
+        """初始化调度器（in_flight为每个网关同时在途的问询数）"""
+        self.duty_cycle = duty_cycle or Config.LORA_DUTY_CYCLE
+        self.window = window or Config.LORA_DUTY_CYCLE_WINDOW
+        self.guard = Config.LORA_GUARD_TIME if guard is None else guard
+        self.in_flight = in_flight or Config.GATEWAY_WINDOW
+        self._clock = clock
+        self._sleep = sleep
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    @property
+    def budget(self):
+        """滑动窗口内允许的空中时间（秒）"""
+        return self.duty_cycle * self.window
+
+    def _channel(self, gateway):
+        """获取网关的空口状态"""
+        with self._lock:
+            channel = self._channels.get(gateway)
+            if channel is None:
+                channel = self._channels[gateway] = _Channel(self.in_flight)
+            return channel
+
+    def cost(self, query_len, response_len):
+        """一次问询/应答的空中时间"""
+        return airtime(query_len) + airtime(response_len)
+
+    def acquire(self, gateway, query_len, response_len, max_wait=None):
+        """占用网关空口，需要等待超过max_wait秒时放弃并返回False"""
+        max_wait = Config.LORA_MAX_WAIT if max_wait is None else max_wait
+        cost = self.cost(query_len, response_len)
+        channel = self._channel(gateway)
+        start = self._clock()
+        if not channel.lock.acquire(timeout=max_wait):
+            channel.deferred += 1
+            return False
+        with channel.mutex:
+            now = self._clock()
+            channel.expire(now, self.window)
+            wait = channel.wait_time(now, cost, self.budget, self.window, self.guard)
+            if now + wait - start > max_wait:
+                channel.deferred += 1
+                channel.lock.release()
+                return False
+            # 预约发送时间，在途窗口大于1时下一个问询帧在本问询帧发送完毕并经过保护间隔后发出
+            send_at = now + wait
+            channel.send_end = send_at + airtime(query_len)
+            channel.history.append((send_at, cost))
+            channel.used += cost
+            channel.polls += 1
+            channel.wait_total += send_at - start
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+    def release(self, gateway):
+        """释放网关空口"""
+        channel = self._channel(gateway)
+        with channel.mutex:
+            channel.last_end = self._clock()
+        channel.lock.release()
+
+    def min_interval(self, nodes):
+        """在占空比预算内轮询所有节点一次所需的最小问询周期（秒）
+
+        nodes为各节点的(问询帧字节数, 应答帧字节数)列表。
+        """
+        return sum(self.cost(query_len, response_len) for query_len, response_len in nodes) / self.duty_cycle
+
+    def stats(self, gateway):
+        """获取网关的空口统计"""
+        channel = self._channel(gateway)
+        since = self._clock() - self.window
+        with channel.mutex:
+            used = sum(spent for start, spent in channel.history if start > since)
+        return {
+            "airtime_used": round(used, 4),
+            "airtime_budget": round(self.budget, 4),
+            "utilization": round(used / self.budget, 4) if self.budget else 0,
+            "polls": channel.polls,
+            "deferred": channel.deferred,
+            "wait_total": round(channel.wait_total, 4)
+        }
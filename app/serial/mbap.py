@@ -0,0 +1,118 @@
+"""Modbus-TCP（MBAP）传输模块
+
+支持原生Modbus-TCP的网关（通常为502端口）不需要RTU帧的CRC，而是在PDU前加
+7字节MBAP报文头：事务标识(2) + 协议标识(2, 固定为0) + 长度(2) + 单元标识(1)。
+同一连接上可以同时有多个在途请求，应答按事务标识匹配，局域网内的多个设备
+可以并发问询。
+
+问询计划中的帧仍为RTU格式：发送时去掉从机地址和CRC作为PDU，
+应答的PDU重新加上从机地址和CRC，原有的解析函数无需改动。
+"""
+
+import struct
+import threading
+import time
+from app.config import Config
+from app.serial.connector import SharedConnection
+from app.modbus import calculate_crc
+
+MBAP_HEADER_SIZE = 7
+MBAP_PROTOCOL_ID = 0
+
+
+def rtu_to_pdu(frame):
+    """RTU帧转换为(单元标识, PDU)"""
+    return frame[0], bytes(frame[1:-2])
+
+
+def pdu_to_rtu(unit_id, pdu):
+    """(单元标识, PDU)转换为带CRC的RTU帧"""
+    frame = bytes([unit_id]) + pdu
+    crc = calculate_crc(frame)
+    return frame + bytes([crc & 0xFF, (crc >> 8) & 0xFF])
+
+
+def build_mbap_request(transaction_id, unit_id, pdu):
+    """构建MBAP请求报文"""
+    return struct.pack('>HHHB', transaction_id, MBAP_PROTOCOL_ID, len(pdu) + 1, unit_id) + pdu
+
+
+class _Request:
+    """在途请求"""
+
+    def __init__(self, unit_id):
+        self.unit_id = unit_id
+        self.pdu = b""
+        self.event = threading.Event()
+
+
+class MbapConnection(SharedConnection):
+    """单个Modbus-TCP网关的共享连接"""
+
+    def __init__(self, address, window=None, connect_timeout=None):
+        """初始化（首次问询时建立连接）"""
+        super().__init__(address, window or Config.MBAP_WINDOW, connect_timeout)
+        self._pending = {}  # 事务标识 -> 在途请求
+        self._next_id = 0
+
+    def _match(self, buffer):
+        """从缓冲区头部切出完整报文交给对应的请求（调用方需持有锁）"""
+        while len(buffer) >= MBAP_HEADER_SIZE:
+            transaction_id, protocol_id, length, unit_id = struct.unpack_from('>HHHB', buffer)
+            if protocol_id != MBAP_PROTOCOL_ID or length < 2:
+                # 报文头无效，丢弃一个字节重新同步
+                del buffer[0]
+                self.discarded += 1
+                continue
+            size = 6 + length
+            if len(buffer) < size:
+                return
+            pdu = bytes(buffer[MBAP_HEADER_SIZE:size])
+            del buffer[:size]
+            request = self._pending.get(transaction_id)
+            if request is None or request.unit_id != unit_id:
+                # 已超时的请求的迟到应答
+                self.discarded += size
+                continue
+            del self._pending[transaction_id]
+            request.pdu = pdu
+            self.answered += 1
+            request.event.set()
+
+    def _allocate(self, request):
+        """分配未被在途请求占用的事务标识（调用方需持有锁）"""
+        while True:
+            self._next_id = (self._next_id + 1) & 0xFFFF
+            if self._next_id not in self._pending:
+                self._pending[self._next_id] = request
+                return self._next_id
+
+    def transact(self, unit_id, pdu, timeout, max_wait=None):
+        """发送请求并等待事务标识匹配的应答，返回(应答PDU, 耗时)
+
+        等待在途窗口超过max_wait秒仍未能发送时返回(None, 0)。
+        """
+        if not self._slots.acquire(timeout=Config.LORA_MAX_WAIT if max_wait is None else max_wait):
+            return None, 0.0
+        try:
+            sock = self._ensure_connected()
+            request = _Request(unit_id)
+            with self._lock:
+                transaction_id = self._allocate(request)
+            start_time = time.monotonic()
+            try:
+                with self._send_lock:
+                    sock.sendall(build_mbap_request(transaction_id, unit_id, pdu))
+            except OSError:
+                with self._lock:
+                    self._pending.pop(transaction_id, None)
+                self.close_socket(sock)
+                raise
+            self.sent += 1
+            if not request.event.wait(timeout):
+                with self._lock:
+                    if self._pending.pop(transaction_id, None) is not None:
+                        self.timeouts += 1
+            return request.pdu, time.monotonic() - start_time
+        finally:
+            self._slots.release()
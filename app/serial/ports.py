@@ -0,0 +1,132 @@
+"""串口清单缓存模块
+
+枚举串口（serial.tools.list_ports.comports）需要遍历sysfs，在边缘网关上较慢，
+而页面加载和打开配置面板时都会获取串口列表。串口清单缓存在内存中：
+- 缓存超过有效期，或设备目录（/dev）的修改时间改变（插拔USB转换器时
+  内核增删设备节点）时重新枚举，检查修改时间只需一次stat；
+- 已有缓存时在后台线程中重新枚举，请求直接返回当前缓存，不等待枚举；
+- 每个串口附带VID/PID、序列号等信息，USB串口的稳定标识（VID:PID:序列号）
+  在重启或重新插拔后设备名称改变时仍可找到同一个转换器。
+"""
+
+import logging
+import os
+import threading
+import time
+from app.config import Config
+
+try:
+    from serial.tools import list_ports
+except ImportError:
+    list_ports = None
+
+logger = logging.getLogger(__name__)
+
+
+def _list_ports():
+    """枚举系统串口"""
+    return list_ports.comports() if list_ports is not None else []
+
+
+def port_info(port):
+    """串口信息转换为字典（包含USB设备的VID/PID和序列号）"""
+    vid = getattr(port, "vid", None)
+    pid = getattr(port, "pid", None)
+    serial_number = getattr(port, "serial_number", None)
+    return {
+        "device": port.device,
+        "description": port.description,
+        "hwid": port.hwid,
+        "vid": f"{vid:04X}" if vid is not None else None,
+        "pid": f"{pid:04X}" if pid is not None else None,
+        "serial_number": serial_number,
+        "manufacturer": getattr(port, "manufacturer", None),
+        "product": getattr(port, "product", None),
+        "location": getattr(port, "location", None),
+        "stable_id": f"{vid:04X}:{pid:04X}:{serial_number or ''}" if vid is not None and pid is not None else None
+    }
+
+
+class PortInventory:
+    """串口清单缓存"""
+
+    def __init__(self, ttl=None, lister=_list_ports, watch_path="/dev", clock=time.monotonic):
+        """初始化（lister、watch_path和clock可替换，便于测试）"""
+        self.ttl = Config.SERIAL_PORTS_TTL if ttl is None else ttl
+        self.lister = lister
+        self.watch_path = watch_path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._ports = None
+        self._loaded_at = 0.0
+        self._watch_mtime = None
+        self._refreshing = False
+        self.version = 0  # 串口清单每次发生变化时加1
+        self.scans = 0
+
+    def _watch_stamp(self):
+        """设备目录的修改时间，目录不存在（非Linux平台）时返回None"""
+        if not self.watch_path:
+            return None
+        try:
+            return os.stat(self.watch_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _stale(self):
+        """缓存是否需要重新枚举（调用方需持有锁）"""
+        if self._ports is None or self.clock() - self._loaded_at >= self.ttl:
+            return True
+        return self._watch_stamp() != self._watch_mtime
+
+    def refresh(self):
+        """立即重新枚举串口，返回串口列表"""
+        stamp = self._watch_stamp()
+        try:
+            ports = sorted((port_info(port) for port in self.lister()), key=lambda port: port["device"])
+        except Exception:
+            with self._lock:
+                self._refreshing = False
+            raise
+        with self._lock:
+            self._refreshing = False
+            self.scans += 1
+            if ports != self._ports:
+                if self._ports is not None:
+                    added = {port["device"] for port in ports} - {port["device"] for port in self._ports}
+                    removed = {port["device"] for port in self._ports} - {port["device"] for port in ports}
+                    logger.info("串口清单已变化: 新增=%s, 移除=%s", sorted(added), sorted(removed))
+                self.version += 1
+            self._ports = ports
+            self._loaded_at = self.clock()
+            self._watch_mtime = stamp
+            return list(ports)
+
+    def ports(self, refresh=False):
+        """获取串口列表，缓存过期时在后台重新枚举（没有缓存或refresh为True时同步枚举）"""
+        with self._lock:
+            if self._ports is not None and not refresh:
+                if self._stale() and not self._refreshing:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_quietly, daemon=True).start()
+                return list(self._ports)
+        return self.refresh()
+
+    def _refresh_quietly(self):
+        """后台重新枚举，失败时保留之前的缓存"""
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning("枚举串口失败: %s", e)
+
+    def resolve(self, port):
+        """将USB串口的稳定标识（VID:PID:序列号）转换为当前的设备名称，其他名称原样返回
+
+        打开串口不频繁，且转换器可能刚刚重新插拔，因此同步重新枚举。
+        """
+        if port.count(":") != 2:
+            return port
+        for info in self.refresh():
+            if info["stable_id"] == port:
+                return info["device"]
+        return port
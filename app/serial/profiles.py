@@ -0,0 +1,190 @@
+"""设备问询配置模块
+
+每种设备类型对应一个DeviceProfile：解析函数实际用到的寄存器、解析函数和
+解析结果写入页面数据的方式。所需寄存器按合并读取规则转换为最少的03功能码读取。
+页面的问询计划（每次读取的完整问询帧 = LoRa地址前缀 + Modbus帧 + CRC、
+预期应答长度、地址前缀）在注册设备时构建并缓存在页面配置中，
+只有设备类型、网络类型、目标地址、从机地址或自定义问询帧改变时才重新构建，
+周期问询时不再重复组帧和计算CRC；解析函数前有按应答帧字节缓存的LRU，
+应答帧与之前相同时不再重复解析。
+"""
+
+import logging
+from app.config import Config
+from app.modbus import ParseCache, build_modbus_query, parse_light_gas_response, parse_temperature_response, parse_vibration_response
+from app.readings import ReadingSchema
+from app.serial.registers import plan_reads
+
+logger = logging.getLogger(__name__)
+
+LORA_ADDRESS_SIZE = 2
+
+
+class DeviceProfile:
+    """设备类型的问询配置"""
+
+    def __init__(self, device_type, name, registers, decoder, fields,
+                 min_length=0, fallback_data=None, custom_frame=False):
+        self.device_type = device_type
+        self.name = name
+        self.registers = tuple(registers)  # 解析函数用到的寄存器地址
+        self.decoder = ParseCache(decoder)  # 相同的应答帧直接返回缓存的解析结果
+        self.fields = fields  # 写入页面数据的字段
+        self.schema = ReadingSchema(device_type, fields)  # 同类型数据点共用的字段定义
+        self.min_length = min_length  # 解析前应答帧（不含LoRa地址前缀）的最小长度
+        self.fallback_data = fallback_data  # 无应答时使用的数据，None表示保持之前的数据
+        self.custom_frame = custom_frame  # 是否使用页面保存的自定义问询帧
+
+    def apply(self, result, timestamp):
+        """将解析结果转换为数据点记录（解析结果为只读缓存，记录中填写本次时间戳）"""
+        return self.schema.make(result, timestamp)
+
+
+PROFILES = {
+    "light": DeviceProfile(
+        "light", "光照气体", range(0x0000, 0x0008), parse_light_gas_response,
+        fields=("status", "temperature", "humidity", "co2", "pressure", "light")
+    ),
+    "temperature": DeviceProfile(
+        "temperature", "温湿度", range(0x0000, 0x0002), parse_temperature_response,
+        fields=("temperature", "humidity"), min_length=7,
+        fallback_data={"temperature": 25.5, "humidity": 60.0}
+    ),
+    "vibration": DeviceProfile(
+        # 解析函数只用到0000-0010（温度、速度、位移、加速度、版本号、三轴频率），
+        # 不再读取其后的保留寄存器: 应答帧由81字节（38个寄存器）减为39字节
+        "vibration", "温振", range(0x0000, 0x0011), parse_vibration_response,
+        fields=("temperature", "frequency_x", "frequency_y", "frequency_z",
+                "velocity_x", "velocity_y", "velocity_z",
+                "acceleration_x", "acceleration_y", "acceleration_z",
+                "displacement_x", "displacement_y", "displacement_z",
+                "resultant_velocity", "resultant_acceleration", "resultant_displacement",
+                "status", "version"),
+        min_length=9, custom_frame=True
+    )
+}
+
+# SSCOM页面按自定义问询帧的寄存器个数判断模块类型
+SSCOM_REGISTER_TYPES = {0x0008: "light", 0x0002: "temperature", 0x000D: "vibration", 0x0011: "vibration", 0x0026: "vibration"}
+
+
+class TransactionPlan:
+    """页面的问询计划"""
+
+    def __init__(self, key, profile, transactions, expected_length, prefix, slave_id, reads=None):
+        self.key = key
+        self.profile = profile
+        self.slave_id = slave_id  # 应答帧的Modbus从机地址
+        self.transactions = transactions  # [(问询帧, 预期应答长度)]，每次读取一项
+        self.expected_length = expected_length  # 解析的应答帧长度（多次读取时为拼装后的长度）
+        self.prefix = prefix
+        self.reads = reads  # 寄存器读取列表，自定义问询帧时为None
+        self.query_hex = ' | '.join(' '.join(f'{b:02X}' for b in query) for query, _ in transactions)
+
+    @property
+    def custom(self):
+        """是否为自定义问询帧"""
+        return self.reads is None
+
+    @property
+    def query(self):
+        """第一次读取的问询帧"""
+        return self.transactions[0][0]
+
+    def decode(self, response_data):
+        """去掉LoRa地址前缀后按设备类型解析应答帧，解析函数只处理从地址码开始的RTU帧"""
+        frame = response_data[len(self.prefix):]
+        if len(frame) < self.profile.min_length:
+            return None
+        return self.profile.decoder(frame, slave_id=self.slave_id)
+
+    @property
+    def airtime_sizes(self):
+        """一次问询的问询帧和应答帧空口字节数（多次读取时为总和）"""
+        return sum(len(query) for query, _ in self.transactions), sum(length for _, length in self.transactions)
+
+
+def _plan_key(page_config):
+    """决定问询计划的页面配置项"""
+    device_type = page_config.get("device_type", "light")
+    query_frame = None
+    if device_type == "sscom" or (device_type in PROFILES and PROFILES[device_type].custom_frame):
+        query_frame = (page_config.get("serial_config") or {}).get("query_frame") or None
+    return (device_type, page_config.get("network_type", "lora"), page_config.get("target_address", ""),
+            page_config.get("slave_id") or Config.MODBUS_SLAVE_ID, query_frame)
+
+
+def _custom_response_length(frame):
+    """按自定义问询帧读取的寄存器个数计算应答帧长度（不含LoRa地址前缀）"""
+    modbus = frame[LORA_ADDRESS_SIZE:] if len(frame) == 8 + LORA_ADDRESS_SIZE else frame
+    if len(modbus) == 8:
+        return 5 + 2 * ((modbus[4] << 8) | modbus[5]), modbus
+    return len(frame) + 5, modbus
+
+
+def build_plan(page_config):
+    """根据页面配置构建问询计划，配置页面等不问询设备的页面返回None"""
+    key = _plan_key(page_config)
+    device_type, network_type, target_address, slave_id, query_frame = key
+    if device_type not in PROFILES and device_type != "sscom":
+        return None
+
+    query = None
+    expected_length = None
+    modbus = b""
+    if query_frame:
+        try:
+            query = bytes.fromhex(query_frame.replace(" ", ""))
+            expected_length, modbus = _custom_response_length(query)
+        except ValueError:
+            logger.warning("无效的问询帧格式，使用默认问询帧: %s", query_frame)
+            query = None
+
+    if device_type == "sscom":
+        register_count = (modbus[4] << 8) | modbus[5] if len(modbus) == 8 else None
+        profile = PROFILES[SSCOM_REGISTER_TYPES.get(register_count, "light")]
+    else:
+        profile = PROFILES[device_type]
+
+    # LoRa网络在问询帧前添加2字节目标地址，应答帧同样带有该前缀
+    prefix = b""
+    if network_type == "lora":
+        try:
+            prefix = bytes.fromhex(target_address)
+        except ValueError:
+            logger.warning("无效的目标地址格式: %s", target_address)
+        if len(prefix) != LORA_ADDRESS_SIZE:
+            if prefix:
+                logger.warning("目标地址长度错误，应为2字节: %s", target_address)
+            prefix = b""
+
+    if query is not None:
+        # 自定义问询帧可能已经包含目标地址
+        if prefix and not (len(query) >= 10 and query[:LORA_ADDRESS_SIZE] == prefix):
+            query = prefix + query
+        expected_length += len(prefix)
+        # 自定义问询帧的从机地址以帧内容为准
+        slave_id = modbus[0] if modbus else slave_id
+        return TransactionPlan(key, profile, [(query, expected_length)], expected_length, prefix, slave_id)
+
+    reads = plan_reads(profile.registers)
+    transactions = [
+        (build_modbus_query(
+            slave_id=slave_id,
+            function_code=0x03,
+            start_address=read.start,
+            register_count=read.count,
+            prefix=prefix
+        ), len(prefix) + read.response_length)
+        for read in reads
+    ]
+    expected_length = len(prefix) + 5 + 2 * (reads[-1].end - reads[0].start)
+    return TransactionPlan(key, profile, transactions, expected_length, prefix, slave_id, reads)
+
+
+def get_plan(page_config):
+    """获取页面缓存的问询计划，相关配置改变后重新构建"""
+    plan = page_config.get("plan")
+    if plan is None or plan.key != _plan_key(page_config):
+        plan = page_config["plan"] = build_plan(page_config)
+    return plan
@@ -0,0 +1,73 @@
+"""寄存器合并读取模块
+
+根据设备实际需要的寄存器计算最少的03功能码读取：相邻寄存器之间的空闲寄存器
+不超过max_gap时合并为一次读取（多读空闲寄存器的字节比再发一次问询的帧开销少），
+单次读取不超过max_count个寄存器。LoRa网络下每个字节都占用空口时间，
+多读和多一次往返都会降低吞吐量。
+
+多次读取的应答按寄存器地址拼装为一个覆盖全部读取范围的应答帧（未读取的
+寄存器填0），原有的解析函数无需改动。
+"""
+
+from app.config import Config
+from app.modbus import calculate_crc
+
+
+class RegisterRead:
+    """一次连续寄存器读取"""
+
+    __slots__ = ("start", "count")
+
+    def __init__(self, start, count):
+        self.start = start
+        self.count = count
+
+    @property
+    def end(self):
+        """最后一个寄存器地址之后的地址"""
+        return self.start + self.count
+
+    @property
+    def response_length(self):
+        """应答帧长度: 从机地址 + 功能码 + 字节数 + 数据 + CRC"""
+        return 5 + 2 * self.count
+
+    def __eq__(self, other):
+        return isinstance(other, RegisterRead) and (self.start, self.count) == (other.start, other.count)
+
+    def __repr__(self):
+        return f"RegisterRead(0x{self.start:04X}, {self.count})"
+
+
+def plan_reads(registers, max_gap=None, max_count=None):
+    """计算覆盖所需寄存器的最少读取（按地址从小到大贪心合并）"""
+    max_gap = Config.MODBUS_READ_MAX_GAP if max_gap is None else max_gap
+    max_count = max_count or Config.MODBUS_READ_MAX_COUNT
+    reads = []
+    current = None
+    for address in sorted(set(registers)):
+        if current is not None and address - current.end <= max_gap and address - current.start < max_count:
+            current.count = address - current.start + 1
+        else:
+            current = RegisterRead(address, 1)
+            reads.append(current)
+    return reads
+
+
+def assemble_response(reads, responses, prefix=b"", slave_id=0x01, function_code=0x03):
+    """将多次读取的应答拼装为一个覆盖全部读取范围的应答帧
+
+    responses与reads一一对应，均为带prefix的完整应答帧；
+    任一应答不完整时返回b""。
+    """
+    start = reads[0].start
+    data = bytearray(2 * (reads[-1].end - start))
+    for read, response in zip(reads, responses):
+        if len(response) < len(prefix) + read.response_length:
+            return b""
+        payload = response[len(prefix) + 3:len(prefix) + 3 + 2 * read.count]
+        offset = 2 * (read.start - start)
+        data[offset:offset + len(payload)] = payload
+    frame = bytes([slave_id, function_code, min(len(data), 0xFF)]) + bytes(data)
+    crc = calculate_crc(frame)
+    return bytes(prefix) + frame + bytes([crc & 0xFF, (crc >> 8) & 0xFF])
@@ -0,0 +1,131 @@
+"""节点往返时延估计模块
+
+按TCP重传超时（RFC 6298）的方法为每个节点维护往返时延（RTT）的
+指数加权平均值和平均偏差，据此动态计算应答等待时间：
+    SRTT   = (1 - α) * SRTT + α * R
+    RTTVAR = (1 - β) * RTTVAR + β * |SRTT - R|
+    RTO    = SRTT + 4 * RTTVAR（限制在最小值和最大值之间）
+节点超时未应答时RTO加倍（指数退避），收到下一次有效应答后重新计算。
+"""
+
+import threading
+from app.config import Config
+
+RTT_ALPHA = 1 / 8
+RTT_BETA = 1 / 4
+RTT_K = 4
+
+
+def node_key(page_config):
+    """页面问询的节点标识（网关IP、端口、LoRa目标地址和Modbus从机地址）
+
+    同一LoRa节点总线上的各从机分别统计，一个从机无应答不影响其他从机。
+    串口通讯时以串口名称代替网关地址。
+    """
+    if page_config.get("communication_mode") == "serial":
+        return (
+            "serial",
+            (page_config.get("serial_config") or {}).get("port"),
+            page_config.get("target_address"),
+            page_config.get("slave_id") or Config.MODBUS_SLAVE_ID
+        )
+    return (
+        page_config.get("tcp_server_ip"),
+        page_config.get("tcp_server_port"),
+        page_config.get("target_address"),
+        page_config.get("slave_id") or Config.MODBUS_SLAVE_ID
+    )
+
+
+class RttEstimator:
+    """单个节点的往返时延估计器"""
+
+    def __init__(self, initial=None, minimum=None, maximum=None):
+        """初始化估计器（没有样本前使用初始超时）"""
+        self.minimum = Config.RTT_MIN_TIMEOUT if minimum is None else minimum
+        self.maximum = Config.RTT_MAX_TIMEOUT if maximum is None else maximum
+        self.srtt = None
+        self.rttvar = None
+        self.rto = self._bound(Config.RTT_INITIAL_TIMEOUT if initial is None else initial)
+        self.samples = 0
+        self.timeouts = 0
+        self.last_rtt = None
+
+    def _bound(self, value):
+        """将超时限制在最小值和最大值之间"""
+        return min(self.maximum, max(self.minimum, value))
+
+    def observe(self, rtt):
+        """记录一次有效应答的往返时延"""
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - RTT_BETA) * self.rttvar + RTT_BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - RTT_ALPHA) * self.srtt + RTT_ALPHA * rtt
+        self.rto = self._bound(self.srtt + RTT_K * self.rttvar)
+        self.samples += 1
+        self.last_rtt = rtt
+
+    def backoff(self):
+        """节点超时未应答，超时时间加倍"""
+        self.rto = self._bound(self.rto * 2)
+        self.timeouts += 1
+
+    def stats(self):
+        """获取估计器状态"""
+        return {
+            "srtt": round(self.srtt, 4) if self.srtt is not None else None,
+            "rttvar": round(self.rttvar, 4) if self.rttvar is not None else None,
+            "timeout": round(self.rto, 4),
+            "last_rtt": round(self.last_rtt, 4) if self.last_rtt is not None else None,
+            "samples": self.samples,
+            "timeouts": self.timeouts
+        }
+
+
+class RttTracker:
+    """按节点维护往返时延估计器"""
+
+    def __init__(self):
+        """初始化"""
+        self._nodes = {}
+        self._lock = threading.Lock()
+
+    def _get(self, node):
+        """获取节点的估计器（不存在时创建）"""
+        with self._lock:
+            estimator = self._nodes.get(node)
+            if estimator is None:
+                estimator = self._nodes[node] = RttEstimator()
+            return estimator
+
+    def timeout(self, node):
+        """获取节点当前的应答等待时间（秒）"""
+        return self._get(node).rto
+
+    def observe(self, node, rtt):
+        """记录节点的一次有效应答"""
+        estimator = self._get(node)
+        with self._lock:
+            estimator.observe(rtt)
+
+    def backoff(self, node):
+        """记录节点的一次超时"""
+        estimator = self._get(node)
+        with self._lock:
+            estimator.backoff()
+
+    def stats(self, node):
+        """获取节点的往返时延统计"""
+        estimator = self._get(node)
+        with self._lock:
+            return estimator.stats()
+
+    def reset(self, node=None):
+        """清除指定节点（或全部节点）的统计"""
+        with self._lock:
+            if node is None:
+                self._nodes.clear()
+            else:
+                self._nodes.pop(node, None)
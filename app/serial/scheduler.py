@@ -0,0 +1,121 @@
+"""问询调度模块
+
+使用单调时钟按截止时间调度各设备的问询。每个设备在固定节拍上触发
+（下一次截止时间 = 本次截止时间 + 问询周期），问询本身的耗时不会累加到周期中；
+错过的截止时间直接跳过并计数，不会连续补发问询。
+"""
+
+import threading
+import time
+
+
+class PollScheduler:
+    """设备问询调度器
+
+    每个设备的问询线程只等待自己的截止时间，因此每个设备只保存一个截止时间，
+    重新调度时直接覆盖，不会积累失效的条目。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """初始化调度器"""
+        self._clock = clock
+        self._devices = {}  # 设备 -> 调度状态（含下一次截止时间）
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _check_interval(interval):
+        """校验问询周期"""
+        interval = float(interval)
+        if interval <= 0:
+            raise ValueError("问询周期必须大于0")
+        return interval
+
+    def _schedule(self, device, due):
+        """设置设备的下一次截止时间"""
+        self._devices[device]["due"] = due
+        self._cond.notify_all()
+
+    def _fire(self, device, now):
+        """触发一次问询并计算下一次截止时间"""
+        state = self._devices[device]
+        due = state["due"]
+        interval = state["interval"]
+        lateness = max(0.0, now - due)
+        # 落后超过一个周期时跳过错过的节拍，保持原有相位
+        missed = int(lateness // interval)
+        state["polls"] += 1
+        state["missed"] += missed
+        state["last_lateness"] = lateness
+        state["max_lateness"] = max(state["max_lateness"], lateness)
+        state["last_due"] = due
+        self._schedule(device, due + (missed + 1) * interval)
+
+    def add(self, device, interval, immediate=False):
+        """添加设备（immediate为True时立即触发第一次问询）"""
+        interval = self._check_interval(interval)
+        with self._cond:
+            now = self._clock()
+            self._devices[device] = {
+                "interval": interval,
+                "due": None,
+                "last_due": None,
+                "polls": 0,
+                "missed": 0,
+                "last_lateness": 0.0,
+                "max_lateness": 0.0
+            }
+            self._schedule(device, now if immediate else now + interval)
+
+    def remove(self, device):
+        """移除设备"""
+        with self._cond:
+            if self._devices.pop(device, None) is not None:
+                self._cond.notify_all()
+
+    def set_interval(self, device, interval):
+        """更新设备的问询周期（从上一次截止时间起按新周期计算）"""
+        interval = self._check_interval(interval)
+        with self._cond:
+            state = self._devices.get(device)
+            if state is None:
+                return
+            state["interval"] = interval
+            now = self._clock()
+            base = state["last_due"] if state["last_due"] is not None else now
+            self._schedule(device, max(now, base + interval))
+
+    def trigger(self, device):
+        """立即触发设备的下一次问询"""
+        with self._cond:
+            if device in self._devices:
+                self._schedule(device, self._clock())
+
+    def wait(self, device, stop=None, poll=0.5):
+        """阻塞到设备的截止时间，到期返回True；设备被移除或stop()为真时返回False"""
+        with self._cond:
+            while True:
+                state = self._devices.get(device)
+                if state is None or (stop and stop()):
+                    return False
+                now = self._clock()
+                delay = state["due"] - now
+                if delay <= 0:
+                    self._fire(device, now)
+                    return True
+                # 分段等待，以便及时响应停止标志
+                self._cond.wait(min(delay, poll))
+
+    def stats(self, device):
+        """获取设备的调度统计，设备不存在时返回None"""
+        with self._cond:
+            state = self._devices.get(device)
+            if state is None:
+                return None
+            return {
+                "interval": state["interval"],
+                "polls": state["polls"],
+                "missed_deadlines": state["missed"],
+                "last_lateness": round(state["last_lateness"], 4),
+                "max_lateness": round(state["max_lateness"], 4),
+                "next_due_in": round(max(0.0, state["due"] - self._clock()), 4)
+            }
@@ -0,0 +1,285 @@
+"""串口通讯处理模块
+
+直连RS-485转换器（或串口LoRa模块）时问询帧直接写入串口。串口以非阻塞方式
+打开（timeout=0），接收时等待串口可读而不是按固定间隔延时：
+- 首个字节到达前最多等待节点往返时延决定的应答等待时间；
+- 收齐问询计划预期的应答长度时立即返回；
+- 收到数据后超过RTU帧间静默时间t3.5（按波特率和字符位数计算）没有新数据，
+  即认为应答帧结束（异常应答、长度未知的自定义问询帧）。
+同一串口可以被多个页面（同一RS-485总线上的多个从机）共用，由总线仲裁器轮流问询。
+"""
+
+import logging
+import select
+import threading
+import time
+from app.config import Config
+from app.serial import serial_lock
+from app.serial.frame_handler import FrameHandler
+from app.serial.profiles import get_plan
+from app.serial.registers import assemble_response
+from app.serial.bus import bus_key, rtu_silence
+from app.serial.rtt import node_key
+from app.serial.ports import PortInventory
+from app.logs import HexFrame
+
+try:
+    import serial
+except ImportError:
+    serial = None
+
+logger = logging.getLogger(__name__)
+
+# Modbus-RTU帧最大长度
+RTU_MAX_FRAME = 256
+
+
+def wait_readable(port, timeout, poll_interval=0.001):
+    """等待串口有数据可读（最多timeout秒），返回是否可读
+
+    POSIX平台用select等待串口文件描述符；没有文件描述符的平台（Windows）
+    按poll_interval查询接收缓冲区。
+    """
+    try:
+        fd = port.fileno()
+    except (AttributeError, NotImplementedError):
+        fd = None
+    if fd is not None:
+        ready, _, _ = select.select([fd], [], [], max(timeout, 0))
+        return bool(ready)
+
+    deadline = time.monotonic() + timeout
+    while not port.in_waiting:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(poll_interval, remaining))
+    return True
+
+
+def read_rtu_frame(port, expected_length, timeout, silence, poll_interval=0.001):
+    """读取一个RTU应答帧，返回(应答数据, 耗时)
+
+    timeout秒内没有收到首个字节时返回空数据；收到数据后读取到expected_length字节，
+    或超过silence秒没有新数据为止（expected_length为None时只按静默时间判断帧结束）。
+    已开始接收的帧不会被timeout截断。
+    """
+    start_time = time.monotonic()
+    deadline = start_time + timeout
+    limit = expected_length or RTU_MAX_FRAME
+    frame = bytearray()
+    while len(frame) < limit:
+        if frame:
+            wait = silence
+        else:
+            wait = deadline - time.monotonic()
+            if wait <= 0:
+                break
+        if not wait_readable(port, wait, poll_interval):
+            break
+        chunk = port.read(min(port.in_waiting or 1, limit - len(frame)))
+        frame += chunk
+    return bytes(frame), time.monotonic() - start_time
+
+
+class SerialPortHandler:
+    """串口通讯处理器"""
+
+    def __init__(self):
+        """初始化串口处理器"""
+        self.frame_handler = FrameHandler()
+        # 已打开的串口：串口名称 -> [串口对象, 使用该串口的页面集合, 线路参数]
+        self._ports = {}
+        # 串口清单缓存（后台刷新，插拔设备时自动更新）
+        self.inventory = PortInventory()
+
+    def get_available_ports(self, refresh=False):
+        """获取可用的串口端口列表（refresh为True时立即重新枚举）"""
+        return self.inventory.ports(refresh)
+
+    def open_serial(self, serial_service, config=None, page="light"):
+        """打开串口并启动读取线程"""
+        try:
+            if serial is None:
+                return False, "未安装pyserial，无法打开串口"
+            page_config = serial_service.get_page(page)
+            config = serial_service.config.normalize(config, page_config["serial_config"])
+
+            # 关闭页面之前的串口和TCP连接，一个页面只有一个读取线程
+            if page_config.get("serial_port"):
+                self.close_serial(serial_service, page)
+            if page_config.get("tcp_connected"):
+                serial_service.close_tcp(page)
+
+            page_config["serial_port"] = self._acquire_port(serial_service, page, config)
+            page_config["serial_config"] = config
+            page_config["communication_mode"] = "serial"
+
+            # 启动读取线程
+            page_config["stop_thread"] = False
+            page_config["serial_thread"] = threading.Thread(target=serial_service.read_serial_data, args=(page,))
+            page_config["serial_thread"].daemon = True
+            page_config["serial_thread"].start()
+
+            return True, f"{page}页面串口已打开: {config['port']}, 波特率={config['baudrate']}, 校验位={config['parity']}, 停止位={config['stopbits']}, 数据位={config['bytesize']}"
+        except ValueError as e:
+            return False, str(e)
+        except Exception as e:
+            return False, f"打开串口失败: {str(e)}"
+
+    def close_serial(self, serial_service, page="light"):
+        """关闭串口（其他页面仍在使用时保持打开）"""
+        try:
+            page_config = serial_service.get_page(page)
+            page_config["stop_thread"] = True
+            port = page_config.get("serial_port")
+            page_config["serial_port"] = None
+            if port is not None:
+                self._release_port(page, port)
+
+            if page_config["serial_thread"]:
+                page_config["serial_thread"].join(timeout=1)
+            return True, f"{page}页面串口已关闭"
+        except Exception as e:
+            return False, f"关闭串口失败: {str(e)}"
+
+    def _acquire_port(self, serial_service, page, config):
+        """获取串口对象，同一串口已被其他页面打开时共用（线路参数必须一致）"""
+        with serial_lock:
+            entry = self._ports.get(config["port"])
+            if entry is not None and entry[0].is_open:
+                port, pages, line = entry
+                if not serial_service.config.same_line(line, config):
+                    raise ValueError(f"串口 {config['port']} 已被其他页面以不同的参数打开")
+                pages.add(page)
+                return port
+            # 串口名称可以是USB转换器的稳定标识（VID:PID:序列号），按当前设备名称打开
+            port = serial.Serial(
+                port=self.inventory.resolve(config["port"]),
+                baudrate=config["baudrate"],
+                parity=config["parity"],
+                stopbits=config["stopbits"],
+                bytesize=config["bytesize"],
+                timeout=0,  # 非阻塞读取，由wait_readable等待数据
+                write_timeout=Config.SERIAL_WRITE_TIMEOUT
+            )
+            self._ports[config["port"]] = [port, {page}, dict(config)]
+            return port
+
+    def _release_port(self, page, port):
+        """页面不再使用串口，没有页面使用时关闭串口"""
+        with serial_lock:
+            for name, (shared, pages, _) in list(self._ports.items()):
+                if shared is not port:
+                    continue
+                pages.discard(page)
+                if pages:
+                    return
+                del self._ports[name]
+                break
+            try:
+                port.close()
+            except Exception:
+                pass
+
+    def handle_communication(self, serial_service, page, timestamp):
+        """处理串口通讯"""
+        page_config = serial_service.get_page(page)
+        port = page_config.get("serial_port")
+        if not port or not port.is_open:
+            logger.info("【%s页面】串口未打开，跳过本次问询", page)
+            page_config["immediate_query"] = False
+            return
+
+        # 问询计划在注册设备时构建，配置未改变时直接复用
+        plan = get_plan(page_config)
+        if plan is None:
+            self._handle_config_communication(serial_service, page, timestamp)
+            return
+
+        # 熔断中的节点只在探测时间问询
+        if not serial_service.breaker.allow(node_key(page_config)):
+            page_config["immediate_query"] = False
+            return
+
+        # 同一串口上的从机按到达顺序轮流问询，相邻问询之间保留RTU帧间静默时间
+        config = page_config["serial_config"]
+        silence = rtu_silence(config.get("baudrate"), serial_service.config.bits_per_char(config))
+        bus = bus_key(page_config)
+        if not serial_service.buses.acquire(bus, silence, Config.LORA_MAX_WAIT):
+            logger.info("【%s页面】RS-485总线繁忙，跳过本次问询", page)
+            page_config["immediate_query"] = False
+            return
+
+        try:
+            self._run_plan(serial_service, page, plan, port, max(silence, Config.SERIAL_FRAME_SILENCE_MIN), timestamp)
+        except Exception as e:
+            logger.warning("【%s页面】串口通讯错误: %s", page, e)
+        finally:
+            page_config["immediate_query"] = False
+            serial_service.buses.release(bus)
+
+    def _transact(self, serial_service, page, port, query, expected_length, silence):
+        """发送问询帧并按RTU帧间静默时间接收应答帧，返回(应答数据, 耗时)"""
+        page_config = serial_service.get_page(page)
+        node = node_key(page_config)
+        timeout = serial_service.rtt.timeout(node)
+
+        # 丢弃上一次问询超时后才到达的应答，避免被当作本次的应答
+        stale = port.in_waiting
+        if stale:
+            port.reset_input_buffer()
+            logger.info("【%s页面】丢弃串口缓冲区中的过期数据 %d 字节", page, stale)
+
+        port.write(query)
+        # 等待问询帧发送完成再开始计时（RS-485转换器发送完成后才切换为接收）
+        port.flush()
+        response_data, elapsed_time = read_rtu_frame(port, expected_length, timeout, silence)
+
+        complete = len(response_data) >= expected_length if expected_length else bool(response_data)
+        if complete:
+            serial_service.rtt.observe(node, elapsed_time)
+            serial_service.breaker.success(node)
+        else:
+            logger.info("【%s页面】节点应答超时（等待 %.3f 秒），下次等待时间加倍", page, timeout)
+            serial_service.rtt.backoff(node)
+            serial_service.breaker.failure(node)
+        return response_data, elapsed_time
+
+    def _run_plan(self, serial_service, page, plan, port, silence, timestamp):
+        """按页面的问询计划完成一次串口问询：发送、接收、解析并保存数据"""
+        page_config = serial_service.get_page(page)
+        profile = plan.profile
+        logger.debug("【%s页面】串口发送%s问询帧: %s", page, profile.name, plan.query_hex)
+
+        responses = []
+        for query, expected_length in plan.transactions:
+            response_data, elapsed_time = self._transact(serial_service, page, port, query, expected_length, silence)
+            logger.debug("【%s页面】收到串口应答帧（耗时: %.3f秒）: %s", page, elapsed_time, HexFrame(response_data))
+            responses.append(response_data)
+            if len(response_data) < expected_length:
+                # 一次读取失败则本轮问询失败，不再发送后续读取
+                break
+
+        if len(plan.transactions) == 1:
+            response_data = responses[0]
+        elif len(responses) == len(plan.transactions):
+            # 多次读取的应答按寄存器地址拼装为一个应答帧
+            response_data = assemble_response(plan.reads, responses, plan.prefix, plan.slave_id)
+        else:
+            response_data = b""
+        serial_service.apply_response(page, plan, response_data, timestamp)
+
+        # 保存每次读取的帧数据
+        for (query, _), response in zip(plan.transactions, responses):
+            self.frame_handler.save_frame_data(
+                serial_service, page, "serial", query, response,
+                page_config.get("network_type", "lora"), page_config.get("target_address", ""), plan.prefix, timestamp
+            )
+
+    def _handle_config_communication(self, serial_service, page, timestamp):
+        """处理配置页面的串口通讯"""
+        # 配置页面不问询设备，只更新时间戳
+        page_config = serial_service.get_page(page, "config")
+        page_config["data"]["timestamp"] = timestamp
+        page_config["immediate_query"] = False
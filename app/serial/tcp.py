@@ -1,10 +1,23 @@
 """TCP通讯处理模块"""
 
-import socket
-import time
-from datetime import datetime
-from app.modbus import build_modbus_query, parse_temperature_response, parse_vibration_response, parse_light_gas_response, parse_vibration_sensor_response
+import logging
 from app.serial.frame_handler import FrameHandler
+from app.serial.profiles import get_plan
+from app.serial.registers import assemble_response
+from app.serial.bus import bus_key, rtu_silence
+from app.serial.mbap import rtu_to_pdu, pdu_to_rtu
+from app.serial.correlation import ResponseTag, SocketSession
+from app.serial.connector import TcpLink, STATE_CONNECTING
+from app.serial.rtt import node_key
+from app.config import Config
+from app.logs import HexFrame
+
+logger = logging.getLogger(__name__)
+
+
+def uses_shared_connection(page_config):
+    """页面是否使用网关共享连接（Modbus-TCP网关，或在途窗口大于1）"""
+    return page_config.get("network_type") == "modbus_tcp" or Config.GATEWAY_WINDOW > 1
 
 
 class TCPHandler:
@@ -18,7 +31,7 @@ class TCPHandler:
         """打开TCP通讯"""
         try:
             # 检查是否已经连接
-            page_config = serial_service.pages.get(page, serial_service.pages["light"])
+            page_config = serial_service.get_page(page)
             if page_config.get("tcp_connected") and page_config.get("tcp_socket"):
                 return False, f"{page}页面已经与TCP服务器 {tcp_server_ip}:{tcp_server_port} 建立连接"
             
@@ -40,12 +53,22 @@ class TCPHandler:
             page_config["tcp_server_ip"] = tcp_server_ip
             page_config["tcp_server_port"] = tcp_server_port
             
-            # 创建TCP套接字并保持连接（类似sscom_gui.py）
-            import socket
-            page_config["tcp_socket"] = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            page_config["tcp_socket"].settimeout(0.5)  # 设置较短的超时，用于接收线程
-            page_config["tcp_socket"].connect((tcp_server_ip, tcp_server_port))
-            page_config["tcp_connected"] = True
+            if uses_shared_connection(page_config):
+                # Modbus-TCP网关或在途窗口大于1时，同一网关的所有页面共用连接，首次问询时建立
+                page_config["tcp_socket"] = None
+                page_config["tcp_connected"] = True
+                status = "共用网关连接，首次问询时建立"
+            else:
+                # 非阻塞发起连接，只等待很短的时间，未完成时由问询线程继续，不阻塞HTTP请求
+                link = page_config["tcp_link"] = TcpLink((tcp_server_ip, tcp_server_port))
+                if link.connect(Config.TCP_OPEN_WAIT):
+                    self._attach(page_config, link)
+                    status = f"本地地址={link.sock.getsockname()}"
+                elif link.state == STATE_CONNECTING:
+                    status = "正在连接，连接建立后开始问询"
+                else:
+                    page_config["tcp_link"] = None
+                    return False, f"打开TCP通讯失败: {link.error}"
             
             # 启动读取线程
             page_config["stop_thread"] = False
@@ -53,8 +76,7 @@ class TCPHandler:
             page_config["serial_thread"].daemon = True
             page_config["serial_thread"].start()
             
-            local_address = page_config["tcp_socket"].getsockname()
-            return True, f"{page}页面TCP通讯已打开: IP={tcp_server_ip}, 端口={tcp_server_port}, 本地地址={local_address}"
+            return True, f"{page}页面TCP通讯已打开: IP={tcp_server_ip}, 端口={tcp_server_port}, {status}"
         except ValueError:
             return False, "无效的端口号格式"
         except Exception as e:
@@ -63,10 +85,13 @@ class TCPHandler:
     def close_tcp(self, serial_service, page="light"):
         """关闭TCP通讯"""
         try:
-            page_config = serial_service.pages.get(page, serial_service.pages["light"])
+            page_config = serial_service.get_page(page)
             page_config["stop_thread"] = True
             
             # 关闭TCP套接字
+            if page_config.get("tcp_link"):
+                page_config["tcp_link"].close()
+                page_config["tcp_link"] = None
             if page_config.get("tcp_socket"):
                 try:
                     page_config["tcp_socket"].close()
@@ -77,6 +102,10 @@ class TCPHandler:
             
             if page_config["serial_thread"]:
                 page_config["serial_thread"].join(timeout=1)
+            
+            # 关闭不再被任何页面使用的网关共享连接
+            serial_service.gateways.release(page)
+            serial_service.mbap.release(page)
             return True, f"{page}页面TCP通讯已关闭"
         except Exception as e:
             return False, f"关闭TCP通讯失败: {str(e)}"
@@ -84,632 +113,233 @@ class TCPHandler:
     def handle_communication(self, serial_service, page, timestamp):
         """处理TCP通讯"""
         # 获取页面配置
-        page_config = serial_service.pages.get(page, serial_service.pages["light"])
+        page_config = serial_service.get_page(page)
         
         # 获取TCP服务器配置
         tcp_server_ip = page_config.get("tcp_server_ip", "192.168.0.80")
         tcp_server_port = page_config.get("tcp_server_port", 10125)
         
-        # 检查TCP连接是否有效
+        # 检查TCP连接是否有效（共用网关连接的页面不需要页面连接）
         tcp_socket = page_config.get("tcp_socket")
-        if not tcp_socket or not page_config.get("tcp_connected"):
-            print(f"【{page}页面】TCP连接未建立，重新连接...")
-            # 重新建立连接
-            try:
-                tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                tcp_socket.settimeout(0.5)
-                tcp_socket.connect((tcp_server_ip, tcp_server_port))
-                page_config["tcp_socket"] = tcp_socket
-                page_config["tcp_connected"] = True
-                local_address = tcp_socket.getsockname()
-                print(f"【{page}页面】TCP连接成功，本地地址: {local_address}")
-            except Exception as e:
-                print(f"【{page}页面】TCP连接失败: {str(e)}")
+        if uses_shared_connection(page_config):
+            local_address = None
+        elif not tcp_socket or not page_config.get("tcp_connected"):
+            # 非阻塞建立连接：连接失败后按退避时间重连，退避期间直接跳过本次问询
+            link = page_config.get("tcp_link")
+            if link is None or link.address != (tcp_server_ip, tcp_server_port):
+                if link is not None:
+                    link.close()
+                link = page_config["tcp_link"] = TcpLink((tcp_server_ip, tcp_server_port))
+            if not link.connect(Config.TCP_CONNECT_WAIT):
                 page_config["tcp_connected"] = False
                 page_config["immediate_query"] = False
                 return
+            tcp_socket = self._attach(page_config, link)
+            local_address = tcp_socket.getsockname()
+            logger.info("【%s页面】TCP连接成功，本地地址: %s", page, local_address)
         else:
             local_address = tcp_socket.getsockname()
         
+        # 熔断中的节点只在探测时间问询，不占用网关空口，网关连接保持不变
+        if not serial_service.breaker.allow(node_key(page_config)):
+            page_config["immediate_query"] = False
+            return
+        
+        # 问询计划在注册设备时构建，配置未改变时直接复用
+        plan = get_plan(page_config)
+        
+        # 同一RS-485总线上的从机按到达顺序轮流问询，并保留RTU帧间静默时间
+        bus = bus_key(page_config) if plan is not None else None
+        if bus is not None:
+            silence = rtu_silence(page_config.get("serial_config", {}).get("baudrate"))
+            if not serial_service.buses.acquire(bus, silence, Config.LORA_MAX_WAIT):
+                logger.info("【%s页面】RS-485总线繁忙，跳过本次问询", page)
+                page_config["immediate_query"] = False
+                return
+        
+        # LoRa网络下同一网关的问询错开发送，并执行占空比预算
+        gateway = None
+        if plan is not None and page_config.get("network_type", "lora") == "lora":
+            query_len, response_len = plan.airtime_sizes
+            if not serial_service.airtime.acquire((tcp_server_ip, tcp_server_port), query_len, response_len):
+                logger.info("【%s页面】LoRa网关空口繁忙或占空比预算不足，跳过本次问询", page)
+                page_config["immediate_query"] = False
+                serial_service.buses.release(bus)
+                return
+            gateway = (tcp_server_ip, tcp_server_port)
+        
         try:
             # 获取页面的网络类型和目标地址
             network_type = page_config.get("network_type", "lora")
             target_address = page_config.get("target_address", "5678")
             
-            if page == "light":
-                # 读取光照气体数据
-                self._handle_light_gas_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-            elif page == "temperature":
-                # 读取温湿度数据
-                self._handle_temperature_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-            elif page == "vibration":
-                # 读取温振数据
-                self._handle_vibration_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-            elif page == "config":
+            if plan is None:
                 # 配置页面数据
                 self._handle_config_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-            elif page == "sscom":
-                # SSCOM页面，根据问询帧内容自动判断模块类型
-                # 尝试使用保存的问询帧
-                sscom_query_to_send = None
-                if "serial_config" in page_config and "query_frame" in page_config["serial_config"] and page_config["serial_config"]["query_frame"]:
-                    try:
-                        hex_frame = page_config["serial_config"]["query_frame"].replace(" ", "")
-                        sscom_query_to_send = bytearray.fromhex(hex_frame)
-                    except ValueError:
-                        print(f"【{page}页面】无效的问询帧格式")
-                
-                # 根据问询帧长度和内容判断模块类型
-                if sscom_query_to_send:
-                    # 提取实际的Modbus查询帧（去掉可能的LoRa地址前缀）
-                    modbus_frame = sscom_query_to_send
-                    if len(sscom_query_to_send) > 8:
-                        # 可能包含LoRa地址前缀，尝试提取实际的Modbus帧
-                        # 标准Modbus-RTU查询帧长度为8字节
-                        if len(sscom_query_to_send) == 10:
-                            # 包含2字节LoRa地址前缀
-                            modbus_frame = sscom_query_to_send[2:]
-                    
-                    # 根据Modbus帧的寄存器数量判断模块类型
-                    if len(modbus_frame) == 8:
-                        register_count = (modbus_frame[4] << 8) | modbus_frame[5]
-                        if register_count == 0x0008:
-                            # 光照气体模块
-                            self._handle_light_gas_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-                        elif register_count == 0x0002:
-                            # 温湿度模块
-                            self._handle_temperature_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-                        elif register_count == 0x000D:
-                            # 温振模块
-                            self._handle_vibration_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-                        else:
-                            # 未知模块类型，默认使用光照气体模块
-                            self._handle_light_gas_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-                    else:
-                        # 未知帧格式，默认使用光照气体模块
-                        self._handle_light_gas_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
-                else:
-                    # 没有保存的问询帧，默认使用光照气体模块
-                    self._handle_light_gas_communication(serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
+            else:
+                self._run_plan(serial_service, page, plan, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp)
             
             # 重置立即问询标志
             page_config["immediate_query"] = False
+        except OSError as e:
+            logger.warning("【%s页面】TCP通讯错误: %s", page, e)
+            self._drop_connection(page_config, e)
+            page_config["immediate_query"] = False
         except Exception as e:
-            print(f"【{page}页面】TCP通讯错误: {str(e)}")
-            page_config["tcp_connected"] = False
-            if page_config.get("tcp_socket"):
-                try:
-                    page_config["tcp_socket"].close()
-                except:
-                    pass
-                page_config["tcp_socket"] = None
+            # 应答解析等错误只影响本次问询，保持网关连接
+            logger.exception("【%s页面】处理应答帧错误: %s", page, e)
             page_config["immediate_query"] = False
+        finally:
+            if gateway:
+                serial_service.airtime.release(gateway)
+            if bus:
+                serial_service.buses.release(bus)
     
-    def _handle_light_gas_communication(self, serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp):
-        """处理光照气体模块的TCP通讯"""
-        # 尝试使用保存的问询帧
-        light_gas_query_to_send = None
-        expected_response_length = 21  # 默认长度（不包含目标地址）
-        actual_target_address = ""
-        target_bytes = b""
-        
-        page_config = serial_service.pages.get(page, serial_service.pages["light"])
-        
-        if page == "sscom" and "serial_config" in page_config and "query_frame" in page_config["serial_config"] and page_config["serial_config"]["query_frame"]:
-            # 使用保存的问询帧
-            try:
-                hex_frame = page_config["serial_config"]["query_frame"].replace(" ", "")
-                light_gas_query_to_send = bytearray.fromhex(hex_frame)
-                expected_response_length = len(light_gas_query_to_send) + 13  # 估计响应长度
-                print(f"【{page}页面】使用保存的问询帧: {page_config['serial_config']['query_frame']}")
-            except ValueError:
-                print(f"【{page}页面】无效的问询帧格式，使用默认问询帧")
-                light_gas_query_to_send = None
-        
-        if not light_gas_query_to_send:
-            # 构建默认问询帧: 01 03 00 00 00 08 44 0C
-            light_gas_query = build_modbus_query(
-                slave_id=0x01,         # 地址码: 01H
-                function_code=0x03,     # 功能码: 03H
-                start_address=0x0000,   # 起始寄存器: 0000H
-                register_count=0x0008    # 寄存器个数: 0008H
-            )
-            
-            light_gas_query_to_send = light_gas_query
-            expected_response_length = 21  # 默认长度（不包含目标地址）
+    def shared_pool(self, serial_service, page_config):
+        """页面所用的网关共享连接池，使用页面自己的TCP连接时返回None
 
-        # 确保问询帧包含LoRa目的地址
-        extracted_address = target_address
-        if network_type == "lora":
-            print(f"【{page}页面】使用LoRa网络，添加目标地址前缀")
-            try:
-                # 将目标地址转换为字节数组并添加到问询帧前面
-                target_bytes = bytearray.fromhex(target_address)
-                if len(target_bytes) == 2:
-                    # 检查问询帧是否已经包含目标地址
-                    if len(light_gas_query_to_send) >= 10 and light_gas_query_to_send[:2] == target_bytes:
-                        print(f"【{page}页面】问询帧已包含目标地址，使用现有帧")
-                    else:
-                        # 添加目标地址前缀
-                        light_gas_query_to_send = target_bytes + light_gas_query_to_send
-                        print(f"【{page}页面】已添加目标地址前缀: {target_address}")
-                    extracted_address = target_address
-                else:
-                    target_bytes = b""
-                    print(f"【{page}页面】目标地址长度错误，应为2字节")
-            except ValueError:
-                target_bytes = b""
-                print(f"【{page}页面】无效的目标地址格式")
-        else:
-            target_bytes = b""
-            print(f"【{page}页面】使用标准网络")
-        
-        # 如果是LoRa网络，调整预期响应长度以包含目标地址前缀
-        if network_type == "lora" and len(target_bytes) == 2:
-            expected_response_length += len(target_bytes)
-            print(f"【{page}页面】调整预期响应长度为: {expected_response_length} 字节")
-        
-        light_gas_query_str = ' '.join([f'{b:02X}' for b in light_gas_query_to_send])
-        print(f"【{page}页面】发送问询帧: {light_gas_query_str}")
-        
-        # 发送问询帧
-        response_data = b""
-        try:
-            tcp_socket.sendall(light_gas_query_to_send)
-            print(f"【{page}页面】TCP发送问询帧成功")
-            
-            # 接收应答帧（改进接收逻辑，确保收到完整的应答帧）
-            print(f"【{page}页面】等待TCP应答帧...")
-            start_time = time.time()
-            response_data = b""
-            # 多次尝试接收，确保收到完整的应答帧
-            while time.time() - start_time < 2:  # 2秒超时
-                try:
-                    chunk = tcp_socket.recv(1024)
-                    if chunk:
-                        response_data += chunk
-                        # 如果收到了足够长度的数据，停止接收
-                        if len(response_data) >= expected_response_length:
-                            break
-                    else:
-                        time.sleep(0.1)
-                except socket.timeout:
-                    # 超时是正常的，继续等待
-                    time.sleep(0.1)
-                    continue
-            
-            elapsed_time = time.time() - start_time
-            print(f"【{page}页面】收到TCP应答帧（耗时: {elapsed_time:.2f}秒）: {[f'{b:02X}' for b in response_data]}")
-            
-        except ConnectionResetError:
-            print(f"【{page}页面】TCP连接被重置，尝试重新连接")
-            page_config["tcp_connected"] = False
-            if page_config.get("tcp_socket"):
-                try:
-                    page_config["tcp_socket"].close()
-                except:
-                    pass
-                page_config["tcp_socket"] = None
-        except ConnectionRefusedError:
-            print(f"【{page}页面】TCP连接被拒绝，请检查服务器是否运行")
-            page_config["tcp_connected"] = False
-        except Exception as e:
-            print(f"【{page}页面】TCP通信错误: {str(e)}")
-            page_config["tcp_connected"] = False
-        
-        # 解析光照气体应答帧
-        print(f"【{page}页面】收到光照气体应答帧长度: {len(response_data)}")
-        print(f"【{page}页面】光照气体应答帧内容: {[f'{b:02X}' for b in response_data]}")
-        
-        # 检查应答帧长度是否符合预期
-        if len(response_data) >= expected_response_length:
-            # 检查目标地址是否匹配（如果是LoRa网络）
-            target_address_match = True
-            if network_type == "lora" and len(response_data) >= len(target_bytes):
-                # 提取应答帧中的目标地址
-                response_target_bytes = response_data[:len(target_bytes)]
-                response_target_address = ''.join([f'{b:02X}' for b in response_target_bytes]).upper()
-                actual_target_address = response_target_address
-                
-                # 检查目标地址是否匹配，使用从问询帧中提取的地址
-                if response_target_address != extracted_address.upper():
-                    print(f"【{page}页面】目标地址不匹配，预期: {extracted_address.upper()}，实际: {response_target_address}")
-                    target_address_match = False
-                else:
-                    print(f"【{page}页面】目标地址匹配: {response_target_address}")
-            
-            # 只有当目标地址匹配时才解析数据
-            if target_address_match:
-                actual_modbus_response = response_data
-                
-                # 不手动移除LoRa前缀，让parse_light_gas_response函数处理
-                # 这样与串口处理保持一致
-                print(f"【{page}页面】直接使用完整应答帧进行解析，长度: {len(actual_modbus_response)} 字节")
-                
-                light_gas_result = parse_light_gas_response(actual_modbus_response)
-                if light_gas_result:
-                    # 更新光照气体数据
-                    page_config["data"] = {
-                        "status": light_gas_result["status"],
-                        "temperature": light_gas_result["temperature"],
-                        "humidity": light_gas_result["humidity"],
-                        "co2": light_gas_result["co2"],
-                        "pressure": light_gas_result["pressure"],
-                        "light": light_gas_result["light"],
-                        "timestamp": timestamp
-                    }
-                    print(f"【{page}页面】解析到光照气体数据: {page_config['data']}")
-                    if actual_target_address:
-                        print(f"【{page}页面】目标地址: {actual_target_address}")
-                else:
-                    print(f"【{page}页面】光照气体解析失败，保持之前的数据")
-                    # 只更新时间戳，保持其他数据不变
-                    page_config["data"]["timestamp"] = timestamp
-            else:
-                print(f"【{page}页面】目标地址不匹配，跳过解析")
-                # 只更新时间戳，保持其他数据不变
-                page_config["data"]["timestamp"] = timestamp
-        else:
-            print(f"【{page}页面】光照气体应答帧长度不足，保持之前的数据，长度: {len(response_data)}")
-            # 只更新时间戳，保持其他数据不变
-            page_config["data"]["timestamp"] = timestamp
-        
-        # 保存帧数据
-        self.frame_handler.save_frame_data(
-            serial_service, page, "tcp", light_gas_query_to_send, response_data,
-            network_type, target_address, target_bytes, timestamp, tcp_server_ip, tcp_server_port, local_address
-        )
+        Modbus-TCP网关使用MBAP连接；在途窗口大于1时所有问询经网关共享连接流水线发送。
+        """
+        if not uses_shared_connection(page_config):
+            return None
+        return serial_service.mbap if page_config.get("network_type") == "modbus_tcp" else serial_service.gateways
     
-    def _handle_temperature_communication(self, serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp):
-        """处理温湿度模块的TCP通讯"""
-        # 尝试使用保存的问询帧
-        temp_query_to_send = None
-        expected_response_length = 11  # 包含LoRa地址的完整长度
-        actual_target_address = ""
-        target_bytes = b""
-        
-        page_config = serial_service.pages.get(page, serial_service.pages["temperature"])
-        
-        if page == "sscom" and "serial_config" in page_config and "query_frame" in page_config["serial_config"] and page_config["serial_config"]["query_frame"]:
-            # 使用保存的问询帧
-            try:
-                hex_frame = page_config["serial_config"]["query_frame"].replace(" ", "")
-                temp_query_to_send = bytearray.fromhex(hex_frame)
-                expected_response_length = len(temp_query_to_send) + 5  # 估计响应长度
-                print(f"【{page}页面】使用保存的温湿度问询帧: {page_config['serial_config']['query_frame']}")
-            except ValueError:
-                print(f"【{page}页面】无效的问询帧格式，使用默认问询帧")
-                temp_query_to_send = None
-        
-        if not temp_query_to_send:
-            # 构建默认问询帧
-            temp_query = build_modbus_query(
-                slave_id=0x01,
-                function_code=0x03,
-                start_address=0x0000,
-                register_count=0x0002
-            )
-            
-            temp_query_to_send = temp_query
-            expected_response_length = 11  # 包含LoRa地址的完整长度
-        
-        # 确保问询帧包含LoRa目的地址
-        extracted_address = target_address
-        if network_type == "lora":
-            print(f"【{page}页面】使用LoRa网络，添加目标地址前缀")
-            try:
-                # 将目标地址转换为字节数组并添加到问询帧前面
-                target_bytes = bytearray.fromhex(target_address)
-                if len(target_bytes) == 2:
-                    # 检查问询帧是否已经包含目标地址
-                    if len(temp_query_to_send) >= 10 and temp_query_to_send[:2] == target_bytes:
-                        print(f"【{page}页面】问询帧已包含目标地址，使用现有帧")
-                    else:
-                        # 添加目标地址前缀
-                        temp_query_to_send = target_bytes + temp_query_to_send
-                        print(f"【{page}页面】已添加目标地址前缀: {target_address}")
-                    extracted_address = target_address
-                else:
-                    target_bytes = b""
-                    print(f"【{page}页面】目标地址长度错误，应为2字节")
-            except ValueError:
-                target_bytes = b""
-                print(f"【{page}页面】无效的目标地址格式")
+    def connected(self, serial_service, page_config):
+        """页面的TCP连接状态：共用网关连接的页面按共享连接是否已建立判断"""
+        if not page_config.get("tcp_connected"):
+            return False
+        pool = self.shared_pool(serial_service, page_config)
+        if pool is None:
+            return True
+        stats = pool.stats(page_config.get("tcp_server_ip"), page_config.get("tcp_server_port"))
+        return bool(stats and stats["connected"])
+    
+    def _transact(self, serial_service, page, tcp_socket, query, expected_length, prefix_len=0):
+        """发送问询帧并接收应答帧，返回(应答数据, 耗时)
+
+        网关在途窗口为1时在页面连接上停等；大于1时通过网关共享连接流水线发送，
+        应答按LoRa地址前缀和从机地址/功能码匹配。Modbus-TCP网关使用MBAP连接，
+        应答按事务标识匹配。
+        """
+        page_config = serial_service.get_page(page)
+        node = node_key(page_config)
+        timeout = serial_service.rtt.timeout(node)
+        if page_config.get("network_type") == "modbus_tcp":
+            # Modbus-TCP网关：RTU帧转换为MBAP请求，应答按事务标识匹配后还原为RTU帧
+            connection = serial_service.mbap.get(page_config.get("tcp_server_ip"), page_config.get("tcp_server_port"), page)
+            unit_id, pdu = rtu_to_pdu(query)
+            response_pdu, elapsed_time = connection.transact(unit_id, pdu, timeout)
+            if response_pdu is None:
+                logger.info("【%s页面】Modbus-TCP在途窗口已满，跳过本次问询", page)
+                return b"", elapsed_time
+            response_data = pdu_to_rtu(unit_id, response_pdu) if response_pdu else b""
+        elif Config.GATEWAY_WINDOW <= 1:
+            # 先处理连接中已到达的迟到应答，只接受与本次问询相符的应答帧
+            session = self._session(page_config)
+            session.drain(tcp_socket)
+            tcp_socket.sendall(query)
+            logger.debug("【%s页面】TCP发送问询帧成功，等待应答帧...", page)
+            tag = ResponseTag.from_query(query, expected_length, prefix_len)
+            response_data, elapsed_time = session.receive(tcp_socket, tag, expected_length, timeout)
         else:
-            target_bytes = b""
-            print(f"【{page}页面】使用标准网络")
-        
-        # 如果是LoRa网络，调整预期响应长度以包含目标地址前缀
-        if network_type == "lora" and len(target_bytes) == 2:
-            expected_response_length += len(target_bytes)
-            print(f"【{page}页面】调整预期响应长度为: {expected_response_length} 字节")
-        
-        temp_query_str = ' '.join([f'{b:02X}' for b in temp_query_to_send])
-        print(f"【{page}页面】发送温湿度问询帧: {temp_query_str}")
-        
-        # 使用保持的TCP连接发送数据
-        response_data = b""
-        try:
-            tcp_socket.sendall(temp_query_to_send)
-            print(f"【{page}页面】TCP发送问询帧成功")
-            
-            print(f"【{page}页面】等待TCP应答帧...")
-            start_time = time.time()
-            response_data = b""
-            # 多次尝试接收，确保收到完整的应答帧
-            while time.time() - start_time < 2:  # 2秒超时
-                try:
-                    chunk = tcp_socket.recv(1024)
-                    if chunk:
-                        response_data += chunk
-                        # 如果收到了足够长度的数据，停止接收
-                        if len(response_data) >= expected_response_length:
-                            break
-                    else:
-                        time.sleep(0.1)
-                except socket.timeout:
-                    # 超时是正常的，继续等待
-                    time.sleep(0.1)
-                    continue
-            
-            elapsed_time = time.time() - start_time
-            print(f"【{page}页面】收到TCP应答帧（耗时: {elapsed_time:.2f}秒）: {[f'{b:02X}' for b in response_data]}")
-            
-        except ConnectionResetError:
-            print(f"【{page}页面】TCP连接被重置，尝试重新连接")
-            page_config["tcp_connected"] = False
-            if page_config.get("tcp_socket"):
-                try:
-                    page_config["tcp_socket"].close()
-                except:
-                    pass
-                page_config["tcp_socket"] = None
-        except ConnectionRefusedError:
-            print(f"【{page}页面】TCP连接被拒绝，请检查服务器是否运行")
-            page_config["tcp_connected"] = False
-        except Exception as e:
-            print(f"【{page}页面】TCP通信错误: {str(e)}")
-            page_config["tcp_connected"] = False
-        
-        print(f"【{page}页面】收到温湿度应答帧长度: {len(response_data)}")
-        print(f"【{page}页面】温湿度应答帧内容: {[f'{b:02X}' for b in response_data]}")
-        
-        page_config = serial_service.pages.get(page, serial_service.pages["temperature"])
-        if len(response_data) >= expected_response_length:
-            target_address_match = True
-            if network_type == "lora" and len(response_data) >= len(target_bytes):
-                response_target_bytes = response_data[:len(target_bytes)]
-                response_target_address = ''.join([f'{b:02X}' for b in response_target_bytes]).upper()
-                actual_target_address = response_target_address
-                
-                if response_target_address != extracted_address.upper():
-                    print(f"【{page}页面】目标地址不匹配，预期: {extracted_address.upper()}，实际: {response_target_address}")
-                    target_address_match = False
-                else:
-                    print(f"【{page}页面】目标地址匹配: {response_target_address}")
-            
-            if target_address_match:
-                actual_modbus_response = response_data
-                
-                # 不手动移除LoRa前缀，让parse_temperature_response函数处理
-                # 这样与串口处理保持一致
-                print(f"【{page}页面】直接使用完整应答帧进行解析，长度: {len(actual_modbus_response)} 字节")
-                
-                if len(actual_modbus_response) >= 7:
-                    temp_result = parse_temperature_response(actual_modbus_response)
-                    if temp_result:
-                        page_config["data"] = {
-                            "temperature": temp_result["temperature"],
-                            "humidity": temp_result["humidity"],
-                            "timestamp": timestamp
-                        }
-                        print(f"【{page}页面】解析到温湿度数据: {page_config['data']}")
-                        if actual_target_address:
-                            print(f"【{page}页面】目标地址: {actual_target_address}")
-                    else:
-                        print(f"【{page}页面】温湿度解析失败，保持之前的数据")
-                        page_config["data"]["timestamp"] = timestamp
-                else:
-                    print(f"【{page}页面】温湿度应答帧长度不足，保持之前的数据")
-                    page_config["data"]["timestamp"] = timestamp
-            else:
-                print(f"【{page}页面】目标地址不匹配，跳过解析")
-                page_config["data"]["timestamp"] = timestamp
+            connection = serial_service.gateways.get(page_config.get("tcp_server_ip"), page_config.get("tcp_server_port"), page)
+            response_data, elapsed_time = connection.transact(query, expected_length, timeout, prefix_len)
+            if response_data is None:
+                logger.info("【%s页面】网关在途窗口已满，跳过本次问询", page)
+                return b"", elapsed_time
+        
+        if len(response_data) >= expected_length:
+            serial_service.rtt.observe(node, elapsed_time)
+            serial_service.breaker.success(node)
         else:
-            print(f"【{page}页面】未收到应答帧，使用默认数据")
-            page_config["data"] = {
-                "temperature": 25.5,
-                "humidity": 60.0,
-                "timestamp": timestamp
-            }
-        
-        # 保存帧数据
-        self.frame_handler.save_frame_data(
-            serial_service, page, "tcp", temp_query_to_send, response_data,
-            network_type, target_address, target_bytes, timestamp, tcp_server_ip, tcp_server_port, local_address
-        )
+            logger.info("【%s页面】节点应答超时（等待 %.3f 秒），下次等待时间加倍", page, timeout)
+            serial_service.rtt.backoff(node)
+            serial_service.breaker.failure(node)
+        return response_data, elapsed_time
     
-    def _handle_vibration_communication(self, serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp):
-        """处理温振模块的TCP通讯"""
-        # 尝试使用保存的问询帧
-        vib_query_to_send = None
-        expected_response_length = 13  # 包含LoRa地址的完整长度
-        actual_target_address = ""
-        target_bytes = b""
-        
-        page_config = serial_service.pages.get(page, serial_service.pages["vibration"])
-        
-        if "serial_config" in page_config and "query_frame" in page_config["serial_config"] and page_config["serial_config"]["query_frame"]:
-            # 使用保存的问询帧
-            try:
-                hex_frame = page_config["serial_config"]["query_frame"].replace(" ", "")
-                vib_query_to_send = bytearray.fromhex(hex_frame)
-                expected_response_length = len(vib_query_to_send) + 5  # 估计响应长度
-                print(f"【{page}页面】使用保存的温振问询帧: {page_config['serial_config']['query_frame']}")
-            except ValueError:
-                print(f"【{page}页面】无效的问询帧格式，使用默认问询帧")
-                vib_query_to_send = None
-        
-        if not vib_query_to_send:
-            # 构建默认问询帧（38个寄存器，0000-0025）
-            vib_query = build_modbus_query(
-                slave_id=0x01,
-                function_code=0x03,
-                start_address=0x0000,
-                register_count=0x0026
-            )
-            
-            vib_query_to_send = vib_query
-            expected_response_length = 81  # 1+1+1+76+2 = 81字节（38个寄存器的应答帧）
-        
-        # 确保问询帧包含LoRa目的地址
-        extracted_address = target_address
-        if network_type == "lora":
-            print(f"【{page}页面】使用LoRa网络，添加目标地址前缀")
+    def _attach(self, page_config, link):
+        """连接建立后作为页面的TCP连接使用，返回套接字"""
+        page_config["tcp_socket"] = link.sock
+        page_config["tcp_session"] = SocketSession()
+        page_config["tcp_connected"] = True
+        return link.sock
+    
+    def _drop_connection(self, page_config, error):
+        """关闭出错的页面连接，按退避时间重连
+
+        共用网关连接的页面没有页面连接，共享连接出错时自行关闭并按退避时间重连，
+        页面保持打开状态。
+        """
+        if uses_shared_connection(page_config):
+            return
+        page_config["tcp_connected"] = False
+        link = page_config.get("tcp_link")
+        if link is not None and link.sock is page_config.get("tcp_socket"):
+            link.fail(error)
+        elif page_config.get("tcp_socket"):
             try:
-                # 将目标地址转换为字节数组并添加到问询帧前面
-                target_bytes = bytearray.fromhex(target_address)
-                if len(target_bytes) == 2:
-                    # 检查问询帧是否已经包含目标地址
-                    if len(vib_query_to_send) >= 10 and vib_query_to_send[:2] == target_bytes:
-                        print(f"【{page}页面】问询帧已包含目标地址，使用现有帧")
-                    else:
-                        # 添加目标地址前缀
-                        vib_query_to_send = target_bytes + vib_query_to_send
-                        print(f"【{page}页面】已添加目标地址前缀: {target_address}")
-                    extracted_address = target_address
-                else:
-                    target_bytes = b""
-                    print(f"【{page}页面】目标地址长度错误，应为2字节")
-            except ValueError:
-                target_bytes = b""
-                print(f"【{page}页面】无效的目标地址格式")
-        else:
-            target_bytes = b""
-            print(f"【{page}页面】使用标准网络")
-        
-        # 如果是LoRa网络，调整预期响应长度以包含目标地址前缀
-        if network_type == "lora" and len(target_bytes) == 2:
-            expected_response_length += len(target_bytes)
-            print(f"【{page}页面】调整预期响应长度为: {expected_response_length} 字节")
-        
-        vib_query_str = ' '.join([f'{b:02X}' for b in vib_query_to_send])
-        print(f"【{page}页面】发送温振问询帧: {vib_query_str}")
+                page_config["tcp_socket"].close()
+            except:
+                pass
+        page_config["tcp_socket"] = None
+    
+    def _session(self, page_config):
+        """获取页面TCP连接的问询/应答关联状态"""
+        session = page_config.get("tcp_session")
+        if session is None:
+            session = page_config["tcp_session"] = SocketSession()
+        return session
+    
+    def _run_plan(self, serial_service, page, plan, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp):
+        """按页面的问询计划完成一次问询：发送、接收、校验地址、解析并保存数据"""
+        page_config = serial_service.get_page(page)
+        profile = plan.profile
+        logger.debug("【%s页面】发送%s问询帧: %s", page, profile.name, plan.query_hex)
         
-        response_data = b""
+        responses = []
         try:
-            tcp_socket.sendall(vib_query_to_send)
-            print(f"【{page}页面】TCP发送温振问询帧成功")
+            for query, expected_length in plan.transactions:
+                # 按节点往返时延动态计算等待时间，收到完整的应答帧即停止接收
+                response_data, elapsed_time = self._transact(serial_service, page, tcp_socket, query, expected_length, len(plan.prefix))
+                logger.debug("【%s页面】收到TCP应答帧（耗时: %.2f秒）: %s", page, elapsed_time, HexFrame(response_data))
+                responses.append(response_data)
+                if len(response_data) < expected_length:
+                    # 一次读取失败则本轮问询失败，不再发送后续读取
+                    break
             
-            start_time = time.time()
-            response_data = b""
-            # 多次尝试接收，确保收到完整的应答帧（包括分两次返回的情况）
-            while time.time() - start_time < 2:  # 2秒超时
-                try:
-                    chunk = tcp_socket.recv(1024)
-                    if chunk:
-                        response_data += chunk
-                        print(f"【{page}页面】收到应答帧片段，长度: {len(chunk)} 字节，累计长度: {len(response_data)} 字节")
-                        # 对于温振传感器，我们需要等待更长时间以确保收到所有数据
-                        # 即使达到预期长度，也继续接收一小段时间，以防数据分两次返回
-                        if len(response_data) >= expected_response_length:
-                            # 继续接收一小段时间，以防数据分两次返回
-                            time.sleep(0.2)
-                            try:
-                                additional_chunk = tcp_socket.recv(1024)
-                                if additional_chunk:
-                                    response_data += additional_chunk
-                                    print(f"【{page}页面】收到额外应答帧片段，长度: {len(additional_chunk)} 字节，累计长度: {len(response_data)} 字节")
-                            except socket.timeout:
-                                pass
-                            break
-                    else:
-                        time.sleep(0.1)
-                except socket.timeout:
-                    # 超时是正常的，继续等待
-                    time.sleep(0.1)
-                    continue
-            
-            elapsed_time = time.time() - start_time
-            print(f"【{page}页面】收到TCP温振应答帧（耗时: {elapsed_time:.2f}秒）: {[f'{b:02X}' for b in response_data]}")
-            
-        except ConnectionResetError:
-            print(f"【{page}页面】TCP连接被重置，尝试重新连接")
-            page_config["tcp_connected"] = False
-            if page_config.get("tcp_socket"):
-                try:
-                    page_config["tcp_socket"].close()
-                except:
-                    pass
-                page_config["tcp_socket"] = None
-        except ConnectionRefusedError:
-            print(f"【{page}页面】TCP连接被拒绝，请检查服务器是否运行")
-            page_config["tcp_connected"] = False
+        except ConnectionResetError as e:
+            logger.warning("【%s页面】TCP连接被重置，尝试重新连接", page)
+            self._drop_connection(page_config, e)
+        except ConnectionRefusedError as e:
+            logger.warning("【%s页面】TCP连接被拒绝，请检查服务器是否运行", page)
+            self._drop_connection(page_config, e)
         except Exception as e:
-            print(f"【{page}页面】TCP通信错误: {str(e)}")
-            page_config["tcp_connected"] = False
-        
-        print(f"【{page}页面】收到温振应答帧长度: {len(response_data)}")
-        
-        page_config = serial_service.pages.get(page, serial_service.pages["vibration"])
+            logger.warning("【%s页面】TCP通信错误: %s", page, e)
+            if not uses_shared_connection(page_config):
+                page_config["tcp_connected"] = False
         
-        if len(response_data) >= expected_response_length:
-            target_address_match = True
-            if network_type == "lora" and len(response_data) >= len(target_bytes):
-                response_target_bytes = response_data[:len(target_bytes)]
-                response_target_address = ''.join([f'{b:02X}' for b in response_target_bytes]).upper()
-                actual_target_address = response_target_address
-                
-                if response_target_address != extracted_address.upper():
-                    print(f"【{page}页面】目标地址不匹配，预期: {extracted_address.upper()}，实际: {response_target_address}")
-                    target_address_match = False
-                else:
-                    print(f"【{page}页面】目标地址匹配: {response_target_address}")
-            
-            if target_address_match:
-                actual_modbus_response = response_data
-                
-                # 不手动移除LoRa前缀，让parse_vibration_response函数处理
-                # 这样与串口处理保持一致
-                print(f"【{page}页面】直接使用完整应答帧进行解析，长度: {len(actual_modbus_response)} 字节")
-                
-                # 使用温振传感器解析函数
-                if len(actual_modbus_response) >= 9:
-                    vib_result = parse_vibration_response(actual_modbus_response)
-                    if vib_result:
-                        page_config["data"] = vib_result
-                        page_config["data"]["timestamp"] = timestamp
-                        print(f"【{page}页面】解析到温振数据: 温度={vib_result['temperature']:.1f}°C")
-                        if actual_target_address:
-                            print(f"【{page}页面】目标地址: {actual_target_address}")
-                    else:
-                        print(f"【{page}页面】温振解析失败，保持之前的数据")
-                        if "data" in page_config:
-                            page_config["data"]["timestamp"] = timestamp
-                else:
-                    print(f"【{page}页面】温振应答帧长度不足，保持之前的数据")
-                    if "data" in page_config:
-                        page_config["data"]["timestamp"] = timestamp
-            else:
-                print(f"【{page}页面】目标地址不匹配，跳过解析")
-                if "data" in page_config:
-                    page_config["data"]["timestamp"] = timestamp
+        if len(plan.transactions) == 1:
+            response_data = responses[0] if responses else b""
+        elif len(responses) == len(plan.transactions):
+            # 多次读取的应答按寄存器地址拼装为一个应答帧
+            response_data = assemble_response(plan.reads, responses, plan.prefix, plan.slave_id)
         else:
-            print(f"【{page}页面】未收到应答帧，保持之前的数据")
-            if "data" in page_config:
-                page_config["data"]["timestamp"] = timestamp
-        
-        # 保存振动数据帧
-        self.frame_handler.save_frame_data(
-            serial_service, page, "tcp", vib_query_to_send, response_data,
-            network_type, target_address, target_bytes, timestamp, tcp_server_ip, tcp_server_port, local_address
-        )
+            response_data = b""
+        logger.debug("【%s页面】收到%s应答帧长度: %d", page, profile.name, len(response_data))
+        serial_service.apply_response(page, plan, response_data, timestamp)
+        
+        # 保存每次读取的帧数据
+        for (query, _), response in zip(plan.transactions, responses or [b""]):
+            self.frame_handler.save_frame_data(
+                serial_service, page, "tcp", query, response,
+                network_type, target_address, plan.prefix, timestamp, tcp_server_ip, tcp_server_port, local_address
+            )
     
     def _handle_config_communication(self, serial_service, page, tcp_socket, tcp_server_ip, tcp_server_port, local_address, network_type, target_address, timestamp):
         """处理配置页面的TCP通讯"""
         # 配置页面暂时不支持TCP，使用默认数据
-        print(f"【{page}页面】TCP模式暂不支持配置数据，使用默认数据")
-        page_config = serial_service.pages.get(page, serial_service.pages["config"])
+        logger.info("【%s页面】TCP模式暂不支持配置数据，使用默认数据", page)
+        page_config = serial_service.get_page(page, "config")
         page_config["data"]["timestamp"] = timestamp
         page_config["frame_data"]["query"] = "TCP模式暂不支持"
         page_config["frame_data"]["response"] = "TCP模式暂不支持"
@@ -0,0 +1,304 @@
+"""共享内存最新值表模块
+
+采集进程把每个设备/指标的最新值写入固定布局的共享内存，
+任意Web工作进程无锁读取，读取开销与工作进程数量无关。
+
+布局（小端序）：
+    表头 16字节: magic b'LVT1' | uint32 槽位容量 | uint32 已分配槽位数 | uint32 保留
+    槽位 64字节: 名称 40字节（"设备/指标"，UTF-8，0填充）| uint32 版本号 | uint32 数值类型
+                 | float64 数值 | float64 时间戳
+
+每个槽位使用seqlock：写入前后各将版本号加1，读者读到奇数版本号
+或前后版本号不一致时重读。只支持单个写入进程（进程内多个问询线程写入时加锁）；
+数值为None时存为NaN，整数按数值类型还原，状态文本等已知的文本值存为编号，
+其他非数值字段不写入共享内存。
+
+"设备/指标"超过40字节时设备部分改用设备名称的摘要（"#摘要/指标"），保证槽位名称
+与索引一致。每个设备另有一个指标名为空的记录槽位：
+- 其版本号作为整条记录的seqlock，写入一个设备的所有字段前后各加1，读者读取
+  该设备的全部槽位前后版本号一致才返回，不会混合两次采样的字段；
+- 其数值为完整性标志：最近一次写入的所有字段都已写入共享内存时为1，存在无法
+  存储的字段或槽位用尽时为0，读者据此决定是否需要改为通过IPC获取完整数据。
+"""
+
+import hashlib
+import math
+import struct
+import sys
+import threading
+from multiprocessing import shared_memory
+from app.config import Config
+from app.modbus import VIBRATION_STATUS_LEVELS
+
+TABLE_MAGIC = b'LVT1'
+HEADER = struct.Struct('<4sIII')
+SLOT_NAME_SIZE = 40
+SLOT_SIZE = 64
+SLOT_NAME = struct.Struct(f'<{SLOT_NAME_SIZE}s')
+SLOT_SEQ = struct.Struct('<I')
+SLOT_KIND = struct.Struct('<I')
+SLOT_VALUE = struct.Struct('<dd')
+SEQ_OFFSET = SLOT_NAME_SIZE
+KIND_OFFSET = SLOT_NAME_SIZE + 4
+VALUE_OFFSET = SLOT_NAME_SIZE + 8
+MAX_READ_RETRIES = 100
+KIND_FLOAT = 0
+KIND_INT = 1
+KIND_TEXT = 2
+TEXT_VALUES = VIBRATION_STATUS_LEVELS  # 按编号存储的文本值
+COMPLETE_METRIC = ""  # 设备记录槽位（记录版本号和完整性标志）的指标名
+
+
+def _hashed_device(device):
+    """设备名称过长时在槽位名称中使用的摘要"""
+    return "#" + hashlib.blake2b(device.encode('utf-8'), digest_size=6).hexdigest()
+
+
+def slot_name(device, metric):
+    """设备/指标对应的槽位名称，摘要后仍超过40字节时返回None"""
+    name = f"{device}/{metric}"
+    if len(name.encode('utf-8')) <= SLOT_NAME_SIZE:
+        return name
+    name = f"{_hashed_device(device)}/{metric}"
+    if len(name.encode('utf-8')) <= SLOT_NAME_SIZE:
+        return name
+    return None
+
+
+class _NoTracking:
+    """连接共享内存期间替代resource_tracker，跳过注册"""
+
+    @staticmethod
+    def register(name, rtype):
+        pass
+
+
+def _attach(name):
+    """连接已存在的共享内存，不让resource_tracker在本进程退出时删除它"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=False, track=False)
+    # Python 3.13之前读者连接也会被注册，进程退出时共享内存会被删除
+    tracker = shared_memory.resource_tracker
+    shared_memory.resource_tracker = _NoTracking
+    try:
+        return shared_memory.SharedMemory(name=name, create=False)
+    finally:
+        shared_memory.resource_tracker = tracker
+
+
+class LatestValueTable:
+    """设备/指标最新值表"""
+
+    def __init__(self, shm, owner=False):
+        """使用已创建或已连接的共享内存初始化（请使用create/attach）"""
+        self._shm = shm
+        self._buf = shm.buf
+        self.owner = owner
+        magic, self.capacity, _, _ = HEADER.unpack_from(self._buf, 0)
+        if magic != TABLE_MAGIC:
+            raise ValueError("共享内存不是最新值表")
+        self._index = {}  # 槽位名称 -> 槽位序号
+        self._devices = {}  # 设备 -> [(指标, 槽位序号)]
+        self._known = 0  # 已加载到索引中的槽位数
+        self._write_lock = threading.Lock()  # 同一进程内多个问询线程写入时串行分配和写入槽位
+
+    @classmethod
+    def create(cls, name=None, capacity=None):
+        """创建最新值表（由采集进程调用）"""
+        name = name or Config.LATEST_TABLE_NAME
+        capacity = capacity or Config.LATEST_TABLE_SLOTS
+        size = HEADER.size + capacity * SLOT_SIZE
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 上次采集进程异常退出遗留的共享内存：先标记失效（已连接的读者会重新连接），再删除重建
+            stale = shared_memory.SharedMemory(name=name, create=False)
+            stale.buf[:4] = b'\x00' * 4
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, TABLE_MAGIC, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=None):
+        """连接最新值表（由Web工作进程调用），不存在时返回None"""
+        try:
+            return cls(_attach(name or Config.LATEST_TABLE_NAME))
+        except FileNotFoundError:
+            return None
+
+    def is_valid(self):
+        """最新值表是否仍然有效（采集进程关闭或重建后失效）"""
+        return self._buf is not None and bytes(self._buf[:4]) == TABLE_MAGIC
+
+    def _used(self):
+        """已分配的槽位数"""
+        return HEADER.unpack_from(self._buf, 0)[2]
+
+    def _refresh_index(self):
+        """加载新分配的槽位到本进程索引"""
+        used = self._used()
+        for slot in range(self._known, used):
+            raw = SLOT_NAME.unpack_from(self._buf, HEADER.size + slot * SLOT_SIZE)[0]
+            name = raw.rstrip(b'\x00').decode('utf-8')
+            self._index[name] = slot
+            device, _, metric = name.partition('/')
+            self._devices.setdefault(device, []).append((metric, slot))
+        self._known = used
+
+    def _allocate(self, name):
+        """为新的设备/指标分配槽位（仅写入进程调用，name不超过40字节）"""
+        used = self._used()
+        if used >= self.capacity:
+            return None
+        SLOT_NAME.pack_into(self._buf, HEADER.size + used * SLOT_SIZE, name.encode('utf-8'))
+        # 先写名称再增加已分配数，读者看到新槽位时名称已经完整
+        HEADER.pack_into(self._buf, 0, TABLE_MAGIC, self.capacity, used + 1, 0)
+        self._refresh_index()
+        return used
+
+    def _slot(self, device, metric):
+        """获取设备/指标的槽位，不存在时分配，名称过长或槽位用尽时返回None"""
+        name = slot_name(device, metric)
+        if name is None:
+            return None
+        slot = self._index.get(name)
+        if slot is None:
+            slot = self._allocate(name)
+        return slot
+
+    def _bump_seq(self, slot):
+        """槽位版本号加1（奇数表示正在写入）"""
+        offset = HEADER.size + slot * SLOT_SIZE + SEQ_OFFSET
+        seq = SLOT_SEQ.unpack_from(self._buf, offset)[0]
+        SLOT_SEQ.pack_into(self._buf, offset, (seq + 1) & 0xFFFFFFFF)
+
+    def _write_slot(self, slot, value, kind, timestamp):
+        """按seqlock协议写入一个槽位"""
+        offset = HEADER.size + slot * SLOT_SIZE
+        self._bump_seq(slot)
+        SLOT_KIND.pack_into(self._buf, offset + KIND_OFFSET, kind)
+        SLOT_VALUE.pack_into(self._buf, offset + VALUE_OFFSET, float(value), float(timestamp))
+        self._bump_seq(slot)
+
+    @staticmethod
+    def _encode(value):
+        """字段值转换为(数值, 数值类型)，无法存储时返回None"""
+        if value is None:
+            return math.nan, KIND_FLOAT
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value, KIND_INT
+        if isinstance(value, float):
+            return value, KIND_FLOAT
+        if isinstance(value, str) and value in TEXT_VALUES:
+            return TEXT_VALUES.index(value), KIND_TEXT
+        return None
+
+    def write(self, device, data):
+        """写入设备的所有字段（整条记录在记录槽位的seqlock内写入），并记录是否包含全部字段"""
+        timestamp = data.get("timestamp") or 0.0
+        with self._write_lock:
+            record = self._slot(device, COMPLETE_METRIC)
+            if record is not None:
+                self._bump_seq(record)
+            complete = record is not None
+            for metric, value in data.items():
+                if metric == "timestamp":
+                    continue
+                encoded = self._encode(value)
+                slot = self._slot(device, metric) if encoded is not None else None
+                if slot is None:
+                    complete = False
+                    continue
+                self._write_slot(slot, encoded[0], encoded[1], timestamp)
+            if record is not None:
+                offset = HEADER.size + record * SLOT_SIZE
+                SLOT_KIND.pack_into(self._buf, offset + KIND_OFFSET, KIND_FLOAT)
+                SLOT_VALUE.pack_into(self._buf, offset + VALUE_OFFSET, 1.0 if complete else 0.0, float(timestamp))
+                self._bump_seq(record)
+
+    def _read_slot(self, slot):
+        """按seqlock协议读取一个槽位"""
+        offset = HEADER.size + slot * SLOT_SIZE
+        buf = self._buf
+        for _ in range(MAX_READ_RETRIES):
+            before = SLOT_SEQ.unpack_from(buf, offset + SEQ_OFFSET)[0]
+            if before & 1:
+                continue
+            kind = SLOT_KIND.unpack_from(buf, offset + KIND_OFFSET)[0]
+            value, timestamp = SLOT_VALUE.unpack_from(buf, offset + VALUE_OFFSET)
+            if SLOT_SEQ.unpack_from(buf, offset + SEQ_OFFSET)[0] == before:
+                return value, kind, timestamp
+        kind = SLOT_KIND.unpack_from(buf, offset + KIND_OFFSET)[0]
+        value, timestamp = SLOT_VALUE.unpack_from(buf, offset + VALUE_OFFSET)
+        return value, kind, timestamp
+
+    def _record_seq(self, record):
+        """设备记录槽位的版本号，没有记录槽位时返回0"""
+        if record is None:
+            return 0
+        return SLOT_SEQ.unpack_from(self._buf, HEADER.size + record * SLOT_SIZE + SEQ_OFFSET)[0]
+
+    def _read_record(self, slots):
+        """读取设备的全部槽位，返回(字段, 最新时间戳, 是否完整)"""
+        result = {}
+        latest = 0.0
+        complete = False
+        for metric, slot in slots:
+            value, kind, timestamp = self._read_slot(slot)
+            if metric == COMPLETE_METRIC:
+                complete = value == 1.0
+                continue
+            if math.isnan(value):
+                result[metric] = None
+            elif kind == KIND_INT:
+                result[metric] = int(value)
+            elif kind == KIND_TEXT:
+                result[metric] = TEXT_VALUES[int(value)]
+            else:
+                result[metric] = value
+            latest = max(latest, timestamp)
+        return result, latest, complete
+
+    def read(self, device, complete_only=False):
+        """读取设备所有指标的最新值，设备不存在时返回None
+
+        各字段来自同一次写入；complete_only为True时，最近一次写入未包含全部字段
+        （有无法存储的字段或槽位用尽）也返回None。
+        """
+        if self._known != self._used():
+            self._refresh_index()
+        slots = self._devices.get(device, []) + self._devices.get(_hashed_device(device), [])
+        if not slots:
+            return None
+        record = next((slot for metric, slot in slots if metric == COMPLETE_METRIC), None)
+        for _ in range(MAX_READ_RETRIES):
+            before = self._record_seq(record)
+            if before & 1:
+                continue
+            result, latest, complete = self._read_record(slots)
+            if self._record_seq(record) == before:
+                break
+        else:
+            # 写入方长时间占用记录时不保证一致，按不完整处理
+            result, latest, _ = self._read_record(slots)
+            complete = False
+        if complete_only and not complete:
+            return None
+        result["timestamp"] = latest
+        return result
+
+    def close(self):
+        """关闭共享内存（创建者同时标记失效并删除共享内存）"""
+        if self._buf is None:
+            return
+        if self.owner:
+            self._buf[:4] = b'\x00' * 4
+        self._buf = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
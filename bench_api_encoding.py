@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# API响应编码基准测试：10万行历史数据的编码耗时与传输字节数
+#
+# 用法: python bench_api_encoding.py [行数]
+
+import gzip
+import json
+import random
+import sys
+import time
+
+from app.encoding import orjson, brotli, pack_columns_f32
+from app.config import Config
+
+VIBRATION_FIELDS = [
+    "temperature", "frequency_x", "frequency_y", "frequency_z",
+    "velocity_x", "velocity_y", "velocity_z",
+    "acceleration_x", "acceleration_y", "acceleration_z",
+    "amplitude_peak", "amplitude_rms"
+]
+
+
+def build_history_rows(count):
+    """构造与 /api/history/data?table=vibration_history 相同结构的数据行"""
+    random.seed(42)
+    start = int(time.time()) - count * 2
+    rows = []
+    for i in range(count):
+        row = {name: round(random.uniform(0, 50), 1) for name in VIBRATION_FIELDS}
+        row["frequency_x"] = random.uniform(10, 200)
+        row["frequency_y"] = random.uniform(10, 200)
+        row["frequency_z"] = random.uniform(10, 200)
+        row["timestamp"] = start + i * 2
+        rows.append(row)
+    return rows
+
+
+def measure(func, repeat=3):
+    """多次执行取最短耗时，返回(结果, 毫秒)"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payload = {"status": "success", "range_type": "week", "data": build_history_rows(count)}
+    rows = payload["data"]
+
+    results = []
+
+    # 原始jsonify行为（调试模式下Flask会缩进2格并排序键）
+    body, ms = measure(lambda: json.dumps(payload, indent=2, sort_keys=True).encode('utf-8'))
+    results.append(("json 标准库（缩进，原行为）", ms, len(body)))
+
+    body, ms = measure(lambda: json.dumps(payload, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+    results.append(("json 标准库（紧凑）", ms, len(body)))
+    json_body = body
+
+    if orjson is not None:
+        body, ms = measure(lambda: orjson.dumps(payload, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        results.append(("orjson", ms, len(body)))
+        json_body = body
+    else:
+        results.append(("orjson（未安装）", None, None))
+
+    compressed, ms = measure(lambda: gzip.compress(json_body, compresslevel=Config.COMPRESS_GZIP_LEVEL))
+    results.append((f"JSON + gzip(level={Config.COMPRESS_GZIP_LEVEL})", ms, len(compressed)))
+
+    if brotli is not None:
+        compressed, ms = measure(lambda: brotli.compress(json_body, quality=Config.COMPRESS_BROTLI_QUALITY))
+        results.append((f"JSON + brotli(quality={Config.COMPRESS_BROTLI_QUALITY})", ms, len(compressed)))
+    else:
+        results.append(("JSON + brotli（未安装）", None, None))
+
+    binary, ms = measure(lambda: pack_columns_f32(rows, meta={"status": "success", "range_type": "week"}))
+    results.append(("format=f32 列式二进制", ms, len(binary)))
+
+    compressed, ms = measure(lambda: gzip.compress(binary, compresslevel=Config.COMPRESS_GZIP_LEVEL))
+    results.append(("format=f32 + gzip", ms, len(compressed)))
+
+    print(f"历史数据行数: {count}，每行字段数: {len(VIBRATION_FIELDS) + 1}")
+    print(f"{'编码方式':<36}{'耗时(ms)':>12}{'字节数':>14}")
+    for name, ms, size in results:
+        ms_text = f"{ms:.1f}" if ms is not None else "--"
+        size_text = f"{size:,}" if size is not None else "--"
+        print(f"{name:<36}{ms_text:>12}{size_text:>14}")
+    print("注: 压缩耗时不含JSON编码耗时")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""节点熔断模块测试"""
+
+import unittest
+from app.serial.breaker import CircuitBreaker
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """节点熔断模块测试类"""
+
+    def setUp(self):
+        """创建使用模拟时钟的熔断器"""
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=3, base_delay=10, max_delay=35, clock=self.clock)
+        self.node = ("192.168.0.80", 10125, "0003")
+
+    def fail(self, times):
+        """模拟节点连续未应答"""
+        for _ in range(times):
+            self.breaker.failure(self.node)
+
+    def test_trip_after_threshold(self):
+        """测试连续未应答达到阈值后熔断"""
+        self.fail(2)
+        self.assertTrue(self.breaker.allow(self.node))
+        self.fail(1)
+        self.assertFalse(self.breaker.allow(self.node))
+        stats = self.breaker.stats(self.node)
+        self.assertEqual(stats["state"], "open")
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(stats["probe_in"], 10)
+
+    def test_probe_backoff(self):
+        """测试探测失败后退避时间加倍并受上限限制"""
+        self.fail(3)
+        for delay in (10, 20, 35, 35):
+            self.clock.now += delay - 0.1
+            self.assertFalse(self.breaker.allow(self.node))
+            self.clock.now += 0.1
+            self.assertTrue(self.breaker.allow(self.node))
+            self.fail(1)
+
+    def test_recover_on_success(self):
+        """测试探测成功后恢复正常问询"""
+        self.fail(3)
+        self.clock.now += 10
+        self.assertTrue(self.breaker.allow(self.node))
+        self.breaker.success(self.node)
+        self.assertTrue(self.breaker.allow(self.node))
+        self.assertEqual(self.breaker.stats(self.node)["state"], "closed")
+
+        # 恢复后需要重新累计到阈值才会熔断
+        self.fail(2)
+        self.assertTrue(self.breaker.allow(self.node))
+
+    def test_nodes_independent(self):
+        """测试熔断只影响单个节点"""
+        self.fail(3)
+        other = ("192.168.0.80", 10125, "0002")
+        self.assertTrue(self.breaker.allow(other))
+        self.breaker.reset(self.node)
+        self.assertTrue(self.breaker.allow(self.node))
+
+
+if __name__ == '__main__':
+    unittest.main()
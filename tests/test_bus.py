@@ -0,0 +1,92 @@
+"""RS-485总线仲裁模块测试"""
+
+import threading
+import time
+import unittest
+from app.serial.bus import BusArbiter, bus_key, rtu_silence
+
+
+class FakeClock:
+    """可手动推进的时钟，sleep直接推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestBus(unittest.TestCase):
+    """RS-485总线仲裁模块测试类"""
+
+    def setUp(self):
+        """创建使用模拟时钟的仲裁器"""
+        self.clock = FakeClock()
+        self.arbiter = BusArbiter(clock=self.clock, sleep=self.clock.sleep)
+        self.bus = ("192.168.0.80", 10125, "0003")
+
+    def test_rtu_silence(self):
+        """测试RTU帧间静默时间"""
+        self.assertAlmostEqual(rtu_silence(9600), 3.5 * 11 / 9600)
+        self.assertAlmostEqual(rtu_silence(115200), 0.00175)
+
+    def test_bus_key(self):
+        """测试同一LoRa节点上的从机共用一条总线"""
+        page = {"tcp_server_ip": "192.168.0.80", "tcp_server_port": 10125, "target_address": "0003", "slave_id": 1}
+        self.assertEqual(bus_key(page), bus_key(dict(page, slave_id=2)))
+        self.assertNotEqual(bus_key(page), bus_key(dict(page, target_address="0004")))
+        self.assertEqual(bus_key({"communication_mode": "serial", "serial_config": {"port": "COM3"}}), ("serial", "COM3"))
+
+    def test_silence(self):
+        """测试相邻问询之间保留帧间静默时间"""
+        self.assertTrue(self.arbiter.acquire(self.bus, silence=0.004))
+        self.arbiter.release(self.bus)
+        self.assertTrue(self.arbiter.acquire(self.bus, silence=0.004))
+        self.arbiter.release(self.bus)
+        self.assertEqual(len(self.clock.slept), 1)
+        self.assertAlmostEqual(self.clock.slept[0], 0.004)
+        self.assertEqual(self.arbiter.stats(self.bus)["polls"], 2)
+
+    def test_fifo(self):
+        """测试等待总线的从机按到达顺序轮流问询"""
+        arbiter = BusArbiter()
+        order = []
+        self.assertTrue(arbiter.acquire(self.bus))
+
+        def poll(slave_id):
+            if arbiter.acquire(self.bus, timeout=2):
+                order.append(slave_id)
+                arbiter.release(self.bus)
+
+        threads = []
+        for slave_id in (2, 3, 4):
+            thread = threading.Thread(target=poll, args=(slave_id,))
+            thread.start()
+            threads.append(thread)
+            # 确保按顺序进入等待队列
+            while arbiter.stats(self.bus)["waiting"] < len(threads):
+                time.sleep(0.001)
+        arbiter.release(self.bus)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, [2, 3, 4])
+        self.assertEqual(arbiter.stats(self.bus)["max_waiting"], 3)
+
+    def test_timeout(self):
+        """测试总线繁忙超时后放弃本次问询，其他总线不受影响"""
+        arbiter = BusArbiter()
+        self.assertTrue(arbiter.acquire(self.bus))
+        self.assertFalse(arbiter.acquire(self.bus, timeout=0.05))
+        self.assertEqual(arbiter.stats(self.bus)["deferred"], 1)
+        self.assertTrue(arbiter.acquire(("192.168.0.80", 10125, "0004"), timeout=0.05))
+        arbiter.release(self.bus)
+        self.assertTrue(arbiter.acquire(self.bus, timeout=0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+"""网关连接建立模块测试"""
+
+import socket
+import time
+import unittest
+from app.serial.connector import ReconnectBackoff, TcpLink, STATE_CONNECTED, STATE_DISCONNECTED
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def closed_port():
+    """获取一个没有监听的本地端口"""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestReconnectBackoff(unittest.TestCase):
+    """重连退避测试类"""
+
+    def test_backoff(self):
+        """测试退避时间按失败次数加倍、带抖动且不超过上限，连接成功后清除"""
+        clock = FakeClock()
+        backoff = ReconnectBackoff(base_delay=1, max_delay=8, clock=clock, rng=lambda: 1.0)
+        self.assertTrue(backoff.ready())
+        self.assertEqual([backoff.failure() for _ in range(5)], [1, 2, 4, 8, 8])
+        self.assertFalse(backoff.ready())
+        clock.now += 8
+        self.assertTrue(backoff.ready())
+
+        # 抖动：退避时间在上限的一半到全部之间
+        jittered = ReconnectBackoff(base_delay=4, max_delay=8, clock=clock, rng=lambda: 0.0)
+        self.assertEqual(jittered.failure(), 2)
+
+        backoff.success()
+        self.assertEqual(backoff.failures, 0)
+        self.assertTrue(backoff.ready())
+
+
+class TestTcpLink(unittest.TestCase):
+    """页面TCP连接测试类"""
+
+    def test_connect(self):
+        """测试非阻塞建立连接并开启TCP保活"""
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        link = TcpLink(server.getsockname())
+        try:
+            self.assertTrue(link.connect(1.0))
+            self.assertEqual(link.state, STATE_CONNECTED)
+            self.assertEqual(link.sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE), 1)
+            self.assertTrue(link.connect())
+        finally:
+            link.close()
+            server.close()
+
+    def test_refused(self):
+        """测试连接失败后在退避期间不再发起连接"""
+        link = TcpLink(("127.0.0.1", closed_port()), backoff=ReconnectBackoff(base_delay=10))
+        self.assertFalse(link.connect(1.0))
+        self.assertEqual(link.state, STATE_DISCONNECTED)
+        self.assertEqual(link.backoff.failures, 1)
+        self.assertIsNotNone(link.error)
+
+        start = time.monotonic()
+        self.assertFalse(link.connect(1.0))
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(link.backoff.failures, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
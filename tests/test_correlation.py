@@ -0,0 +1,90 @@
+"""问询/应答关联模块测试"""
+
+import socket
+import unittest
+from app.modbus import build_modbus_query
+from app.serial.correlation import ResponseTag, SocketSession
+
+PREFIX = b'\x00\x03'
+
+
+def make_response(slave_id, values, prefix=PREFIX):
+    """构造读寄存器应答帧（CRC不参与匹配）"""
+    data = b"".join(value.to_bytes(2, "big") for value in values)
+    return prefix + bytes([slave_id, 0x03, len(data)]) + data + b'\x00\x00'
+
+
+class TestResponseTag(unittest.TestCase):
+    """预期应答特征测试类"""
+
+    def test_match(self):
+        """测试按地址前缀、从机地址、功能码和有效字节数匹配应答帧"""
+        tag = ResponseTag.from_query(build_modbus_query(0x01, 0x03, 0x0000, 0x0002, prefix=PREFIX), 11, 2)
+        self.assertEqual(tag.byte_count, 4)
+        response = make_response(0x01, (600, 255))
+        self.assertEqual(tag.match(response), 11)
+        self.assertEqual(tag.match(response[:6]), 0)
+        self.assertEqual(tag.match(response[:1]), 0)
+        # 其他从机、其他节点或读取个数不同的应答
+        self.assertEqual(tag.match(make_response(0x02, (600, 255))), -1)
+        self.assertEqual(tag.match(make_response(0x01, (600, 255), prefix=b'\x00\x04')), -1)
+        self.assertEqual(tag.match(make_response(0x01, (600, 255, 1))), -1)
+        # 异常应答
+        self.assertEqual(tag.match(PREFIX + b'\x01\x83\x02\x00\x00'), 7)
+
+        self.assertIsNone(ResponseTag.from_query(b'\x01\x03', 9))
+
+
+class TestSocketSession(unittest.TestCase):
+    """TCP连接问询/应答关联测试类"""
+
+    def setUp(self):
+        """创建本地套接字对模拟网关连接"""
+        self.client, self.gateway = socket.socketpair()
+        self.client.settimeout(0.5)
+        self.session = SocketSession()
+        self.query = build_modbus_query(0x01, 0x03, 0x0000, 0x0002, prefix=PREFIX)
+        self.tag = ResponseTag.from_query(self.query, 11, 2)
+
+    def tearDown(self):
+        """关闭套接字"""
+        self.client.close()
+        self.gateway.close()
+
+    def test_late_response(self):
+        """测试超时后到达的应答在下次发送前归属于上一次问询，不被当作新应答"""
+        response, _ = self.session.receive(self.client, self.tag, 11, 0.05)
+        self.assertEqual(response, b"")
+
+        # 上一次问询的应答迟到
+        self.gateway.sendall(make_response(0x01, (1, 1)))
+        self.session.drain(self.client)
+        self.gateway.sendall(make_response(0x01, (600, 255)))
+        response, _ = self.session.receive(self.client, self.tag, 11, 0.5)
+        self.assertEqual(response, make_response(0x01, (600, 255)))
+        self.assertEqual(self.session.stats(), {"answered": 1, "late_responses": 1, "discarded_bytes": 0})
+
+    def test_resync(self):
+        """测试丢弃应答帧之前的干扰数据和其他请求的迟到应答"""
+        self.session.late_tag = ResponseTag.from_query(build_modbus_query(0x01, 0x03, 0x0000, 0x0011, prefix=PREFIX), 41, 2)
+        self.gateway.sendall(b'\xff\xfe' + make_response(0x01, range(17)) + make_response(0x01, (600, 255)))
+        response, _ = self.session.receive(self.client, self.tag, 11, 0.5)
+        self.assertEqual(response, make_response(0x01, (600, 255)))
+        self.assertEqual(self.session.stats()["late_responses"], 1)
+        self.assertEqual(self.session.stats()["discarded_bytes"], 2)
+
+    def test_raw_frame(self):
+        """测试非Modbus问询帧按长度接收"""
+        self.gateway.sendall(b'\x01\x02\x03')
+        response, _ = self.session.receive(self.client, None, 3, 0.5)
+        self.assertEqual(response, b'\x01\x02\x03')
+
+    def test_closed(self):
+        """测试网关关闭连接"""
+        self.gateway.close()
+        with self.assertRaises(ConnectionResetError):
+            self.session.drain(self.client)
+
+
+if __name__ == '__main__':
+    unittest.main()
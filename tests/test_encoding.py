@@ -0,0 +1,129 @@
+"""响应编码模块测试"""
+
+import gzip
+import json
+import math
+import unittest
+from flask import Flask, jsonify
+from app.config import Config
+from app.encoding import (
+    FastJSONProvider,
+    compress_response,
+    numeric_fields,
+    pack_columns_f32,
+    unpack_columns_f32
+)
+
+
+class TestEncoding(unittest.TestCase):
+    """响应编码模块测试类"""
+
+    def test_numeric_fields(self):
+        """测试数值列提取"""
+        rows = [
+            {"temperature": 25.5, "status": "良好", "timestamp": 100, "version": None},
+            {"temperature": 26.0, "status": "良好", "timestamp": 101, "version": 3}
+        ]
+        self.assertEqual(numeric_fields(rows), ["timestamp", "temperature", "version"])
+
+    def test_round_trip(self):
+        """测试打包后再解析得到相同数据"""
+        rows = [
+            {"temperature": 25.5, "humidity": 60.0, "timestamp": 1700000000.7},
+            {"temperature": -3.25, "humidity": None, "timestamp": 1700000002}
+        ]
+        payload = pack_columns_f32(rows, meta={"status": "success", "last_ts": 1700000002})
+        header, columns = unpack_columns_f32(payload)
+
+        self.assertEqual(header["status"], "success")
+        self.assertEqual(header["last_ts"], 1700000002)
+        self.assertEqual(columns["timestamp"], [1700000000.7, 1700000002.0])
+        self.assertEqual(columns["temperature"], [25.5, -3.25])
+        self.assertEqual(columns["humidity"][0], 60.0)
+        self.assertTrue(math.isnan(columns["humidity"][1]))
+
+    def test_alignment(self):
+        """测试timestamp列排在最前且按8字节对齐"""
+        rows = [{"temperature": float(i), "timestamp": i} for i in range(7)]
+        payload = pack_columns_f32(rows, fields=["temperature", "timestamp"], meta={"device": "温湿度"})
+        self.assertEqual(len(payload) % 4, 0)
+        header_len = int.from_bytes(payload[4:8], 'little')
+        self.assertEqual(header_len % 8, 0)
+        self.assertEqual(len(payload), 16 + header_len + 7 * 8 + 7 * 4)
+        header, columns = unpack_columns_f32(payload)
+        self.assertEqual([column["name"] for column in header["columns"]], ["timestamp", "temperature"])
+        self.assertEqual(columns["timestamp"], [float(i) for i in range(7)])
+
+    def test_empty_rows(self):
+        """测试空数据"""
+        header, columns = unpack_columns_f32(pack_columns_f32([]))
+        self.assertEqual(header["columns"], [])
+        self.assertEqual(columns, {})
+
+    def test_smaller_than_json(self):
+        """测试二进制格式明显小于JSON格式"""
+        fields = ["temperature", "velocity_x", "velocity_y", "velocity_z",
+                  "acceleration_x", "acceleration_y", "acceleration_z"]
+        rows = [dict({name: 12.345678 + i for name in fields}, timestamp=1700000000 + i) for i in range(1000)]
+        payload = pack_columns_f32(rows)
+        self.assertLess(len(payload) * 4, len(json.dumps(rows)))
+
+    def test_invalid_magic(self):
+        """测试无效的数据头"""
+        with self.assertRaises(ValueError):
+            unpack_columns_f32(b'XXXX' + b'\x00' * 12)
+
+
+class TestResponseEncoding(unittest.TestCase):
+    """JSON编码与响应压缩测试类"""
+
+    def setUp(self):
+        """创建测试用Flask应用"""
+        self.app = Flask(__name__)
+        self.app.json = FastJSONProvider(self.app)
+        self.app.after_request(compress_response)
+        self.rows = [{"temperature": 25.5 + i, "humidity": 60.0, "timestamp": 1700000000 + i} for i in range(200)]
+
+        @self.app.route('/rows')
+        def rows():
+            return jsonify({"status": "success", "data": self.rows})
+
+        @self.app.route('/small')
+        def small():
+            return jsonify({"status": "success", 1: "整数键"})
+
+        self.client = self.app.test_client()
+
+    def test_fast_json_provider(self):
+        """测试JSON编码结果与标准库一致且为紧凑格式"""
+        response = self.client.get('/small')
+        self.assertEqual(json.loads(response.get_data()), {"status": "success", "1": "整数键"})
+        self.assertNotIn(b'\n  ', response.get_data())
+
+    def test_gzip_compression(self):
+        """测试超过阈值的响应按Accept-Encoding进行gzip压缩"""
+        response = self.client.get('/rows', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        data = json.loads(gzip.decompress(response.get_data()))
+        self.assertEqual(data["data"], self.rows)
+
+    def test_no_compression(self):
+        """测试未声明支持压缩或响应较小时不压缩"""
+        response = self.client.get('/rows')
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        response = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+        original = Config.COMPRESS_ENABLED
+        Config.COMPRESS_ENABLED = False
+        try:
+            response = self.client.get('/rows', headers={'Accept-Encoding': 'gzip'})
+            self.assertNotIn('Content-Encoding', response.headers)
+        finally:
+            Config.COMPRESS_ENABLED = original
+
+
+if __name__ == '__main__':
+    unittest.main()
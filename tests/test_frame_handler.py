@@ -0,0 +1,122 @@
+"""帧数据处理模块测试"""
+
+import unittest
+from datetime import datetime
+from app.serial.frame_handler import FrameHandler, FrameHistory, FrameRecord, format_hex, render_frame_data
+
+
+class FakeService:
+    """只提供页面配置的串口服务"""
+
+    def __init__(self):
+        self.pages = {}
+
+    def get_page(self, page):
+        return self.pages.setdefault(page, {})
+
+
+class TestFrameHandler(unittest.TestCase):
+    """帧数据处理模块测试类"""
+
+    def setUp(self):
+        """创建帧数据处理器"""
+        self.service = FakeService()
+        self.handler = FrameHandler()
+        self.timestamp = datetime(2024, 5, 1, 12, 30, 15, 250000).timestamp()
+
+    def test_format_hex(self):
+        """测试格式化为空格分隔的大写十六进制"""
+        self.assertEqual(format_hex(b'\x00\x03\xab'), "00 03 AB")
+        self.assertEqual(format_hex(bytearray()), "")
+
+    def test_raw_storage(self):
+        """测试问询线程只保存原始字节，读取时才生成十六进制字符串"""
+        query = bytearray(b'\x00\x03\x01\x03\x00\x00\x00\x02\xc4\x0b')
+        self.handler.save_frame_data(
+            self.service, "light", "tcp", query, b'\x00\x03\x01\x03\x04\x02\x58\x00\xff\x3a\x18',
+            "lora", "0003", b'\x00\x03', self.timestamp, "192.168.0.80", 10125, ("192.168.0.10", 50000)
+        )
+        frame_data = self.service.pages["light"]["frame_data"]
+        self.assertEqual(frame_data["query"], bytes(query))
+        self.assertIsInstance(frame_data["frames"].since()[0].data, bytes)
+
+        rendered = render_frame_data(frame_data)
+        self.assertEqual(rendered["query"], "00 03 01 03 00 00 00 02 C4 0B")
+        self.assertEqual(rendered["target_address"], "0003")
+        self.assertEqual(rendered["seq"], 2)
+        self.assertEqual(rendered["frames"][0], {
+            "seq": 1,
+            "direction": "send",
+            "type": "query",
+            "timestamp": "2024-05-01 12:30:15.250",
+            "length": 10,
+            "data": "00 03 01 03 00 00 00 02 C4 0B",
+            "data_frame": "01 03 00 00 00 02 C4 0B",
+            "ip": "192.168.0.80",
+            "port": 10125,
+            "ip_frame": "TCP 192.168.0.10:50000 -> 192.168.0.80:10125"
+        })
+        self.assertEqual(rendered["frames"][1]["ip_frame"], "TCP 192.168.0.80:10125 -> 192.168.0.10:50000")
+
+    def test_serial_frames(self):
+        """测试串口通讯无应答时只记录问询帧，按序号增量获取新帧"""
+        for _ in range(3):
+            self.handler.save_frame_data(self.service, "light", "serial", b'\x01\x03', b"", "standard", "", b"", self.timestamp)
+        rendered = render_frame_data(self.service.pages["light"]["frame_data"], since=1)
+        self.assertEqual([frame["seq"] for frame in rendered["frames"]], [2, 3])
+        self.assertEqual(render_frame_data(self.service.pages["light"]["frame_data"], since=3)["frames"], [])
+        self.assertEqual(rendered["response"], "")
+        self.assertEqual((rendered["frames"][-1]["ip_frame"], rendered["frames"][-1]["data_frame"]), ("", ""))
+
+        # 说明文字原样返回
+        self.service.pages["light"]["frame_data"]["query"] = "TCP模式暂不支持"
+        self.assertEqual(render_frame_data(self.service.pages["light"]["frame_data"])["query"], "TCP模式暂不支持")
+
+
+class TestFrameHistory(unittest.TestCase):
+    """帧数据历史记录环形缓冲区测试类"""
+
+    def make_frame(self, size):
+        """构造指定长度的应答帧"""
+        return FrameRecord("recv", "response", 0, bytes(size), 0, "serial")
+
+    def test_count_limit(self):
+        """测试超过条数上限时丢弃最早的帧"""
+        history = FrameHistory(capacity=3, max_bytes=1000)
+        for _ in range(5):
+            history.append(self.make_frame(10))
+        self.assertEqual([frame.seq for frame in history.since()], [3, 4, 5])
+        self.assertEqual(history.size_bytes, 30)
+
+    def test_byte_limit(self):
+        """测试超过字节总数上限时丢弃最早的帧，至少保留最新一帧"""
+        history = FrameHistory(capacity=10, max_bytes=100)
+        for size in (40, 40, 40):
+            history.append(self.make_frame(size))
+        self.assertEqual([frame.seq for frame in history.since()], [2, 3])
+        history.append(self.make_frame(300))
+        self.assertEqual([frame.seq for frame in history.since()], [4])
+        self.assertEqual(history.size_bytes, 300)
+
+    def test_clear(self):
+        """测试清空后序号继续递增"""
+        history = FrameHistory(capacity=10, max_bytes=100)
+        history.append(self.make_frame(1))
+        history.clear()
+        self.assertEqual((len(history), history.size_bytes), (0, 0))
+        history.append(self.make_frame(1))
+        self.assertEqual(history.since(1)[0].seq, 2)
+
+    def test_resync(self):
+        """测试页面序号大于最后一帧序号（采集进程重启）时返回全部历史记录"""
+        history = FrameHistory(capacity=10, max_bytes=100)
+        for _ in range(3):
+            history.append(self.make_frame(1))
+        self.assertEqual([frame.seq for frame in history.since(50)], [1, 2, 3])
+        self.assertEqual(history.since(3), [])
+        rendered = render_frame_data({"frames": history}, since=50)
+        self.assertEqual((len(rendered["frames"]), rendered["seq"]), (3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
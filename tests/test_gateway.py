@@ -0,0 +1,156 @@
+"""网关共享连接模块测试"""
+
+import socket
+import threading
+import time
+import unittest
+from app.serial.gateway import GatewayConnection, GatewayPool
+
+# 各LoRa地址节点的应答延时（秒），None表示不应答
+NODE_DELAYS = {b'\x00\x02': 0.3, b'\x00\x03': 0.1, b'\x00\x04': None}
+
+
+class FakeGateway:
+    """模拟LoRa网关：按目标地址延时返回应答帧"""
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.address = self.server.getsockname()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        """接收问询帧（每帧10字节）并在延时后应答"""
+        try:
+            conn, _ = self.server.accept()
+        except OSError:
+            return
+        lock = threading.Lock()
+        while True:
+            query = conn.recv(10)
+            if not query:
+                break
+            delay = NODE_DELAYS.get(query[:2])
+            if delay is None:
+                continue
+            if query[3] == 0x04:
+                # 异常应答：非法功能码
+                response = query[:2] + bytes([query[2], 0x84, 0x01, 0x00, 0x00])
+            else:
+                response = query[:4] + b'\x04\x01\x02\x03\x04\x00\x00'
+            threading.Timer(delay, self.reply, args=(conn, lock, response)).start()
+
+    def reply(self, conn, lock, response):
+        """发送应答帧"""
+        with lock:
+            conn.sendall(response)
+
+    def close(self):
+        """关闭模拟网关"""
+        self.server.close()
+
+
+class TestGatewayConnection(unittest.TestCase):
+    """网关共享连接模块测试类"""
+
+    def setUp(self):
+        """启动模拟网关"""
+        self.gateway = FakeGateway()
+        self.connection = GatewayConnection(self.gateway.address, window=4)
+
+    def tearDown(self):
+        """关闭连接和模拟网关"""
+        self.connection.close()
+        self.gateway.close()
+
+    def query(self, address, function=0x03):
+        """构造带LoRa地址前缀的问询帧"""
+        return address + bytes([0x01, function, 0x00, 0x00, 0x00, 0x02, 0x00, 0x00])
+
+    def test_pipelined_sweep(self):
+        """测试发往不同节点的问询连续发出，总耗时接近最大往返时延"""
+        results = {}
+
+        def poll(address):
+            results[address] = self.connection.transact(self.query(address), 11, 1.0, prefix_len=2)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=poll, args=(address,)) for address in (b'\x00\x02', b'\x00\x03')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.38)
+        self.assertEqual(results[b'\x00\x02'][0][:2], b'\x00\x02')
+        self.assertEqual(results[b'\x00\x03'][0][:2], b'\x00\x03')
+        self.assertLess(results[b'\x00\x03'][1], results[b'\x00\x02'][1])
+        self.assertEqual(self.connection.stats()["answered"], 2)
+
+    def test_timeout(self):
+        """测试无应答节点按各自超时返回，不影响其他节点"""
+        response, _ = self.connection.transact(self.query(b'\x00\x04'), 11, 0.2, prefix_len=2)
+        self.assertEqual(response, b"")
+        self.assertEqual(self.connection.stats()["timeouts"], 1)
+
+        response, _ = self.connection.transact(self.query(b'\x00\x03'), 11, 1.0, prefix_len=2)
+        self.assertEqual(len(response), 11)
+
+    def test_exception_response(self):
+        """测试匹配Modbus异常应答"""
+        response, _ = self.connection.transact(self.query(b'\x00\x03', 0x04), 11, 1.0, prefix_len=2)
+        self.assertEqual(response, b'\x00\x03\x01\x84\x01\x00\x00')
+
+    def test_discard_unmatched(self):
+        """测试丢弃无法匹配任何在途请求的数据"""
+        buffer = bytearray(b'\xff\xfe')
+        self.connection._match(buffer)
+        self.assertEqual(buffer, bytearray())
+        self.assertEqual(self.connection.stats()["discarded_bytes"], 2)
+
+    def test_connect_refused(self):
+        """测试连接失败后在退避期间直接放弃问询"""
+        self.gateway.close()
+        connection = GatewayConnection(self.gateway.address, window=4)
+        with self.assertRaises(ConnectionError):
+            connection.transact(self.query(b'\x00\x03'), 11, 1.0, prefix_len=2)
+        self.assertEqual(connection.backoff.failures, 1)
+
+        start = time.monotonic()
+        with self.assertRaises(ConnectionRefusedError):
+            connection.transact(self.query(b'\x00\x03'), 11, 1.0, prefix_len=2)
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertFalse(connection.stats()["connected"])
+
+
+class FakeConnection:
+    """只记录是否关闭的共享连接"""
+
+    def __init__(self, address):
+        self.address = address
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestGatewayPool(unittest.TestCase):
+    """网关共享连接池测试类"""
+
+    def test_release(self):
+        """测试只在最后一个使用连接的页面关闭时关闭共享连接"""
+        pool = GatewayPool(FakeConnection)
+        connection = pool.get("192.168.0.80", 502, "temperature")
+        self.assertIs(pool.get("192.168.0.80", 502, "vibration"), connection)
+
+        pool.release("temperature")
+        self.assertFalse(connection.closed)
+        pool.release("vibration")
+        self.assertTrue(connection.closed)
+        self.assertIsNot(pool.get("192.168.0.80", 502, "vibration"), connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
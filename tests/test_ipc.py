@@ -0,0 +1,102 @@
+"""采集进程通讯模块测试"""
+
+import os
+import tempfile
+import threading
+import unittest
+from app.ipc import AcquisitionServer, AcquisitionClient
+from app.shm import LatestValueTable
+
+
+class FakeSerialService:
+    """模拟串口服务"""
+
+    def __init__(self):
+        self.interval = 2
+
+    def get_serial_status(self, page="light"):
+        return {"page": page, "query_interval": self.interval}
+
+    def update_query_interval(self, interval, page="light"):
+        self.interval = interval
+        return True, f"{page}页面问询周期已更新为 {interval} 秒"
+
+    def get_readings_since(self, page, timestamp=0):
+        raise ValueError("读取失败")
+
+    def get_vibration_data(self):
+        return {"temperature": 30.0, "status": "良好", "version": 3, "timestamp": 5.0}
+
+    def get_sensor_data(self, page="temperature"):
+        return {"temperature": 0.0, "humidity": 0.0, "timestamp": 0.0}
+
+
+class TestAcquisitionIPC(unittest.TestCase):
+    """采集进程通讯模块测试类"""
+
+    def setUp(self):
+        """启动IPC服务端"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "acquisition.sock")
+        self.service = FakeSerialService()
+        self.server = AcquisitionServer(self.service, self.path)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.client = AcquisitionClient(self.path, timeout=2)
+
+    def tearDown(self):
+        """关闭IPC服务端"""
+        self.client._close()
+        self.server.shutdown()
+        self.server.server_close()
+        os.rmdir(self.temp_dir)
+
+    def test_call(self):
+        """测试通过代理调用服务方法"""
+        status = self.client.get_serial_status("vibration")
+        self.assertEqual(status, {"page": "vibration", "query_interval": 2})
+
+        success, message = self.client.update_query_interval(5, page="temperature")
+        self.assertTrue(success)
+        self.assertIn("temperature", message)
+        self.assertEqual(self.service.interval, 5)
+
+    def test_latest_fallback(self):
+        """测试共享内存中的数据完整时直接返回，包含无法存储的字段时通过IPC获取"""
+        name = f"iot_test_ipc_{os.getpid()}"
+        table = LatestValueTable.create(name, capacity=16)
+        try:
+            self.client._latest_table = LatestValueTable.attach(name)
+            table.write("temperature", {"temperature": 25.5, "humidity": 60.0, "timestamp": 10.0})
+            self.assertEqual(self.client.get_sensor_data("temperature"),
+                             {"temperature": 25.5, "humidity": 60.0, "timestamp": 10.0})
+
+            # 状态等级按编号存储，温振数据直接从共享内存返回
+            table.write("vibration", {"temperature": 31.0, "status": "警告", "version": 3, "timestamp": 6.0})
+            self.assertEqual(self.client.get_vibration_data(),
+                             {"temperature": 31.0, "status": "警告", "version": 3, "timestamp": 6.0})
+
+            table.write("vibration", {"temperature": 30.0, "status": "未知", "version": 3, "timestamp": 7.0})
+            self.assertEqual(self.client.get_vibration_data()["status"], "良好")
+        finally:
+            self.client._latest_table.close()
+            table.close()
+
+    def test_error(self):
+        """测试服务端异常和不允许的方法"""
+        with self.assertRaises(RuntimeError):
+            self.client.get_readings_since("temperature", 0)
+        with self.assertRaises(RuntimeError):
+            self.client.call("__init__")
+        with self.assertRaises(AttributeError):
+            self.client.serial_handler
+
+    def test_reconnect(self):
+        """测试连接失效后自动重连"""
+        self.client.get_serial_status()
+        self.client._local.sock.close()
+        self.assertEqual(self.client.get_serial_status("light")["page"], "light")
+
+
+if __name__ == '__main__':
+    unittest.main()
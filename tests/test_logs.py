@@ -0,0 +1,71 @@
+"""日志模块测试"""
+
+import io
+import logging
+import logging.handlers
+import queue
+import threading
+import unittest
+from app.logs import HexFrame, _QueueHandler, parse_levels
+
+
+class Probe:
+    """记录格式化发生在哪个线程"""
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return "probe"
+
+
+class TestLogs(unittest.TestCase):
+    """日志模块测试类"""
+
+    def setUp(self):
+        """创建经队列写出的独立日志器"""
+        self.stream = io.StringIO()
+        handler = logging.StreamHandler(self.stream)
+        handler.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+        log_queue = queue.SimpleQueue()
+        self.listener = logging.handlers.QueueListener(log_queue, handler)
+        self.listener.start()
+        self.logger = logging.getLogger("test.logs")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.queue_handler = _QueueHandler(log_queue)
+        self.logger.addHandler(self.queue_handler)
+
+    def tearDown(self):
+        """停止后台线程"""
+        self.logger.removeHandler(self.queue_handler)
+        self.listener.stop()
+
+    def test_hex_frame(self):
+        """测试帧数据输出为空格分隔的大写十六进制，可变缓冲区复制一份"""
+        buffer = bytearray(b'\x00\x03\x01\xab')
+        frame = HexFrame(buffer)
+        buffer[0] = 0xFF
+        self.assertEqual(str(frame), "00 03 01 AB")
+
+    def test_deferred_format(self):
+        """测试未开启的级别不格式化，开启的级别在后台线程格式化"""
+        probe = Probe()
+        self.logger.debug("应答帧: %s", probe)
+        self.logger.info("应答帧: %s", probe)
+        self.listener.stop()
+        self.listener.start()
+        self.assertEqual(self.stream.getvalue(), "INFO 应答帧: probe\n")
+        self.assertEqual(len(probe.threads), 1)
+        self.assertIsNot(probe.threads[0], threading.current_thread())
+
+    def test_parse_levels(self):
+        """测试解析环境变量中的子系统日志级别"""
+        self.assertEqual(parse_levels("app.modbus=debug, app.serial.tcp=INFO,bad"),
+                         {"app.modbus": "DEBUG", "app.serial.tcp": "INFO"})
+        self.assertEqual(parse_levels(None), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""LoRa空口调度模块测试"""
+
+import threading
+import unittest
+from app.serial.lora import AirtimeScheduler, airtime
+
+
+class FakeClock:
+    """可手动推进的时钟，sleep直接推进时间"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestLora(unittest.TestCase):
+    """LoRa空口调度模块测试类"""
+
+    def setUp(self):
+        """创建使用模拟时钟的调度器"""
+        self.clock = FakeClock()
+        self.gateway = ("192.168.0.80", 10125)
+
+    def make_scheduler(self, duty_cycle, guard=0.0):
+        """创建调度器"""
+        return AirtimeScheduler(duty_cycle=duty_cycle, window=100, guard=guard,
+                                clock=self.clock, sleep=self.clock.sleep)
+
+    def test_airtime(self):
+        """测试空中时间估算（与Semtech计算器结果一致）"""
+        self.assertAlmostEqual(airtime(10, sf=7, bandwidth=125000, coding_rate=1, preamble=8), 0.041216, places=6)
+        # 扩频因子越大、负载越长，空中时间越长
+        self.assertGreater(airtime(83, sf=7), airtime(10, sf=7))
+        self.assertGreater(airtime(10, sf=12), airtime(10, sf=7) * 20)
+
+    def test_guard_time(self):
+        """测试同一网关相邻问询之间保留保护间隔"""
+        scheduler = self.make_scheduler(1.0, guard=0.5)
+        self.assertTrue(scheduler.acquire(self.gateway, 10, 23))
+        self.clock.sleep(1)
+        scheduler.release(self.gateway)
+        self.assertTrue(scheduler.acquire(self.gateway, 10, 23))
+        scheduler.release(self.gateway)
+        self.assertAlmostEqual(scheduler.stats(self.gateway)["wait_total"], 0.5)
+
+    def test_duty_cycle_budget(self):
+        """测试占空比预算不足时推迟或跳过问询"""
+        scheduler = self.make_scheduler(0.01)
+        cost = scheduler.cost(10, 83)
+        polls = int(scheduler.budget // cost)
+        first = self.clock.now
+        for _ in range(polls):
+            self.assertTrue(scheduler.acquire(self.gateway, 10, 83, max_wait=0))
+            self.clock.sleep(cost)
+            scheduler.release(self.gateway)
+
+        # 预算用尽，不允许等待时跳过
+        self.assertFalse(scheduler.acquire(self.gateway, 10, 83, max_wait=0))
+        self.assertEqual(scheduler.stats(self.gateway)["deferred"], 1)
+
+        # 允许等待时等到最早的记录移出窗口
+        self.assertTrue(scheduler.acquire(self.gateway, 10, 83, max_wait=200))
+        scheduler.release(self.gateway)
+        self.assertAlmostEqual(self.clock.now, first + 100)
+
+    def test_serialize_gateway(self):
+        """测试同一网关同一时间只有一次问询在空中"""
+        scheduler = AirtimeScheduler(duty_cycle=1.0, guard=0.0)
+        self.assertTrue(scheduler.acquire(self.gateway, 10, 23))
+        result = []
+        worker = threading.Thread(target=lambda: result.append(scheduler.acquire(self.gateway, 10, 23, max_wait=0.05)))
+        worker.start()
+        worker.join()
+        self.assertEqual(result, [False])
+        # 其他网关不受影响
+        self.assertTrue(scheduler.acquire(("192.168.0.81", 10125), 10, 23))
+        scheduler.release(self.gateway)
+
+    def test_min_interval(self):
+        """测试按占空比计算最小问询周期"""
+        scheduler = self.make_scheduler(0.01)
+        # 光照和温振节点的问询帧/应答帧空口字节数（含LoRa地址前缀）
+        nodes = [(10, 23), (10, 41)]
+        expected = (scheduler.cost(*nodes[0]) + scheduler.cost(*nodes[1])) / 0.01
+        self.assertAlmostEqual(scheduler.min_interval(nodes), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+"""Modbus-TCP（MBAP）传输模块测试"""
+
+import socket
+import struct
+import threading
+import time
+import unittest
+from app.modbus import build_modbus_query
+from app.serial.mbap import MbapConnection, build_mbap_request, rtu_to_pdu, pdu_to_rtu
+
+# 各单元标识的应答延时（秒），None表示不应答
+UNIT_DELAYS = {1: 0.3, 2: 0.1, 3: None}
+
+
+class FakeModbusTcpServer:
+    """模拟Modbus-TCP网关：按单元标识延时应答，应答顺序与请求顺序无关"""
+
+    def __init__(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.address = self.server.getsockname()
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        """接收读寄存器请求（每个12字节）并在延时后应答"""
+        try:
+            conn, _ = self.server.accept()
+        except OSError:
+            return
+        lock = threading.Lock()
+        while True:
+            request = conn.recv(12)
+            if not request:
+                break
+            transaction_id, _, _, unit_id = struct.unpack_from('>HHHB', request)
+            delay = UNIT_DELAYS.get(unit_id)
+            if delay is None:
+                continue
+            pdu = bytes([0x03, 0x04, 0x00, unit_id, 0x00, 0xFF])
+            response = struct.pack('>HHHB', transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+            threading.Timer(delay, self.reply, args=(conn, lock, response)).start()
+
+    def reply(self, conn, lock, response):
+        """发送应答"""
+        with lock:
+            conn.sendall(response)
+
+    def close(self):
+        """关闭模拟网关"""
+        self.server.close()
+
+
+class TestMbap(unittest.TestCase):
+    """Modbus-TCP（MBAP）传输模块测试类"""
+
+    def setUp(self):
+        """启动模拟网关"""
+        self.server = FakeModbusTcpServer()
+        self.connection = MbapConnection(self.server.address, window=4)
+
+    def tearDown(self):
+        """关闭连接和模拟网关"""
+        self.connection.close()
+        self.server.close()
+
+    def test_frame_conversion(self):
+        """测试RTU帧与MBAP报文的转换"""
+        query = build_modbus_query(0x02, 0x03, 0x0000, 0x0002)
+        unit_id, pdu = rtu_to_pdu(query)
+        self.assertEqual((unit_id, pdu), (0x02, b'\x03\x00\x00\x00\x02'))
+        self.assertEqual(pdu_to_rtu(unit_id, pdu), query)
+        self.assertEqual(build_mbap_request(0x0102, unit_id, pdu).hex(), "010200000006020300000002")
+
+    def test_concurrent_units(self):
+        """测试多个单元的请求并发发出，按事务标识匹配应答"""
+        results = {}
+
+        def poll(unit_id):
+            results[unit_id] = self.connection.transact(unit_id, b'\x03\x00\x00\x00\x02', 1.0)
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=poll, args=(unit_id,)) for unit_id in (1, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.38)
+        self.assertEqual(results[1][0], bytes([0x03, 0x04, 0x00, 0x01, 0x00, 0xFF]))
+        self.assertEqual(results[2][0], bytes([0x03, 0x04, 0x00, 0x02, 0x00, 0xFF]))
+        self.assertLess(results[2][1], results[1][1])
+        self.assertEqual(self.connection.stats()["answered"], 2)
+
+    def test_timeout(self):
+        """测试无应答单元按超时返回，不影响其他单元"""
+        pdu, _ = self.connection.transact(3, b'\x03\x00\x00\x00\x02', 0.2)
+        self.assertEqual(pdu, b"")
+        self.assertEqual(self.connection.stats()["timeouts"], 1)
+
+        pdu, _ = self.connection.transact(2, b'\x03\x00\x00\x00\x02', 1.0)
+        self.assertEqual(len(pdu), 6)
+
+    def test_discard_late_response(self):
+        """测试丢弃无法匹配在途请求的报文"""
+        buffer = bytearray(struct.pack('>HHHB', 0x7777, 0, 3, 1) + b'\x03\x00')
+        self.connection._match(buffer)
+        self.assertEqual(buffer, bytearray())
+        self.assertEqual(self.connection.stats()["discarded_bytes"], 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 
 import unittest
 from app.modbus import (
+    ParseCache,
     calculate_crc,
     build_modbus_query,
     parse_modbus_response,
@@ -64,7 +65,19 @@ class TestModbus(unittest.TestCase):
         self.assertEqual(query_frame[3], 0x00)  # 自定义起始地址低字节
         self.assertEqual(query_frame[4], 0x00)  # 自定义寄存器数量高字节
         self.assertEqual(query_frame[5], 0x01)  # 自定义寄存器数量低字节
-    
+
+    def test_build_modbus_query_cache(self):
+        """测试问询帧按参数缓存，返回不可变的bytes"""
+        query_frame = build_modbus_query(0x01, 0x03, 0x0000, 0x0008)
+        self.assertIsInstance(query_frame, bytes)
+        self.assertEqual(query_frame.hex().upper(), "010300000008440C")
+        self.assertIs(build_modbus_query(0x01, 0x03, 0x0000, 0x0008), query_frame)
+
+        # LoRa目标地址前缀
+        lora_frame = build_modbus_query(0x01, 0x03, 0x0000, 0x0008, prefix=bytearray(b'\x56\x78'))
+        self.assertEqual(lora_frame, b'\x56\x78' + query_frame)
+        self.assertIs(build_modbus_query(0x01, 0x03, 0x0000, 0x0008, prefix=b'\x56\x78'), lora_frame)
+
     def test_parse_modbus_response(self):
         """测试解析Modbus-RTU应答帧"""
         # 测试有效的应答帧
@@ -89,7 +102,11 @@ class TestModbus(unittest.TestCase):
         response = bytearray([0x02, 0x03, 0x04, 0x02, 0x58, 0x00, 0xFF, 0x1A, 0xB7])
         result = parse_modbus_response(response)
         self.assertIsNone(result)
-        
+
+        # 同一总线上的其他从机：按指定的从机地址解析
+        result = parse_modbus_response(response, slave_id=0x02)
+        self.assertEqual(result['temperature'], 25.5)
+
         # 测试无效的应答帧（功能码不正确）
         response = bytearray([0x01, 0x04, 0x04, 0x02, 0x58, 0x00, 0xFF, 0x1A, 0xB7])
         result = parse_modbus_response(response)
@@ -100,6 +117,35 @@ class TestModbus(unittest.TestCase):
         result = parse_modbus_response(response)
         self.assertIsNone(result)
     
+    def test_parse_cache(self):
+        """测试相同的应答帧直接返回缓存的只读解析结果"""
+        calls = []
+
+        def parser(response, slave_id=None):
+            calls.append(response)
+            return parse_modbus_response(response, slave_id=slave_id)
+
+        cache = ParseCache(parser, maxsize=2)
+        response = bytearray([0x01, 0x03, 0x04, 0x02, 0x58, 0x00, 0xFF, 0x1A, 0xB7])
+        result = cache(response)
+        self.assertEqual(dict(result), {"temperature": 25.5, "humidity": 60.0})
+        self.assertIs(cache(bytes(response)), result)
+        self.assertEqual(len(calls), 1)
+        with self.assertRaises(TypeError):
+            result["temperature"] = 0
+
+        # 从机地址不同时分别解析，解析失败同样缓存
+        self.assertIsNone(cache(response, slave_id=0x02))
+        self.assertIsNone(cache(response, slave_id=0x02))
+        self.assertEqual(len(calls), 2)
+
+        # 超过容量时淘汰最久未使用的结果
+        cache(response, slave_id=0x03)
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache(response)
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(cache.stats()["hits"], 2)
+
     def test_parse_vibration_response(self):
         """测试解析温振监控的Modbus-RTU应答帧"""
         # 测试有效的应答帧
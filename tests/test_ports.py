@@ -0,0 +1,91 @@
+"""串口清单缓存模块测试"""
+
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from app.serial.ports import PortInventory, port_info
+
+
+def make_port(device, vid=None, pid=None, serial_number=None):
+    """构造串口信息"""
+    return SimpleNamespace(
+        device=device, description="USB Serial", hwid="USB VID:PID", vid=vid, pid=pid,
+        serial_number=serial_number, manufacturer="FTDI", product="FT232R", location="1-1"
+    )
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPorts(unittest.TestCase):
+    """串口清单缓存模块测试类"""
+
+    def setUp(self):
+        """创建使用模拟串口列表和临时设备目录的清单缓存"""
+        self.devices = [make_port("/dev/ttyUSB0", 0x0403, 0x6001, "A10K1")]
+        self.watch = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+        self.inventory = PortInventory(ttl=30, lister=lambda: list(self.devices), watch_path=self.watch.name, clock=self.clock)
+
+    def tearDown(self):
+        """删除临时设备目录"""
+        self.watch.cleanup()
+
+    def wait_scans(self, scans):
+        """等待后台枚举完成"""
+        deadline = time.monotonic() + 2
+        while self.inventory.scans < scans and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_port_info(self):
+        """测试串口信息包含VID/PID、序列号和稳定标识"""
+        info = port_info(make_port("/dev/ttyUSB0", 0x0403, 0x6001, "A10K1"))
+        self.assertEqual((info["vid"], info["pid"], info["serial_number"]), ("0403", "6001", "A10K1"))
+        self.assertEqual(info["stable_id"], "0403:6001:A10K1")
+        self.assertIsNone(port_info(make_port("/dev/ttyS0"))["stable_id"])
+
+    def test_cache(self):
+        """测试有效期内不重复枚举，过期后在后台刷新"""
+        self.assertEqual(self.inventory.ports()[0]["device"], "/dev/ttyUSB0")
+        self.inventory.ports()
+        self.assertEqual(self.inventory.scans, 1)
+
+        self.devices.append(make_port("/dev/ttyUSB1", 0x1A86, 0x7523))
+        self.clock.now += 31
+        # 过期时先返回当前缓存，后台完成枚举后返回新的列表
+        self.assertEqual(len(self.inventory.ports()), 1)
+        self.wait_scans(2)
+        self.assertEqual(len(self.inventory.ports()), 2)
+        self.assertEqual(self.inventory.version, 2)
+
+    def test_device_change(self):
+        """测试设备目录变化时不等有效期过期即刷新"""
+        self.inventory.ports()
+        self.devices.append(make_port("/dev/ttyACM0"))
+        os.mkdir(os.path.join(self.watch.name, "ttyACM0"))
+        stamp = os.stat(self.watch.name).st_mtime_ns
+        os.utime(self.watch.name, ns=(stamp + 10 ** 9, stamp + 10 ** 9))
+        self.inventory.ports()
+        self.wait_scans(2)
+        self.assertEqual([port["device"] for port in self.inventory.ports()], ["/dev/ttyACM0", "/dev/ttyUSB0"])
+
+    def test_resolve(self):
+        """测试按稳定标识找到重新插拔后改名的USB转换器"""
+        self.inventory.ports()
+        self.assertEqual(self.inventory.resolve("0403:6001:A10K1"), "/dev/ttyUSB0")
+        self.devices[0] = make_port("/dev/ttyUSB3", 0x0403, 0x6001, "A10K1")
+        self.assertEqual(self.inventory.resolve("0403:6001:A10K1"), "/dev/ttyUSB3")
+        self.assertEqual(self.inventory.resolve("COM3"), "COM3")
+
+
+if __name__ == '__main__':
+    unittest.main()
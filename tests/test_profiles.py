@@ -0,0 +1,129 @@
+"""设备问询配置模块测试"""
+
+import struct
+import unittest
+from app.modbus import calculate_crc
+from app.serial.profiles import PROFILES, build_plan, get_plan
+
+
+class TestProfiles(unittest.TestCase):
+    """设备问询配置模块测试类"""
+
+    def make_page(self, device_type, network_type="lora", target_address="5678", query_frame=None):
+        """构造页面配置"""
+        serial_config = {"port": "COM3", "baudrate": 9600}
+        if query_frame is not None:
+            serial_config["query_frame"] = query_frame
+        return {
+            "device_type": device_type,
+            "network_type": network_type,
+            "target_address": target_address,
+            "serial_config": serial_config
+        }
+
+    def test_default_plan(self):
+        """测试默认问询帧添加LoRa地址前缀，应答长度包含前缀"""
+        plan = build_plan(self.make_page("light"))
+        self.assertEqual(plan.query.hex().upper(), "5678010300000008440C")
+        self.assertEqual(plan.query_hex, "56 78 01 03 00 00 00 08 44 0C")
+        self.assertEqual(plan.expected_length, 23)
+        self.assertEqual(plan.prefix, b'\x56\x78')
+        self.assertIs(plan.profile, PROFILES["light"])
+
+        # 温振只读取解析函数用到的0000-0010
+        plan = build_plan(self.make_page("vibration", target_address="0003"))
+        self.assertEqual(plan.airtime_sizes, (10, 41))
+        self.assertEqual(len(plan.transactions), 1)
+
+    def test_standard_network(self):
+        """测试非LoRa网络和无效地址不添加前缀"""
+        plan = build_plan(self.make_page("temperature", network_type="modbus"))
+        self.assertEqual(plan.query.hex().upper(), "010300000002C40B")
+        self.assertEqual(plan.expected_length, 9)
+        self.assertEqual(plan.prefix, b"")
+
+        plan = build_plan(self.make_page("temperature", target_address="ZZ"))
+        self.assertEqual(plan.prefix, b"")
+        self.assertEqual(len(plan.query), 8)
+
+    def test_custom_frame(self):
+        """测试SSCOM页面按自定义问询帧的寄存器个数选择模块类型"""
+        plan = build_plan(self.make_page("sscom", target_address="0002", query_frame="00 02 01 03 00 00 00 02 C4 0B"))
+        self.assertIs(plan.profile, PROFILES["temperature"])
+        self.assertTrue(plan.custom)
+        # 问询帧已包含目标地址时不重复添加
+        self.assertEqual(plan.query.hex().upper(), "0002010300000002C40B")
+        self.assertEqual(plan.expected_length, 11)
+        self.assertEqual(plan.airtime_sizes, (10, 11))
+
+        plan = build_plan(self.make_page("sscom", query_frame="GG"))
+        self.assertIs(plan.profile, PROFILES["light"])
+        self.assertFalse(plan.custom)
+
+        # 光照页面不使用自定义问询帧
+        plan = build_plan(self.make_page("light", query_frame="010300000002C40B"))
+        self.assertFalse(plan.custom)
+
+    def test_slave_id(self):
+        """测试按设备的从机地址组帧，从机地址改变后重新构建"""
+        page_config = self.make_page("temperature", target_address="0002")
+        page_config["slave_id"] = 2
+        plan = get_plan(page_config)
+        self.assertEqual(plan.query[2], 0x02)
+        self.assertEqual(plan.slave_id, 2)
+
+        page_config["slave_id"] = 3
+        self.assertEqual(get_plan(page_config).query[2], 0x03)
+
+    def test_config_page(self):
+        """测试配置页面没有问询计划"""
+        self.assertIsNone(build_plan(self.make_page("config")))
+
+    def test_cache(self):
+        """测试问询计划缓存，相关配置改变后重新构建"""
+        page_config = self.make_page("light")
+        plan = get_plan(page_config)
+        self.assertIs(get_plan(page_config), plan)
+
+        page_config["query_interval"] = 5
+        self.assertIs(get_plan(page_config), plan)
+
+        page_config["target_address"] = "0002"
+        rebuilt = get_plan(page_config)
+        self.assertIsNot(rebuilt, plan)
+        self.assertEqual(rebuilt.prefix, b'\x00\x02')
+
+    def test_apply(self):
+        """测试解析结果写入页面数据"""
+        result = {"temperature": 21.5, "humidity": 40.0, "raw": b"\x00"}
+        reading = PROFILES["temperature"].apply(result, 100)
+        self.assertEqual(reading.to_dict(), {"temperature": 21.5, "humidity": 40.0, "timestamp": 100})
+        # 同类型的数据点共用字段定义，不为每个数据点创建字典
+        self.assertIs(type(reading), type(PROFILES["temperature"].apply(result, 101)))
+        self.assertFalse(hasattr(reading, "__dict__"))
+
+        reading = PROFILES["vibration"].apply({"temperature": 30.0, "status": "良好"}, 100)
+        self.assertEqual((reading["temperature"], reading["status"], reading["version"]), (30.0, "良好", None))
+
+
+    def test_decode(self):
+        """测试去掉任意LoRa地址前缀后解析，解析结果与地址无关"""
+        def response(prefix, registers):
+            frame = bytes([0x01, 0x03, 2 * len(registers)]) + struct.pack(f'>{len(registers)}H', *registers)
+            crc = calculate_crc(frame)
+            return prefix + frame + bytes([crc & 0xFF, crc >> 8])
+
+        # 温振节点：温度25.0℃，X轴速度1.2mm/s
+        registers = [250, 12, 0, 0] + [0] * 13
+        plan = build_plan(self.make_page("vibration", target_address="00A1"))
+        result = plan.decode(response(b'\x00\xa1', registers))
+        self.assertEqual((result["temperature"], result["velocity_x"], result["frequency_x"]), (25.0, 1.2, 0.0))
+
+        # 首字节在0x01-0x10之间的地址不被误认为Modbus地址码
+        plan = build_plan(self.make_page("light", target_address="0105"))
+        result = plan.decode(response(b'\x01\x05', [0, 215, 45, 600, 1, 0x03FE, 0, 0x01A7]))
+        self.assertEqual((result["temperature"], result["humidity"], result["light"]), (21.5, 45, 0x01A7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+"""实时数据缓冲模块测试"""
+
+import unittest
+from app.readings import ReadingBuffer, ReadingSchema
+
+
+class TestReadingBuffer(unittest.TestCase):
+    """实时数据缓冲模块测试类"""
+
+    def test_append_and_since(self):
+        """测试追加数据点并按时间戳增量获取"""
+        buffer = ReadingBuffer(capacity=10)
+        for ts in (100.0, 101.0, 102.0):
+            self.assertTrue(buffer.append("temperature", {"temperature": 25.0, "timestamp": ts}))
+
+        # 只返回严格大于给定时间戳的数据点
+        points = buffer.since("temperature", 100.0)
+        self.assertEqual([p["timestamp"] for p in points], [101.0, 102.0])
+        self.assertEqual(buffer.since("temperature", 102.0), [])
+
+        # 未知设备返回空列表
+        self.assertEqual(buffer.since("light", 0), [])
+
+    def test_capacity(self):
+        """测试环形缓冲区容量限制"""
+        buffer = ReadingBuffer(capacity=3)
+        for ts in range(1, 6):
+            buffer.append("light", {"light": ts, "timestamp": float(ts)})
+        points = buffer.since("light", 0)
+        self.assertEqual([p["timestamp"] for p in points], [3.0, 4.0, 5.0])
+        self.assertEqual(buffer.latest("light")["timestamp"], 5.0)
+
+    def test_ignore_stale_points(self):
+        """测试忽略无时间戳或时间戳未前进的数据点"""
+        buffer = ReadingBuffer(capacity=10)
+        self.assertFalse(buffer.append("temperature", {"temperature": 25.0, "timestamp": 0}))
+        self.assertTrue(buffer.append("temperature", {"temperature": 25.0, "timestamp": 10.0}))
+        self.assertFalse(buffer.append("temperature", {"temperature": 26.0, "timestamp": 10.0}))
+        self.assertEqual(len(buffer.since("temperature", 0)), 1)
+
+    def test_copy_on_append(self):
+        """测试追加时复制数据，后续修改原字典不影响缓冲区"""
+        buffer = ReadingBuffer(capacity=10)
+        data = {"temperature": 25.0, "timestamp": 10.0}
+        buffer.append("temperature", data)
+        data["temperature"] = 99.0
+        self.assertEqual(buffer.latest("temperature")["temperature"], 25.0)
+
+    def test_limit_and_clear(self):
+        """测试数量限制和清空"""
+        buffer = ReadingBuffer(capacity=10)
+        for ts in range(1, 6):
+            buffer.append("vibration", {"temperature": 30.0, "timestamp": float(ts)})
+        points = buffer.since("vibration", 0, limit=2)
+        self.assertEqual([p["timestamp"] for p in points], [4.0, 5.0])
+
+        buffer.clear("vibration")
+        self.assertIsNone(buffer.latest("vibration"))
+
+
+    def test_reading_records(self):
+        """测试数据点保存为共用字段定义的记录，接口输出时转换为字典"""
+        schema = ReadingSchema("temperature", ("temperature", "humidity"))
+        buffer = ReadingBuffer(capacity=10)
+        buffer.append("temperature", schema.make({"temperature": 25.0, "humidity": 60.0}, 10.0))
+        buffer.append("temperature", {"humidity": 61.0, "temperature": 25.5, "timestamp": 11.0})
+        first, second = buffer.since("temperature", 0)
+        self.assertIsInstance(first, schema.record)
+        self.assertEqual(first.to_dict(), {"temperature": 25.0, "humidity": 60.0, "timestamp": 10.0})
+        self.assertEqual(second.to_dict(), {"humidity": 61.0, "temperature": 25.5, "timestamp": 11.0})
+        with self.assertRaises(KeyError):
+            first["co2"]
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""寄存器合并读取模块测试"""
+
+import unittest
+from app.modbus import calculate_crc
+from app.serial.registers import RegisterRead, plan_reads, assemble_response
+
+
+def make_response(prefix, registers):
+    """构造带LoRa地址前缀的03功能码应答帧"""
+    data = b''.join(value.to_bytes(2, 'big') for value in registers)
+    frame = bytes([0x01, 0x03, len(data)]) + data
+    crc = calculate_crc(frame)
+    return prefix + frame + bytes([crc & 0xFF, crc >> 8])
+
+
+class TestRegisters(unittest.TestCase):
+    """寄存器合并读取模块测试类"""
+
+    def test_contiguous(self):
+        """测试连续寄存器合并为一次读取"""
+        self.assertEqual(plan_reads(range(0, 17)), [RegisterRead(0x0000, 17)])
+        self.assertEqual(plan_reads([]), [])
+
+    def test_max_gap(self):
+        """测试空闲寄存器不超过max_gap时合并，否则拆分"""
+        # 温振寄存器映射：0007-0008和000D-0020为保留寄存器
+        registers = list(range(0x00, 0x07)) + list(range(0x09, 0x0D)) + [0x21, 0x23, 0x25]
+        self.assertEqual(plan_reads(registers, max_gap=8),
+                         [RegisterRead(0x0000, 0x0D), RegisterRead(0x0021, 5)])
+        self.assertEqual(plan_reads(registers, max_gap=0),
+                         [RegisterRead(0x0000, 7), RegisterRead(0x0009, 4), RegisterRead(0x0021, 1),
+                          RegisterRead(0x0023, 1), RegisterRead(0x0025, 1)])
+        self.assertEqual(plan_reads(registers, max_gap=20), [RegisterRead(0x0000, 0x26)])
+
+    def test_max_count(self):
+        """测试单次读取不超过max_count个寄存器"""
+        self.assertEqual(plan_reads(range(0, 10), max_count=4),
+                         [RegisterRead(0, 4), RegisterRead(4, 4), RegisterRead(8, 2)])
+        self.assertEqual(plan_reads([0, 5], max_gap=8, max_count=5), [RegisterRead(0, 1), RegisterRead(5, 1)])
+
+    def test_assemble(self):
+        """测试多次读取的应答按寄存器地址拼装，未读取的寄存器填0"""
+        prefix = b'\x00\x03'
+        reads = [RegisterRead(0, 2), RegisterRead(4, 1)]
+        responses = [make_response(prefix, [0x0101, 0x0202]), make_response(prefix, [0x0505])]
+        self.assertEqual(assemble_response(reads, responses, prefix),
+                         make_response(prefix, [0x0101, 0x0202, 0, 0, 0x0505]))
+
+        # 任一应答不完整时拼装失败
+        self.assertEqual(assemble_response(reads, [responses[0], prefix], prefix), b"")
+
+
+if __name__ == '__main__':
+    unittest.main()
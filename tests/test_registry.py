@@ -0,0 +1,103 @@
+"""设备注册表模块测试"""
+
+import os
+import tempfile
+import unittest
+from app.config import Config
+from app.database import init_db
+from app.registry import DeviceRegistry, validate_device, BUILTIN_IDS
+
+
+class TestDeviceRegistry(unittest.TestCase):
+    """设备注册表模块测试类"""
+
+    def setUp(self):
+        """使用临时数据库"""
+        self.temp_db = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        self.temp_db.close()
+        self.original_db_file = Config.DATABASE_FILE
+        Config.DATABASE_FILE = self.temp_db.name
+        init_db()
+        self.registry = DeviceRegistry()
+        self.registry.load()
+        self.device = {
+            "id": "vib-pump-01",
+            "name": "1号泵温振",
+            "device_type": "vibration",
+            "lora_address": "00a1",
+            "gateway_ip": "192.168.0.81",
+            "gateway_port": 10125,
+            "query_interval": 5
+        }
+
+    def tearDown(self):
+        """恢复数据库配置"""
+        Config.DATABASE_FILE = self.original_db_file
+        os.unlink(self.temp_db.name)
+
+    def test_default_devices(self):
+        """测试空数据库写入内置设备"""
+        ids = [device["id"] for device in self.registry.all()]
+        self.assertEqual(sorted(ids), sorted(BUILTIN_IDS))
+        self.assertEqual(self.registry.get("temperature")["lora_address"], "0002")
+
+    def test_register_and_lookup(self):
+        """测试注册设备后按ID和地址查找，并持久化到数据库"""
+        device = self.registry.register(self.device)
+        self.assertEqual(device["lora_address"], "00A1")
+        self.assertEqual(self.registry.get("vib-pump-01")["name"], "1号泵温振")
+        self.assertEqual(self.registry.find("00a1", "192.168.0.81", 10125)["id"], "vib-pump-01")
+        self.assertIsNone(self.registry.find("00A1", "192.168.0.80", 10125))
+
+        reloaded = DeviceRegistry()
+        reloaded.load()
+        self.assertEqual(reloaded.get("vib-pump-01"), device)
+
+    def test_update(self):
+        """测试更新设备时沿用未提供的字段并更新地址索引"""
+        self.registry.register(self.device)
+        device = self.registry.register({"id": "vib-pump-01", "lora_address": "00A2"})
+        self.assertEqual(device["gateway_ip"], "192.168.0.81")
+        self.assertIsNone(self.registry.find("00A1", "192.168.0.81", 10125))
+        self.assertEqual(self.registry.find("00A2", "192.168.0.81", 10125)["id"], "vib-pump-01")
+
+    def test_duplicate_address(self):
+        """测试同一网关上的LoRa地址不能重复"""
+        self.registry.register(self.device)
+        with self.assertRaises(ValueError):
+            self.registry.register(dict(self.device, id="vib-pump-02"))
+
+    def test_multiple_slaves(self):
+        """测试同一LoRa节点总线上挂接多个从机地址不同的设备"""
+        self.registry.register(self.device)
+        device = self.registry.register(dict(self.device, id="vib-pump-02", slave_id=2))
+        self.assertEqual(device["slave_id"], 2)
+        self.assertEqual(self.registry.find("00A1", "192.168.0.81", 10125)["id"], "vib-pump-01")
+        self.assertEqual(self.registry.find("00A1", "192.168.0.81", 10125, 2)["id"], "vib-pump-02")
+        with self.assertRaises(ValueError):
+            self.registry.register(dict(self.device, id="vib-pump-03", slave_id=2))
+
+    def test_validation(self):
+        """测试设备信息校验"""
+        for field, value in (("id", "config"), ("id", "a b"), ("device_type", "camera"),
+                             ("lora_address", "12345"), ("gateway_ip", "gateway"),
+                             ("gateway_port", 70000), ("query_interval", 0),
+                             ("slave_id", 0), ("slave_id", 248)):
+            with self.assertRaises(ValueError):
+                validate_device(dict(self.device, **{field: value}))
+
+    def test_remove(self):
+        """测试删除设备"""
+        self.registry.register(self.device)
+        self.registry.remove("vib-pump-01")
+        self.assertIsNone(self.registry.get("vib-pump-01"))
+        self.assertIsNone(self.registry.find("00A1", "192.168.0.81", 10125))
+
+        with self.assertRaises(ValueError):
+            self.registry.remove("light")
+        with self.assertRaises(ValueError):
+            self.registry.remove("vib-pump-01")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""节点往返时延估计模块测试"""
+
+import unittest
+from app.serial.rtt import RttEstimator, RttTracker, node_key
+
+
+class TestRtt(unittest.TestCase):
+    """节点往返时延估计模块测试类"""
+
+    def test_initial_timeout(self):
+        """测试没有样本时使用初始等待时间"""
+        estimator = RttEstimator(initial=2.0, minimum=0.1, maximum=5.0)
+        self.assertEqual(estimator.rto, 2.0)
+        self.assertIsNone(estimator.stats()["srtt"])
+
+    def test_observe(self):
+        """测试按RFC 6298更新平滑往返时延和等待时间"""
+        estimator = RttEstimator(initial=2.0, minimum=0.01, maximum=5.0)
+        estimator.observe(0.2)
+        self.assertAlmostEqual(estimator.srtt, 0.2)
+        self.assertAlmostEqual(estimator.rttvar, 0.1)
+        self.assertAlmostEqual(estimator.rto, 0.6)
+
+        estimator.observe(0.4)
+        self.assertAlmostEqual(estimator.rttvar, 0.75 * 0.1 + 0.25 * 0.2)
+        self.assertAlmostEqual(estimator.srtt, 0.875 * 0.2 + 0.125 * 0.4)
+
+    def test_healthy_node_converges(self):
+        """测试稳定的快速节点等待时间收敛到下限附近"""
+        estimator = RttEstimator(initial=2.0, minimum=0.1, maximum=5.0)
+        for _ in range(50):
+            estimator.observe(0.05)
+        self.assertAlmostEqual(estimator.rto, 0.1, places=2)
+
+    def test_backoff(self):
+        """测试超时后等待时间加倍且不超过上限"""
+        estimator = RttEstimator(initial=2.0, minimum=0.1, maximum=5.0)
+        estimator.backoff()
+        self.assertEqual(estimator.rto, 4.0)
+        estimator.backoff()
+        self.assertEqual(estimator.rto, 5.0)
+        self.assertEqual(estimator.timeouts, 2)
+
+        # 收到有效应答后重新计算
+        estimator.observe(0.3)
+        self.assertAlmostEqual(estimator.rto, 0.9)
+
+    def test_tracker(self):
+        """测试按节点分别统计"""
+        tracker = RttTracker()
+        fast = node_key({"tcp_server_ip": "192.168.0.80", "tcp_server_port": 10125, "target_address": "0002"})
+        slow = node_key({"tcp_server_ip": "192.168.0.80", "tcp_server_port": 10125, "target_address": "0003"})
+        for _ in range(20):
+            tracker.observe(fast, 0.05)
+            tracker.observe(slow, 1.2)
+        self.assertLess(tracker.timeout(fast), 0.2)
+        self.assertGreater(tracker.timeout(slow), 1.2)
+        self.assertEqual(tracker.stats(fast)["samples"], 20)
+
+        tracker.reset(fast)
+        self.assertEqual(tracker.stats(fast)["samples"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+"""问询调度模块测试"""
+
+import threading
+import time
+import unittest
+from app.serial.scheduler import PollScheduler
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPollScheduler(unittest.TestCase):
+    """问询调度模块测试类"""
+
+    def setUp(self):
+        """创建使用模拟时钟的调度器"""
+        self.clock = FakeClock()
+        self.scheduler = PollScheduler(clock=self.clock)
+
+    def next_due_in(self, device):
+        """距离设备下一次截止时间的秒数"""
+        return self.scheduler.stats(device)["next_due_in"]
+
+    def test_fixed_cadence(self):
+        """测试按固定节拍触发，问询耗时不累加到周期中"""
+        self.scheduler.add("temperature", 2)
+        self.assertEqual(self.next_due_in("temperature"), 2.0)
+
+        self.clock.now = 102.0
+        self.assertTrue(self.scheduler.wait("temperature"))
+        self.assertEqual(self.next_due_in("temperature"), 2.0)
+
+        # 本次问询耗时0.8秒，下一次仍在104秒触发
+        self.clock.now = 102.8
+        self.assertAlmostEqual(self.next_due_in("temperature"), 1.2)
+
+    def test_missed_deadlines(self):
+        """测试落后时跳过错过的节拍并计数"""
+        self.scheduler.add("vibration", 2)
+        self.clock.now = 107.0
+        self.assertTrue(self.scheduler.wait("vibration"))
+        stats = self.scheduler.stats("vibration")
+        self.assertEqual(stats["missed_deadlines"], 2)
+        self.assertEqual(stats["last_lateness"], 5.0)
+        self.assertEqual(stats["next_due_in"], 1.0)
+
+    def test_bounded_state(self):
+        """测试长时间问询后调度状态不增长：每个设备只保存一个截止时间"""
+        self.scheduler.add("light", 5)
+        self.scheduler.add("temperature", 2)
+        for _ in range(10000):
+            self.clock.now += 5
+            self.assertTrue(self.scheduler.wait("light"))
+            self.assertTrue(self.scheduler.wait("temperature"))
+            self.scheduler.trigger("temperature")
+        self.assertEqual(len(self.scheduler._devices), 2)
+        self.assertEqual(self.scheduler.stats("light")["polls"], 10000)
+
+    def test_interval_and_trigger(self):
+        """测试更新周期、立即触发和移除设备"""
+        self.scheduler.add("light", 60)
+        self.scheduler.set_interval("light", 2)
+        self.assertEqual(self.next_due_in("light"), 2.0)
+
+        self.scheduler.trigger("light")
+        self.assertEqual(self.next_due_in("light"), 0.0)
+        self.assertTrue(self.scheduler.wait("light"))
+
+        with self.assertRaises(ValueError):
+            self.scheduler.set_interval("light", 0)
+
+        self.scheduler.remove("light")
+        self.assertFalse(self.scheduler.wait("light"))
+        self.assertIsNone(self.scheduler.stats("light"))
+
+    def test_wait(self):
+        """测试阻塞等待截止时间和停止等待"""
+        scheduler = PollScheduler()
+        scheduler.add("temperature", 0.05)
+        start = time.monotonic()
+        self.assertTrue(scheduler.wait("temperature"))
+        self.assertGreaterEqual(time.monotonic() - start, 0.04)
+
+        stop = threading.Event()
+        scheduler.set_interval("temperature", 60)
+        threading.Timer(0.05, stop.set).start()
+        self.assertFalse(scheduler.wait("temperature", stop=stop.is_set, poll=0.01))
+
+
+if __name__ == '__main__':
+    unittest.main()
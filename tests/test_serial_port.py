@@ -0,0 +1,183 @@
+"""串口通讯处理模块测试（使用伪终端对模拟串口设备）"""
+
+import os
+import pty
+import threading
+import time
+import tty
+import unittest
+import serial
+from app.serial import serial_service
+from app.serial.config import SerialConfig
+from app.serial.mbap import pdu_to_rtu
+from app.serial.serial_port import read_rtu_frame
+
+SILENCE = 0.02
+
+
+class FakeSerialDevice:
+    """模拟RS-485从机：在伪终端主端接收问询帧并返回温湿度应答帧"""
+
+    def __init__(self, slave_id=0x01, delay=0.0):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.master)
+        self.device = os.ttyname(self.slave)
+        self.slave_id = slave_id
+        self.delay = delay
+        self.queries = []
+        self.running = True
+        self.thread = None
+
+    def start(self):
+        """启动应答线程"""
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        """读取8字节问询帧，地址匹配时应答（湿度60.0%，温度25.5°C）"""
+        buffer = b""
+        while self.running:
+            try:
+                buffer += os.read(self.master, 64)
+            except OSError:
+                break
+            while len(buffer) >= 8:
+                query, buffer = buffer[:8], buffer[8:]
+                self.queries.append(query)
+                if query[0] != self.slave_id:
+                    continue
+                time.sleep(self.delay)
+                os.write(self.master, pdu_to_rtu(self.slave_id, bytes([0x03, 0x04, 0x02, 0x58, 0x00, 0xFF])))
+
+    def write(self, data):
+        """从主端写入数据"""
+        os.write(self.master, data)
+
+    def close(self):
+        """关闭伪终端"""
+        self.running = False
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class TestReadRtuFrame(unittest.TestCase):
+    """RTU帧接收测试类"""
+
+    def setUp(self):
+        """打开伪终端从端作为串口"""
+        self.device = FakeSerialDevice()
+        self.port = serial.Serial(self.device.device, baudrate=9600, timeout=0)
+
+    def tearDown(self):
+        """关闭串口和伪终端"""
+        self.port.close()
+        self.device.close()
+
+    def test_expected_length(self):
+        """测试收齐预期长度立即返回，分段到达的数据拼接为一帧"""
+        timer = threading.Timer(0.05, self.device.write, args=(b'\x01\x03\x04',))
+        timer.start()
+        threading.Timer(0.055, self.device.write, args=(b'\x02\x58\x00\xFF\x00\x00',)).start()
+        frame, elapsed = read_rtu_frame(self.port, 9, 1.0, SILENCE)
+        self.assertEqual(frame, b'\x01\x03\x04\x02\x58\x00\xFF\x00\x00')
+        self.assertLess(elapsed, 0.3)
+
+    def test_silence(self):
+        """测试超过帧间静默时间没有新数据即认为帧结束"""
+        # 异常应答只有5字节，不必等到应答超时
+        self.device.write(b'\x01\x83\x02\xC0\xF1')
+        start = time.monotonic()
+        frame, _ = read_rtu_frame(self.port, 9, 1.0, SILENCE)
+        self.assertEqual(frame, b'\x01\x83\x02\xC0\xF1')
+        self.assertLess(time.monotonic() - start, 0.3)
+
+        # 间隔超过静默时间的数据属于下一帧
+        self.device.write(b'\x01\x02')
+        threading.Timer(0.1, self.device.write, args=(b'\x03\x04',)).start()
+        frame, _ = read_rtu_frame(self.port, None, 1.0, SILENCE)
+        self.assertEqual(frame, b'\x01\x02')
+        frame, _ = read_rtu_frame(self.port, None, 1.0, SILENCE)
+        self.assertEqual(frame, b'\x03\x04')
+
+    def test_timeout(self):
+        """测试超时未收到数据返回空帧"""
+        frame, elapsed = read_rtu_frame(self.port, 9, 0.1, SILENCE)
+        self.assertEqual(frame, b"")
+        self.assertGreaterEqual(elapsed, 0.1)
+        self.assertLess(elapsed, 0.3)
+
+
+class TestSerialConfig(unittest.TestCase):
+    """串口配置测试类"""
+
+    def test_normalize(self):
+        """测试串口配置校验和字符时间"""
+        config = SerialConfig()
+        normalized = config.normalize({"port": "/dev/ttyUSB0", "baudrate": "19200", "parity": "e", "stopbits": "1"})
+        self.assertEqual(normalized["baudrate"], 19200)
+        self.assertEqual(normalized["parity"], "E")
+        self.assertEqual(normalized["stopbits"], 1)
+        self.assertEqual(config.bits_per_char(normalized), 11)
+        self.assertAlmostEqual(config.char_time(normalized), 11 / 19200)
+
+        with self.assertRaises(ValueError):
+            config.normalize({"port": "/dev/ttyUSB0", "baudrate": "fast"})
+        with self.assertRaises(ValueError):
+            config.normalize({"port": "/dev/ttyUSB0", "parity": "X"})
+
+
+class TestSerialPortHandler(unittest.TestCase):
+    """串口通讯处理器测试类"""
+
+    PAGES = ("serial-test-1", "serial-test-2")
+
+    def setUp(self):
+        """创建两个挂在同一串口上的从机页面"""
+        self.device = FakeSerialDevice(slave_id=0x02)
+        self.device.start()
+        for slave_id, page in enumerate(self.PAGES, start=1):
+            serial_service.pages[page] = serial_service._new_page(
+                {"device_type": "temperature", "lora_address": "", "slave_id": slave_id}
+            )
+            serial_service.pages[page]["network_type"] = "modbus"
+
+    def tearDown(self):
+        """关闭串口并删除测试页面"""
+        for page in self.PAGES:
+            serial_service.close_serial(page)
+            del serial_service.pages[page]
+        self.device.close()
+
+    def test_handle_communication(self):
+        """测试串口问询：多个从机页面共用串口，按从机地址问询和解析"""
+        config = {"port": self.device.device, "baudrate": 115200}
+        for page in self.PAGES:
+            success, message = serial_service.open_serial(config, page)
+            self.assertTrue(success, message)
+        self.assertIs(serial_service.pages[self.PAGES[0]]["serial_port"], serial_service.pages[self.PAGES[1]]["serial_port"])
+
+        # 同一串口不能以不同参数打开
+        success, _ = serial_service.open_serial(dict(config, baudrate=9600), "sscom")
+        self.assertFalse(success)
+
+        timestamp = time.time()
+        start = time.monotonic()
+        serial_service.serial_handler.handle_communication(serial_service, self.PAGES[1], timestamp)
+        self.assertLess(time.monotonic() - start, 0.5)
+        data = serial_service.get_page(self.PAGES[1])["data"]
+        self.assertEqual((data["temperature"], data["humidity"]), (25.5, 60.0))
+        frames = serial_service.get_frame_data(self.PAGES[1])
+        self.assertEqual(frames["query"], "02 03 00 00 00 02 C4 38")
+        self.assertEqual(frames["frames"][-1]["direction"], "recv")
+
+        # 一个页面关闭串口后，共用串口的其他页面仍可问询
+        serial_service.close_serial(self.PAGES[0])
+        self.assertTrue(serial_service.pages[self.PAGES[1]]["serial_port"].is_open)
+        self.assertEqual(len(self.device.queries), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
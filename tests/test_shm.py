@@ -0,0 +1,97 @@
+"""共享内存最新值表模块测试"""
+
+import os
+import unittest
+from app.shm import LatestValueTable
+
+
+class TestLatestValueTable(unittest.TestCase):
+    """共享内存最新值表模块测试类"""
+
+    def setUp(self):
+        """创建测试用最新值表"""
+        self.name = f"iot_test_latest_{os.getpid()}"
+        self.writer = LatestValueTable.create(self.name, capacity=8)
+        self.reader = LatestValueTable.attach(self.name)
+
+    def tearDown(self):
+        """删除测试用最新值表"""
+        self.reader.close()
+        self.writer.close()
+
+    def test_write_and_read(self):
+        """测试写入后在另一个连接中读取"""
+        self.writer.write("temperature", {"temperature": 25.5, "humidity": None, "timestamp": 100.0})
+        data = self.reader.read("temperature")
+        self.assertEqual(data, {"temperature": 25.5, "humidity": None, "timestamp": 100.0})
+
+        # 更新已有槽位
+        self.writer.write("temperature", {"temperature": 26.0, "humidity": 60.0, "timestamp": 102.0})
+        self.assertEqual(self.reader.read("temperature"),
+                         {"temperature": 26.0, "humidity": 60.0, "timestamp": 102.0})
+
+        # 未写入的设备
+        self.assertIsNone(self.reader.read("vibration"))
+
+    def test_skip_non_numeric(self):
+        """测试跳过未知的文本字段，状态等级按编号存储后还原"""
+        self.writer.write("vibration", {"temperature": 30.0, "status": "A", "timestamp": 5.0})
+        self.assertEqual(self.reader.read("vibration"), {"temperature": 30.0, "timestamp": 5.0})
+
+        self.writer.write("vibration", {"temperature": 31.0, "status": "警告", "version": 3, "timestamp": 6.0})
+        self.assertEqual(self.reader.read("vibration", complete_only=True),
+                         {"temperature": 31.0, "status": "警告", "version": 3, "timestamp": 6.0})
+
+    def test_capacity(self):
+        """测试槽位用尽时忽略新指标"""
+        self.writer.write("light", {f"m{i}": float(i) for i in range(10)})
+        data = self.reader.read("light")
+        # 一个槽位为设备记录槽位
+        self.assertEqual(len(data), 7 + 1)
+        self.assertIsNone(self.reader.read("light", complete_only=True))
+
+    def test_long_device_name(self):
+        """测试设备名称过长时重复写入使用同一槽位，不截断指标名"""
+        device = "vibration-gateway-0A12-slave-03"
+        for ts in range(5):
+            self.writer.write(device, {"resultant_acceleration": 1.5, "resultant_velocity": 0.5, "timestamp": float(ts + 1)})
+        self.assertEqual(self.writer._used(), 3)
+        self.assertEqual(self.reader.read(device, complete_only=True),
+                         {"resultant_acceleration": 1.5, "resultant_velocity": 0.5, "timestamp": 5.0})
+
+    def test_complete(self):
+        """测试整数还原，有非数值字段或槽位用尽时标记为不完整"""
+        self.writer.write("light", {"co2": 400, "pressure": 101.3, "timestamp": 1.0})
+        data = self.reader.read("light", complete_only=True)
+        self.assertEqual(data, {"co2": 400, "pressure": 101.3, "timestamp": 1.0})
+        self.assertIsInstance(data["co2"], int)
+
+        self.writer.write("vibration", {"temperature": 30.0, "status": "未知", "timestamp": 5.0})
+        self.assertIsNone(self.reader.read("vibration", complete_only=True))
+
+        self.writer.write("temperature", {f"m{i}": float(i) for i in range(6)})
+        self.assertIsNone(self.reader.read("temperature", complete_only=True))
+
+    def test_record_consistency(self):
+        """测试写入过程中读取时等待整条记录写完，不混合两次采样的字段"""
+        self.writer.write("temperature", {"temperature": 25.0, "humidity": 50.0, "timestamp": 1.0})
+        record = self.writer._index["temperature/"]
+        slot = self.writer._index["temperature/temperature"]
+        # 模拟写入到一半：记录版本号为奇数，温度已更新，湿度尚未更新
+        self.writer._bump_seq(record)
+        self.writer._write_slot(slot, 26.0, 0, 2.0)
+        data = self.reader.read("temperature", complete_only=True)
+        self.assertIsNone(data)
+        self.writer._bump_seq(record)
+        self.assertEqual(self.reader.read("temperature")["temperature"], 26.0)
+
+    def test_invalid_after_close(self):
+        """测试创建者关闭后读者检测到失效"""
+        self.assertTrue(self.reader.is_valid())
+        self.writer.close()
+        self.assertFalse(self.reader.is_valid())
+        self.assertIsNone(LatestValueTable.attach(self.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
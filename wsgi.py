@@ -0,0 +1,14 @@
+"""WSGI入口文件
+
+供gunicorn等多进程WSGI服务器使用，例如：
+    python acquisition.py &
+    ACQUISITION_MODE=remote gunicorn -w 4 -b 0.0.0.0:5000 wsgi:app
+"""
+
+from app import app
+from app.api import api_bp
+from app.web import web_bp
+
+# 注册蓝图
+app.register_blueprint(api_bp)
+app.register_blueprint(web_bp)